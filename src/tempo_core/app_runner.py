@@ -3,8 +3,8 @@ from __future__ import annotations
 import os
 import subprocess
 
-from tempo_core import file_io, logger
-from tempo_core.data_structures import ExecutionMode
+from tempo_core import file_io, log_parsers, logger, process_management
+from tempo_core.data_structures import ExecutionMode, LogLevel
 
 
 def run_app(
@@ -12,7 +12,7 @@ def run_app(
     exec_mode: ExecutionMode = ExecutionMode.SYNC,
     args: list[str] | None = None,
     working_dir: str = os.path.normpath(f"{file_io.SCRIPT_DIR}/working_dir"),
-):
+) -> int | None:
     os.makedirs(working_dir, exist_ok=True)
 
     if not args:
@@ -29,10 +29,8 @@ def run_app(
             logger.log_message(f"Command: arg: {arg}")
         logger.log_message("----------------------------------------------------")
         logger.log_message(f"Command: {command} running with the {exec_mode} enum")
-        os.makedirs(working_dir, exist_ok=True)
-        if working_dir and os.path.isdir(working_dir):
-            os.chdir(working_dir)
-
+        # the child gets working_dir through cwd, changing the directory of this whole
+        # process would race with the mod tasks running other programs at once
         process = subprocess.Popen(
             command,
             cwd=working_dir,
@@ -41,14 +39,36 @@ def run_app(
             text=True,
         )
 
-        if process.stdout:
-            for line in iter(process.stdout.readline, ""):
-                logger.log_message(line.strip())
+        log_parser = log_parsers.get_log_parser(command)
+        log_parse_state = None
+        if log_parser is not None:
+            log_parse_state = log_parsers.start_log_parse(log_parser, command)
+        try:
+            if process.stdout:
+                for line in iter(process.stdout.readline, ""):
+                    line = line.strip()
+                    if log_parse_state is None:
+                        logger.log_message(line, LogLevel.DEBUG)
+                        continue
+                    log_level, should_abort = log_parsers.parse_log_line(
+                        log_parse_state, line
+                    )
+                    logger.log_message(line, log_level)
+                    if should_abort:
+                        logger.log_message(
+                            f"Error: Aborting {command}, its output matched a fatal log pattern"
+                        )
+                        process_management.kill_process_tree(process.pid)
+                        break
 
-            process.stdout.close()
+                process.stdout.close()
 
-        process.wait()
+            process.wait()
+        finally:
+            if log_parse_state is not None:
+                log_parsers.finish_log_parse(log_parse_state, process.returncode)
         logger.log_message(f"Command: {command} finished")
+        return process.returncode
 
     elif exec_mode == ExecutionMode.ASYNC:
         command = exe_path
@@ -56,3 +76,4 @@ def run_app(
             command = f"{command} {arg}"
         logger.log_message(f"Command: {command} started with the {exec_mode} enum")
         subprocess.Popen(command, cwd=working_dir, start_new_session=True)
+    return None
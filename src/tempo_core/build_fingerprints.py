@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+
+from tempo_core import hash_cache, logger, settings
+
+
+def get_file_identity(file_path: str) -> list:
+    try:
+        file_stat = os.stat(file_path)
+    except OSError:
+        return [os.path.abspath(file_path), None, None]
+    return [os.path.abspath(file_path), file_stat.st_size, file_stat.st_mtime_ns]
+
+
+# relative path -> absolute path, for every file below tree_path
+def get_tree_files(
+    tree_path: str, excluded_dir_names: frozenset[str] = frozenset()
+) -> dict[str, str]:
+    tree_files = {}
+    for root, dirs, files in os.walk(tree_path):
+        if excluded_dir_names:
+            dirs[:] = [folder for folder in dirs if folder not in excluded_dir_names]
+        for file in files:
+            file_path = os.path.join(root, file)
+            relative_path = os.path.relpath(file_path, tree_path).replace("\\", "/")
+            tree_files[relative_path] = file_path
+    return tree_files
+
+
+# digest of the content of files (relative path -> absolute path), independent of where they live
+def get_files_digest(files: dict[str, str]) -> str:
+    relative_paths = sorted(files)
+    file_hashes = hash_cache.get_file_hashes(
+        [files[relative_path] for relative_path in relative_paths]
+    )
+    files_digest = hashlib.sha256()
+    for relative_path in relative_paths:
+        files_digest.update(relative_path.encode("utf-8"))
+        files_digest.update(b"\0")
+        files_digest.update(file_hashes[files[relative_path]].encode("ascii"))
+        files_digest.update(b"\n")
+    return files_digest.hexdigest()
+
+
+# like get_files_digest, but only looks at sizes and modification times
+def get_files_stat_digest(files: dict[str, str]) -> str:
+    files_digest = hashlib.sha256()
+    for relative_path in sorted(files):
+        try:
+            file_stat = os.stat(files[relative_path])
+        except OSError:
+            continue
+        files_digest.update(
+            f"{relative_path}\0{file_stat.st_size}\0{file_stat.st_mtime_ns}\n".encode()
+        )
+    return files_digest.hexdigest()
+
+
+def get_fingerprint(fingerprint_parts: dict) -> str:
+    serialized_parts = json.dumps(fingerprint_parts, sort_keys=True, default=str)
+    return hashlib.sha256(serialized_parts.encode("utf-8")).hexdigest()
+
+
+def get_pak_fingerprint_path(mod_name: str) -> str:
+    return f"{settings.get_working_dir()}/pak_fingerprints/{mod_name}.json"
+
+
+def get_release_fingerprint_path(mod_name: str) -> str:
+    return f"{settings.get_working_dir()}/release_fingerprints/{mod_name}.json"
+
+
+def get_cook_fingerprint_path() -> str:
+    uproject_dir = os.path.dirname(settings.get_uproject_file())
+    return f"{uproject_dir}/Saved/Cooked/tempo_cook_fingerprint.json"
+
+
+def load_fingerprint_data(fingerprint_path: str) -> dict | None:
+    if not os.path.isfile(fingerprint_path):
+        return None
+    try:
+        with open(fingerprint_path, encoding="utf-8") as file:
+            fingerprint_data = json.load(file)
+        if not isinstance(fingerprint_data.get("fingerprint"), str):
+            return None
+        return fingerprint_data
+    except (OSError, json.JSONDecodeError, AttributeError) as e:
+        logger.log_message(
+            f'Warning: Ignoring unreadable fingerprint "{fingerprint_path}": {e}'
+        )
+        return None
+
+
+def load_fingerprint(fingerprint_path: str) -> str | None:
+    fingerprint_data = load_fingerprint_data(fingerprint_path)
+    if fingerprint_data is None:
+        return None
+    return fingerprint_data["fingerprint"]
+
+
+def save_fingerprint(
+    fingerprint_path: str, fingerprint: str, extra_data: dict | None = None
+):
+    os.makedirs(os.path.dirname(fingerprint_path), exist_ok=True)
+    with open(fingerprint_path, "w", encoding="utf-8") as file:
+        json.dump({**(extra_data or {}), "fingerprint": fingerprint}, file)
+
+
+def delete_fingerprint(fingerprint_path: str):
+    if os.path.isfile(fingerprint_path):
+        os.remove(fingerprint_path)
@@ -0,0 +1,186 @@
+import atexit
+import os
+import shutil
+import stat
+import threading
+import uuid
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+
+from tempo_core import logger, settings
+
+TRASH_DIR_NAME = ".tempo_trash"
+
+
+@dataclass
+class CleanupEngineInformation:
+    executor: ThreadPoolExecutor | None
+    pending_deletes: list[Future]
+    # trash dirs whose leftovers from an interrupted run were already queued
+    emptied_trash_dirs: set[str]
+    deleted_dir_count: int
+    deleted_file_count: int
+    deleted_byte_count: int
+
+
+cleanup_engine_information = CleanupEngineInformation(
+    executor=None,
+    pending_deletes=[],
+    emptied_trash_dirs=set(),
+    deleted_dir_count=0,
+    deleted_file_count=0,
+    deleted_byte_count=0,
+)
+cleanup_engine_lock = threading.Lock()
+
+
+# dirs below root_dir named one of target_dir_names, without walking into them
+def find_target_dirs(root_dir: str, target_dir_names: set[str]) -> list[str]:
+    target_dirs = []
+    for root, dirs, _ in os.walk(root_dir):
+        kept_dirs = []
+        for dir_name in dirs:
+            if dir_name in target_dir_names:
+                target_dirs.append(os.path.normpath(os.path.join(root, dir_name)))
+            elif dir_name != TRASH_DIR_NAME:
+                kept_dirs.append(dir_name)
+        dirs[:] = kept_dirs
+    return target_dirs
+
+
+def is_link(path: str) -> bool:
+    return os.path.islink(path) or os.path.isjunction(path)
+
+
+# the (file count, byte count) below tree_path, links and junctions count as files
+# and are never followed
+def get_tree_size(tree_path: str) -> tuple[int, int]:
+    file_count = 0
+    byte_count = 0
+    dir_paths = [tree_path]
+    while dir_paths:
+        with os.scandir(dir_paths.pop()) as entries:
+            for entry in entries:
+                if entry.is_junction() or not entry.is_dir(follow_symlinks=False):
+                    byte_count += entry.stat(follow_symlinks=False).st_size
+                    file_count += 1
+                else:
+                    dir_paths.append(entry.path)
+    return file_count, byte_count
+
+
+def on_delete_error(function: Callable, path: str, exc: BaseException):
+    if not isinstance(exc, PermissionError):
+        raise exc
+    # read only files, which the engine and git both leave around on windows
+    os.chmod(path, stat.S_IWRITE)
+    function(path)
+
+
+# returns the (file count, byte count) it deleted, rmtree removes links and junctions
+# without deleting what they point at
+def delete_tree(tree_path: str) -> tuple[int, int]:
+    if is_link(tree_path):
+        if os.name == "nt":
+            os.rmdir(tree_path)
+        else:
+            os.remove(tree_path)
+        return 0, 0
+    file_count, byte_count = get_tree_size(tree_path)
+    shutil.rmtree(tree_path, onexc=on_delete_error)
+    return file_count, byte_count
+
+
+def delete_tree_task(tree_path: str, display_path: str):
+    try:
+        file_count, byte_count = delete_tree(tree_path)
+    except OSError as e:
+        logger.log_message(f'Warning: Could not fully remove "{display_path}": {e}')
+        return
+    with cleanup_engine_lock:
+        cleanup_engine_information.deleted_dir_count += 1
+        cleanup_engine_information.deleted_file_count += file_count
+        cleanup_engine_information.deleted_byte_count += byte_count
+    logger.log_message(
+        f"Removed directory: {display_path} ({file_count} files, {byte_count} bytes)"
+    )
+
+
+def get_executor() -> ThreadPoolExecutor:
+    with cleanup_engine_lock:
+        if cleanup_engine_information.executor is None:
+            cleanup_engine_information.executor = ThreadPoolExecutor(
+                max_workers=settings.get_cleanup_worker_count(),
+                thread_name_prefix="tempo_cleanup",
+            )
+            atexit.register(wait_for_pending_deletes)
+        return cleanup_engine_information.executor
+
+
+def schedule_delete(tree_path: str, display_path: str):
+    future = get_executor().submit(delete_tree_task, tree_path, display_path)
+    with cleanup_engine_lock:
+        cleanup_engine_information.pending_deletes.append(future)
+
+
+def empty_trash_dir(trash_dir: str):
+    with cleanup_engine_lock:
+        if trash_dir in cleanup_engine_information.emptied_trash_dirs:
+            return
+        cleanup_engine_information.emptied_trash_dirs.add(trash_dir)
+    if not os.path.isdir(trash_dir):
+        return
+    with os.scandir(trash_dir) as entries:
+        for entry in entries:
+            schedule_delete(entry.path, entry.path)
+
+
+# the trash dir for trees below the repo, under the working dir so nothing is left in
+# the repo tree, a tree on another volume can not be renamed into it and is deleted
+# in place instead
+def get_trash_dir() -> str:
+    return os.path.join(settings.get_working_dir(), TRASH_DIR_NAME)
+
+
+# renames tree_path into trash_dir (a sibling trash dir by default), which is instant
+# on the same volume, and deletes it in the background, when the rename fails the tree
+# is deleted in place before returning, as the caller may recreate it right away
+def remove_tree(tree_path: str, trash_dir: str | None = None):
+    if not os.path.isdir(tree_path):
+        return
+    if trash_dir is None:
+        trash_dir = os.path.join(
+            os.path.dirname(os.path.abspath(tree_path)), TRASH_DIR_NAME
+        )
+    empty_trash_dir(trash_dir)
+    trash_path = os.path.join(trash_dir, uuid.uuid4().hex)
+    try:
+        os.makedirs(trash_dir, exist_ok=True)
+        os.rename(tree_path, trash_path)
+    except OSError:
+        delete_tree_task(tree_path, tree_path)
+        return
+    schedule_delete(trash_path, tree_path)
+
+
+def remove_trees(tree_paths: list[str], trash_dir: str | None = None):
+    for tree_path in tree_paths:
+        remove_tree(tree_path, trash_dir)
+
+
+def wait_for_pending_deletes():
+    with cleanup_engine_lock:
+        pending_deletes = list(cleanup_engine_information.pending_deletes)
+        cleanup_engine_information.pending_deletes.clear()
+    if not pending_deletes:
+        return
+    for future in pending_deletes:
+        future.result()
+    with cleanup_engine_lock:
+        deleted_dir_count = cleanup_engine_information.deleted_dir_count
+        deleted_file_count = cleanup_engine_information.deleted_file_count
+        deleted_byte_count = cleanup_engine_information.deleted_byte_count
+    logger.log_message(
+        f"Check: Reclaimed {deleted_byte_count} bytes in {deleted_file_count} files from {deleted_dir_count} directories"
+    )
@@ -0,0 +1,131 @@
+import os
+import posixpath
+import threading
+from dataclasses import dataclass
+
+from tempo_core import logger, project_context
+
+
+@dataclass
+class CookedAssetIndex:
+    cooked_dir: str
+    # every key is os.path.normcase'd, so lookups ignore case on windows the way
+    # os.walk and glob did, while the values keep the spelling on disk
+    # dir key ("" for the cooked dir itself) -> relative dir
+    directories: dict[str, str]
+    # dir key -> base name key -> file names, extensionless files included
+    files: dict[str, dict[str, list[str]]]
+    # dir key -> child dir keys
+    subdirectories: dict[str, list[str]]
+    file_count: int
+
+
+@dataclass
+class CookedAssetIndexInformation:
+    cooked_asset_index: CookedAssetIndex | None
+
+
+cooked_asset_index_information = CookedAssetIndexInformation(cooked_asset_index=None)
+cooked_asset_index_lock = threading.Lock()
+
+
+def normalize_relative_path(relative_path: str) -> str:
+    normalized_path = posixpath.normpath(relative_path.replace("\\", "/")).strip("/")
+    if normalized_path == ".":
+        return ""
+    return normalized_path
+
+
+def get_index_key(relative_path: str) -> str:
+    return os.path.normcase(relative_path)
+
+
+def build_cooked_asset_index(cooked_dir: str) -> CookedAssetIndex:
+    directories = {}
+    files = {}
+    subdirectories = {}
+    file_count = 0
+    pending_dirs = [""]
+    while pending_dirs:
+        relative_dir = pending_dirs.pop()
+        base_names = {}
+        child_dirs = []
+        try:
+            with os.scandir(os.path.join(cooked_dir, relative_dir)) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        child_dirs.append(
+                            f"{relative_dir}/{entry.name}"
+                            if relative_dir
+                            else entry.name
+                        )
+                        continue
+                    base_name = os.path.splitext(entry.name)[0]
+                    base_names.setdefault(get_index_key(base_name), []).append(
+                        entry.name
+                    )
+                    file_count += 1
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        dir_key = get_index_key(relative_dir)
+        directories[dir_key] = relative_dir
+        files[dir_key] = base_names
+        subdirectories[dir_key] = [get_index_key(child_dir) for child_dir in child_dirs]
+        pending_dirs.extend(child_dirs)
+    return CookedAssetIndex(
+        cooked_dir=cooked_dir,
+        directories=directories,
+        files=files,
+        subdirectories=subdirectories,
+        file_count=file_count,
+    )
+
+
+def get_cooked_asset_index() -> CookedAssetIndex:
+    cooked_dir = project_context.get_project_context().cooked_uproject_dir
+    with cooked_asset_index_lock:
+        cooked_asset_index = cooked_asset_index_information.cooked_asset_index
+        if cooked_asset_index is None or cooked_asset_index.cooked_dir != cooked_dir:
+            cooked_asset_index = build_cooked_asset_index(cooked_dir)
+            cooked_asset_index_information.cooked_asset_index = cooked_asset_index
+            logger.log_message(
+                f'Check: Indexed {cooked_asset_index.file_count} cooked files in "{cooked_dir}"'
+            )
+    return cooked_asset_index
+
+
+def clear_cooked_asset_index():
+    cooked_asset_index_information.cooked_asset_index = None
+
+
+# returns .extension not extension, same as file_io.get_file_extensions
+def get_asset_extensions(asset_path: str) -> list[str]:
+    relative_dir, _, file_name = normalize_relative_path(asset_path).rpartition("/")
+    base_name = os.path.splitext(file_name)[0]
+    base_names = get_cooked_asset_index().files.get(get_index_key(relative_dir), {})
+    extensions = {
+        os.path.splitext(file_name)[1]
+        for file_name in base_names.get(get_index_key(base_name), ())
+    }
+    extensions.discard("")
+    return sorted(extensions)
+
+
+# returns every file below tree_path, relative to the cooked dir, "/" separated and
+# spelled as on disk
+def get_tree_file_paths(tree_path: str) -> list[str]:
+    cooked_asset_index = get_cooked_asset_index()
+    file_paths = []
+    pending_dirs = [get_index_key(normalize_relative_path(tree_path))]
+    while pending_dirs:
+        dir_key = pending_dirs.pop()
+        base_names = cooked_asset_index.files.get(dir_key)
+        if base_names is None:
+            continue
+        relative_dir = cooked_asset_index.directories[dir_key]
+        prefix = f"{relative_dir}/" if relative_dir else ""
+        for file_names in base_names.values():
+            for file_name in file_names:
+                file_paths.append(f"{prefix}{file_name}")
+        pending_dirs.extend(cooked_asset_index.subdirectories[dir_key])
+    return file_paths
@@ -0,0 +1,127 @@
+import errno
+import os
+import shutil
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+from rich.progress import (
+    BarColumn,
+    DownloadColumn,
+    Progress,
+    TextColumn,
+    TimeRemainingColumn,
+    TransferSpeedColumn,
+)
+
+from tempo_core import logger, mod_scheduler, settings
+
+COPY_CHUNK_SIZE = 64 * 1024 * 1024
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# errors meaning the kernel fast path is not available for these two files
+FAST_COPY_FALLBACK_ERRNOS = frozenset(
+    {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP}
+)
+
+
+def copy_file_contents(
+    source_file, destination_file, advance: Callable[[int], None]
+) -> None:
+    source_fd = source_file.fileno()
+    destination_fd = destination_file.fileno()
+    copied_size = 0
+    if hasattr(os, "copy_file_range"):
+        try:
+            while copied := os.copy_file_range(
+                source_fd, destination_fd, COPY_CHUNK_SIZE
+            ):
+                copied_size += copied
+                advance(copied)
+            return
+        except OSError as e:
+            if copied_size or e.errno not in FAST_COPY_FALLBACK_ERRNOS:
+                raise
+    if hasattr(os, "sendfile") and os.name != "nt":
+        try:
+            while copied := os.sendfile(
+                destination_fd, source_fd, copied_size, COPY_CHUNK_SIZE
+            ):
+                copied_size += copied
+                advance(copied)
+            return
+        except OSError as e:
+            if copied_size or e.errno not in FAST_COPY_FALLBACK_ERRNOS:
+                raise
+    buffer = bytearray(COPY_BUFFER_SIZE)
+    buffer_view = memoryview(buffer)
+    while read_size := source_file.readinto(buffer):
+        destination_file.write(buffer_view[:read_size])
+        advance(read_size)
+
+
+def copy_file(source: str, destination: str, advance: Callable[[int], None]):
+    # never write through a symlink left by a symlinked install
+    if os.path.islink(destination) or os.path.isfile(destination):
+        os.remove(destination)
+    with open(source, "rb") as source_file, open(destination, "wb") as destination_file:
+        copy_file_contents(source_file, destination_file, advance)
+    shutil.copystat(source, destination)
+
+
+def should_show_copy_progress(progress_description: str | None) -> bool:
+    # only one progress bar can be live at once, the mod scheduler shows its own
+    return (
+        progress_description is not None
+        and settings.should_show_progress_bars()
+        and not mod_scheduler.is_in_mod_task()
+    )
+
+
+# copies file_pairs (source -> destination) through a bounded thread pool, returns the bytes copied
+def copy_files(
+    file_pairs: dict[str, str],
+    *,
+    progress_description: str | None = None,
+    max_workers: int | None = None,
+) -> int:
+    if not file_pairs:
+        return 0
+    for destination_dir in {
+        os.path.dirname(destination) for destination in file_pairs.values()
+    }:
+        os.makedirs(destination_dir, exist_ok=True)
+
+    source_stats = {source: os.stat(source) for source in file_pairs}
+    # copying in on disk order cuts seeks on spinning disks
+    sources = sorted(
+        file_pairs,
+        key=lambda source: (source_stats[source].st_dev, source_stats[source].st_ino),
+    )
+    total_size = sum(source_stat.st_size for source_stat in source_stats.values())
+    worker_count = min(max_workers or settings.get_copy_worker_count(), len(sources))
+
+    def run_copies(advance: Callable[[int], None]):
+        with ThreadPoolExecutor(
+            max_workers=worker_count, thread_name_prefix="tempo_copy"
+        ) as executor:
+            for _ in executor.map(
+                lambda source: copy_file(source, file_pairs[source], advance), sources
+            ):
+                pass
+
+    if should_show_copy_progress(progress_description):
+        with Progress(
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            DownloadColumn(),
+            TransferSpeedColumn(),
+            TimeRemainingColumn(),
+        ) as progress:
+            task = progress.add_task(progress_description or "", total=total_size)
+            run_copies(lambda size: progress.update(task, advance=size))
+    else:
+        run_copies(lambda _: None)
+    logger.log_message(
+        f"Check: Copied {len(sources)} files ({total_size} bytes) with {worker_count} workers"
+    )
+    return total_size
@@ -207,6 +207,41 @@ class SigMethodType(Enum):
     )
 
 
+class LinkType(Enum):
+    """
+    Enum for how an installed file is placed at its destination
+    """
+
+    COPY = "copy"
+    SYMLINK = "symlink"
+    HARDLINK = "hardlink"  # only possible when both paths are on the same volume
+    REFLINK = "reflink"  # copy on write clone, falls back to a copy where unsupported
+    AUTO = (
+        "auto"  # the cheapest of reflink, hardlink and copy that works for the volumes
+    )
+
+
+class ProcessEventType(Enum):
+    """
+    Enum for the process changes the process snapshot reports to its listeners
+    """
+
+    APPEARED = "appeared"
+    EXITED = "exited"
+
+
+class LogLevel(Enum):
+    """
+    Enum for how important a log message is, lowest first, the console and the log file
+    each only get the messages at or above their own level
+    """
+
+    DEBUG = "debug"  # raw output of the programs tempo runs, like the engine
+    INFO = "info"
+    WARNING = "warning"
+    ERROR = "error"
+
+
 def get_enum_from_val(enum_cls: Type[Enum], value: Any) -> Enum:
     for entry in enum_cls:
         if entry.value == value:
@@ -3,6 +3,7 @@ from tempo_core import (
     hook_states,
     logger,
     process_management,
+    project_context,
     settings,
 )
 from tempo_core.data_structures import (
@@ -29,7 +30,7 @@ def post_engine_closed_message():
 @hook_states.hook_state_decorator(HookStateType.PRE_ENGINE_CLOSE)
 def close_game_engine():
     if (
-        unreal_engine.get_win_dir_type(settings.get_unreal_engine_dir())
+        project_context.get_project_context().win_dir_type
         == PackagingDirType.WINDOWS_NO_EDITOR
     ):
         game_engine_processes = process_management.get_processes_by_substring(
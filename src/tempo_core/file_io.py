@@ -88,16 +88,23 @@ def check_file_exists(file_path: str) -> bool:
     raise FileNotFoundError(file_not_found_error)
 
 
+HASH_READ_BUFFER_SIZE = 1024 * 1024
+
+
 def get_file_hash(file_path: str) -> str:
-    md5 = hashlib.sha256()
-    with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            md5.update(chunk)
-    return md5.hexdigest()
+    sha256 = hashlib.sha256()
+    buffer = bytearray(HASH_READ_BUFFER_SIZE)
+    view = memoryview(buffer)
+    with open(file_path, "rb", buffering=0) as f:
+        while bytes_read := f.readinto(buffer):
+            sha256.update(view[:bytes_read])
+    return sha256.hexdigest()
 
 
 def get_do_files_have_same_hash(file_path_one: str, file_path_two: str) -> bool:
     if os.path.exists(file_path_one) and os.path.exists(file_path_two):
+        if os.path.getsize(file_path_one) != os.path.getsize(file_path_two):
+            return False
         return get_file_hash(file_path_one) == get_file_hash(file_path_two)
     return False
 
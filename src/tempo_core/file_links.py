@@ -0,0 +1,148 @@
+import errno
+import os
+import shutil
+import threading
+from dataclasses import dataclass
+
+from tempo_core import logger, settings
+from tempo_core.data_structures import LinkType, get_enum_from_val
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# linux ioctl that makes the destination share the source's extents
+FICLONE = 0x40049409
+
+# errors meaning the volume or platform can not do the requested kind of link
+UNSUPPORTED_LINK_ERRNOS = frozenset(
+    {
+        errno.EXDEV,
+        errno.EPERM,
+        errno.EACCES,
+        errno.EINVAL,
+        errno.ENOTTY,
+        errno.EOPNOTSUPP,
+        errno.ENOSYS,
+        errno.EMLINK,
+    }
+)
+
+
+@dataclass
+class FileLinksInformation:
+    # (source volume, destination volume) -> link type that worked there
+    auto_link_types: dict[tuple[int, int], LinkType]
+    # link types that failed at least once, so the fallback is only logged once
+    unsupported_link_types: set[LinkType]
+
+
+file_links_information = FileLinksInformation(
+    auto_link_types={}, unsupported_link_types=set()
+)
+file_links_lock = threading.Lock()
+
+
+# --use_symlinks keeps its meaning, otherwise general_info.link_type decides
+def get_install_link_type(*, use_symlinks: bool) -> LinkType:
+    if use_symlinks:
+        return LinkType.SYMLINK
+    return LinkType(get_enum_from_val(LinkType, settings.get_link_type_str()))
+
+
+# the working dir copy of a mod is only ever read by the packers, so with zero copy
+# staging it is made of hardlinks to the cooked files (copies across volumes)
+def get_staging_link_type() -> LinkType:
+    if settings.get_is_zero_copy_staging_enabled():
+        return LinkType.HARDLINK
+    return LinkType.COPY
+
+
+def reflink_file(source: str, destination: str):
+    if fcntl is None:
+        # on windows CopyFile2, which shutil uses, block clones on ReFS and Dev Drive
+        shutil.copy2(source, destination)
+        return
+    with open(source, "rb") as source_file, open(destination, "wb") as destination_file:
+        fcntl.ioctl(destination_file.fileno(), FICLONE, source_file.fileno())
+    shutil.copystat(source, destination)
+
+
+def remove_destination(destination: str):
+    if os.path.islink(destination):
+        os.unlink(destination)
+    elif os.path.isfile(destination):
+        os.remove(destination)
+
+
+def try_place_file(source: str, destination: str, link_type: LinkType) -> bool:
+    try:
+        if link_type == LinkType.REFLINK:
+            reflink_file(source, destination)
+        elif link_type == LinkType.HARDLINK:
+            os.link(source, destination)
+        elif link_type == LinkType.SYMLINK:
+            os.symlink(source, destination)
+        else:
+            shutil.copy2(source, destination)
+    except OSError as e:
+        if link_type == LinkType.COPY or e.errno not in UNSUPPORTED_LINK_ERRNOS:
+            raise
+        remove_destination(destination)
+        return False
+    return True
+
+
+def get_volume_pair(source: str, destination: str) -> tuple[int, int]:
+    return os.stat(source).st_dev, os.stat(os.path.dirname(destination) or ".").st_dev
+
+
+# tries the cheapest link types in order, and remembers what worked for the volume pair
+def place_file_auto(source: str, destination: str) -> LinkType:
+    volume_pair = get_volume_pair(source, destination)
+    with file_links_lock:
+        link_type = file_links_information.auto_link_types.get(volume_pair)
+    if link_type is not None:
+        place_file(source, destination, link_type)
+        return link_type
+    for link_type in (LinkType.REFLINK, LinkType.HARDLINK, LinkType.COPY):
+        if link_type == LinkType.REFLINK and fcntl is None:
+            continue
+        if try_place_file(source, destination, link_type):
+            with file_links_lock:
+                file_links_information.auto_link_types[volume_pair] = link_type
+            logger.log_message(
+                f'Check: Using {link_type.value} installs from "{os.path.dirname(source)}" to "{os.path.dirname(destination)}"'
+            )
+            return link_type
+    return LinkType.COPY
+
+
+# replaces destination with source using link_type, returns the link type actually used
+def place_file(source: str, destination: str, link_type: LinkType) -> LinkType:
+    remove_destination(destination)
+    if link_type == LinkType.AUTO:
+        return place_file_auto(source, destination)
+    if try_place_file(source, destination, link_type):
+        return link_type
+    with file_links_lock:
+        should_warn = link_type not in file_links_information.unsupported_link_types
+        file_links_information.unsupported_link_types.add(link_type)
+    if should_warn:
+        logger.log_message(
+            f'Warning: {link_type.value} is not possible for "{destination}", copying instead'
+        )
+    shutil.copy2(source, destination)
+    return LinkType.COPY
+
+
+# whether destination already is what place_file would make it, without reading file contents
+def is_file_placed(source: str, destination: str, link_type: LinkType) -> bool:
+    if link_type == LinkType.SYMLINK:
+        return os.path.islink(destination) and os.readlink(destination) == source
+    if os.path.islink(destination) or not os.path.isfile(destination):
+        return False
+    if link_type in (LinkType.HARDLINK, LinkType.AUTO):
+        return os.path.samefile(source, destination)
+    return False
@@ -0,0 +1,347 @@
+import hashlib
+import json
+import os
+import struct
+import sys
+import zlib
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from tempo_core import hash_cache, logger, settings
+
+SNAPSHOT_MAGIC = b"TEMPOSNP"
+SNAPSHOT_VERSION = 1
+# magic, version, file count, flags
+SNAPSHOT_HEADER = struct.Struct("<8sIIB")
+SNAPSHOT_SECTION_LENGTH = struct.Struct("<Q")
+SNAPSHOT_FLAG_HAS_DIGESTS = 1
+DIGEST_SIZE = hashlib.sha256().digest_size
+# legacy json file lists only hold paths
+UNKNOWN_STAT_VALUE = -1
+
+
+# every file below a root dir, as parallel columns sorted by relative path, the dir of
+# each file is stored once in dirs and referenced by index
+@dataclass
+class GameFileSnapshot:
+    dirs: list[str]
+    dir_indexes: array
+    names: list[str]
+    sizes: array
+    mtimes_ns: array
+    # DIGEST_SIZE bytes per file, empty when the snapshot was taken without digests
+    digests: bytes
+
+    def get_relative_paths(self) -> list[str]:
+        dirs = self.dirs
+        return [
+            f"{dirs[dir_index]}/{name}" if dirs[dir_index] else name
+            for dir_index, name in zip(self.dir_indexes, self.names)
+        ]
+
+    def get_digest(self, index: int) -> bytes:
+        return self.digests[index * DIGEST_SIZE : (index + 1) * DIGEST_SIZE]
+
+
+@dataclass
+class GameFileSnapshotDiff:
+    # relative paths, all sorted
+    added: list[str]
+    removed: list[str]
+    modified: list[str]
+
+
+def is_link(file_path: str) -> bool:
+    return os.path.islink(file_path) or os.path.isjunction(file_path)
+
+
+# a link is compared by where it points, it may point nowhere or at a dir
+def get_link_digest(file_path: str) -> bytes:
+    return hashlib.sha256(os.fsencode(os.readlink(file_path))).digest()
+
+
+# file digests come from the hash cache, so unchanged files are not read again
+def get_entry_digest(file_path: str) -> bytes:
+    if is_link(file_path):
+        return get_link_digest(file_path)
+    return bytes.fromhex(hash_cache.get_file_hash(file_path))
+
+
+def scan_dir(root_dir: str, relative_dir: str, files: list):
+    sub_dirs = []
+    with os.scandir(os.path.join(root_dir, relative_dir)) as entries:
+        for entry in entries:
+            # links and junctions are listed as files and never followed, even broken
+            # ones or ones pointing at a dir
+            is_link = entry.is_symlink() or entry.is_junction()
+            if not is_link and entry.is_dir(follow_symlinks=False):
+                sub_dirs.append(entry.name)
+            elif is_link or entry.is_file():
+                entry_stat = entry.stat(follow_symlinks=False)
+                files.append(
+                    (
+                        relative_dir,
+                        entry.name,
+                        entry_stat.st_size,
+                        entry_stat.st_mtime_ns,
+                    )
+                )
+    for sub_dir in sub_dirs:
+        scan_dir(
+            root_dir, f"{relative_dir}/{sub_dir}" if relative_dir else sub_dir, files
+        )
+
+
+def build_snapshot(files: list, digests: bytes = b"") -> GameFileSnapshot:
+    files.sort(key=lambda file: (file[0], file[1]))
+    dirs = []
+    dir_index_by_dir = {}
+    dir_indexes = array("I")
+    names = []
+    sizes = array("q")
+    mtimes_ns = array("q")
+    for relative_dir, name, size, mtime_ns in files:
+        dir_index = dir_index_by_dir.get(relative_dir)
+        if dir_index is None:
+            dir_index = dir_index_by_dir[relative_dir] = len(dirs)
+            dirs.append(sys.intern(relative_dir))
+        dir_indexes.append(dir_index)
+        names.append(name)
+        sizes.append(size)
+        mtimes_ns.append(mtime_ns)
+    return GameFileSnapshot(
+        dirs=dirs,
+        dir_indexes=dir_indexes,
+        names=names,
+        sizes=sizes,
+        mtimes_ns=mtimes_ns,
+        digests=digests,
+    )
+
+
+def take_snapshot(root_dir: str, *, with_digests: bool = False) -> GameFileSnapshot:
+    files = []
+    scan_dir(root_dir, "", files)
+    snapshot = build_snapshot(files)
+    if with_digests:
+        file_paths = [
+            os.path.join(root_dir, relative_path)
+            for relative_path in snapshot.get_relative_paths()
+        ]
+        link_paths = {file_path for file_path in file_paths if is_link(file_path)}
+        file_hashes = hash_cache.get_file_hashes(
+            [file_path for file_path in file_paths if file_path not in link_paths],
+            max_workers=settings.get_cleanup_worker_count(),
+        )
+        snapshot.digests = b"".join(
+            get_link_digest(file_path)
+            if file_path in link_paths
+            else bytes.fromhex(file_hashes[file_path])
+            for file_path in file_paths
+        )
+        hash_cache.save_hash_cache()
+    return snapshot
+
+
+def get_array_bytes(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def get_array_from_bytes(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+# every string is nul terminated, so an empty string (the root dir) survives a round trip
+def get_strings_bytes(strings: list[str]) -> bytes:
+    return "".join(f"{string}\0" for string in strings).encode("utf-8")
+
+
+def split_strings(data: bytes) -> list[str]:
+    return data.decode("utf-8").split("\0")[:-1]
+
+
+def save_snapshot(snapshot: GameFileSnapshot, snapshot_path: str):
+    sections = [
+        get_strings_bytes(snapshot.dirs),
+        get_array_bytes(snapshot.dir_indexes),
+        get_strings_bytes(snapshot.names),
+        get_array_bytes(snapshot.sizes),
+        get_array_bytes(snapshot.mtimes_ns),
+        snapshot.digests,
+    ]
+    payload = b"".join(
+        SNAPSHOT_SECTION_LENGTH.pack(len(section)) + section for section in sections
+    )
+    flags = SNAPSHOT_FLAG_HAS_DIGESTS if snapshot.digests else 0
+    os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+    temp_snapshot_path = f"{snapshot_path}.tmp"
+    with open(temp_snapshot_path, "wb") as file:
+        file.write(
+            SNAPSHOT_HEADER.pack(
+                SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(snapshot.names), flags
+            )
+        )
+        file.write(zlib.compress(payload))
+    os.replace(temp_snapshot_path, snapshot_path)
+
+
+def load_binary_snapshot(data: bytes, snapshot_path: str) -> GameFileSnapshot:
+    magic, version, file_count, _ = SNAPSHOT_HEADER.unpack_from(data)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        invalid_snapshot_error = f'Unsupported game file snapshot "{snapshot_path}"'
+        raise ValueError(invalid_snapshot_error)
+    payload = memoryview(zlib.decompress(data[SNAPSHOT_HEADER.size :]))
+    sections = []
+    offset = 0
+    while offset < len(payload):
+        (section_length,) = SNAPSHOT_SECTION_LENGTH.unpack_from(payload, offset)
+        offset += SNAPSHOT_SECTION_LENGTH.size
+        sections.append(bytes(payload[offset : offset + section_length]))
+        offset += section_length
+    dirs_data, dir_indexes_data, names_data, sizes_data, mtimes_data, digests = sections
+    snapshot = GameFileSnapshot(
+        dirs=[sys.intern(relative_dir) for relative_dir in split_strings(dirs_data)],
+        dir_indexes=get_array_from_bytes("I", dir_indexes_data),
+        names=split_strings(names_data),
+        sizes=get_array_from_bytes("q", sizes_data),
+        mtimes_ns=get_array_from_bytes("q", mtimes_data),
+        digests=digests,
+    )
+    if len(snapshot.names) != file_count:
+        invalid_snapshot_error = f'Corrupt game file snapshot "{snapshot_path}"'
+        raise ValueError(invalid_snapshot_error)
+    return snapshot
+
+
+# the json file list format, a json array of absolute paths without stats or digests
+def save_json_file_list(snapshot: GameFileSnapshot, root_dir: str, file_list_path: str):
+    file_paths = [
+        os.path.join(root_dir, *relative_path.split("/"))
+        for relative_path in snapshot.get_relative_paths()
+    ]
+    os.makedirs(os.path.dirname(file_list_path), exist_ok=True)
+    with open(file_list_path, "w", encoding="utf-8") as file:
+        json.dump(file_paths, file)
+
+
+# file lists made before snapshots existed, or saved by save_json_file_list
+def load_json_file_list(data: bytes, root_dir: str) -> GameFileSnapshot:
+    files = []
+    for file_path in json.loads(data):
+        relative_path = os.path.relpath(file_path, root_dir).replace("\\", "/")
+        relative_dir, _, name = relative_path.rpartition("/")
+        files.append((relative_dir, name, UNKNOWN_STAT_VALUE, UNKNOWN_STAT_VALUE))
+    return build_snapshot(files)
+
+
+def load_snapshot(snapshot_path: str, root_dir: str) -> GameFileSnapshot:
+    with open(snapshot_path, "rb") as file:
+        data = file.read()
+    if data.startswith(SNAPSHOT_MAGIC):
+        return load_binary_snapshot(data, snapshot_path)
+    return load_json_file_list(data, root_dir)
+
+
+def is_file_modified(
+    snapshot: GameFileSnapshot,
+    snapshot_index: int,
+    current: GameFileSnapshot,
+    current_index: int,
+    root_dir: str,
+    relative_path: str,
+) -> bool:
+    size = snapshot.sizes[snapshot_index]
+    if size == UNKNOWN_STAT_VALUE:
+        return False
+    if size != current.sizes[current_index]:
+        return True
+    if snapshot.mtimes_ns[snapshot_index] == current.mtimes_ns[current_index]:
+        return False
+    # touched but maybe not changed, only the digest can tell
+    if not snapshot.digests:
+        return True
+    return snapshot.get_digest(snapshot_index) != get_entry_digest(
+        os.path.join(root_dir, relative_path)
+    )
+
+
+# one pass over the snapshot, looking each path up in the current scan
+def diff_snapshots(
+    snapshot: GameFileSnapshot, current: GameFileSnapshot, root_dir: str
+) -> GameFileSnapshotDiff:
+    snapshot_paths = snapshot.get_relative_paths()
+    current_indexes = {
+        relative_path: index
+        for index, relative_path in enumerate(current.get_relative_paths())
+    }
+    removed = []
+    modified = []
+    for snapshot_index, relative_path in enumerate(snapshot_paths):
+        current_index = current_indexes.pop(relative_path, None)
+        if current_index is None:
+            removed.append(relative_path)
+        elif is_file_modified(
+            snapshot, snapshot_index, current, current_index, root_dir, relative_path
+        ):
+            modified.append(relative_path)
+    return GameFileSnapshotDiff(
+        added=sorted(current_indexes), removed=removed, modified=modified
+    )
+
+
+def delete_files(file_paths: list[str]):
+    def delete_file(file_path: str):
+        try:
+            if os.name == "nt" and os.path.isdir(file_path):
+                # a listed dir is a link, windows removes dir links with rmdir
+                os.rmdir(file_path)
+            else:
+                os.remove(file_path)
+        except FileNotFoundError:
+            return
+        logger.log_message(f"Deleted: {file_path}")
+
+    with ThreadPoolExecutor(
+        max_workers=settings.get_cleanup_worker_count()
+    ) as executor:
+        for _ in executor.map(delete_file, file_paths):
+            pass
+
+
+def log_snapshot_diff(snapshot_diff: GameFileSnapshotDiff, *, is_dry_run: bool):
+    if is_dry_run:
+        for relative_path in snapshot_diff.added:
+            logger.log_message(f"Check: Would delete: {relative_path}")
+    for relative_path in snapshot_diff.modified:
+        logger.log_message(f"Warning: Modified since the snapshot: {relative_path}")
+    for relative_path in snapshot_diff.removed:
+        logger.log_message(f"Warning: Missing since the snapshot: {relative_path}")
+    logger.log_message(
+        f"Check: {len(snapshot_diff.added)} unlisted, {len(snapshot_diff.modified)} modified, {len(snapshot_diff.removed)} missing files"
+    )
+
+
+# deletes every file below root_dir that is not in the snapshot, modified and missing
+# files are only reported, they can not be restored from a snapshot
+def delete_unlisted_files(
+    root_dir: str, snapshot_path: str, *, is_dry_run: bool
+) -> GameFileSnapshotDiff:
+    snapshot = load_snapshot(snapshot_path, root_dir)
+    snapshot_diff = diff_snapshots(snapshot, take_snapshot(root_dir), root_dir)
+    log_snapshot_diff(snapshot_diff, is_dry_run=is_dry_run)
+    if not is_dry_run:
+        delete_files(
+            [
+                os.path.join(root_dir, relative_path)
+                for relative_path in snapshot_diff.added
+            ]
+        )
+    return snapshot_diff
@@ -0,0 +1,141 @@
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass
+
+from tempo_core import logger, project_context, settings
+from tempo_core.programs import unreal_engine
+
+IOSTORE_EXTENSIONS = frozenset({"ucas", "utoc"})
+
+
+@dataclass
+class GameInstallProfile:
+    paks_dir: str
+    # stat of the Paks dir and of each dir directly inside it
+    signature: list
+    is_iostore: bool
+    # extensions (without the dot) of every file below the Paks dir
+    archive_extensions: list[str]
+    # "/" separated paths of every .pak, .utoc and .ucas file, relative to the Paks dir
+    pak_files: list[str]
+
+
+@dataclass
+class GameInstallProfileInformation:
+    game_install_profile: GameInstallProfile | None
+
+
+game_install_profile_information = GameInstallProfileInformation(
+    game_install_profile=None
+)
+game_install_profile_lock = threading.Lock()
+
+
+def get_game_install_profile_path() -> str:
+    return f"{settings.get_working_dir()}/game_install_profile.json"
+
+
+def get_paks_dir_signature(paks_dir: str) -> list:
+    try:
+        paks_dir_stat = os.stat(paks_dir)
+    except OSError:
+        return []
+    signature = [["", paks_dir_stat.st_mtime_ns, paks_dir_stat.st_ino]]
+    with os.scandir(paks_dir) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                entry_stat = entry.stat()
+                signature.append(
+                    [entry.name, entry_stat.st_mtime_ns, entry_stat.st_ino]
+                )
+    return sorted(signature)
+
+
+def build_game_install_profile(paks_dir: str, signature: list) -> GameInstallProfile:
+    archive_extensions = set()
+    pak_files = []
+    for root, _, files in os.walk(paks_dir):
+        for file in files:
+            extension = os.path.splitext(file)[1].lstrip(".").lower()
+            if not extension:
+                continue
+            archive_extensions.add(extension)
+            if extension == "pak" or extension in IOSTORE_EXTENSIONS:
+                pak_files.append(
+                    os.path.relpath(os.path.join(root, file), paks_dir).replace(
+                        "\\", "/"
+                    )
+                )
+    return GameInstallProfile(
+        paks_dir=paks_dir,
+        signature=signature,
+        is_iostore=not IOSTORE_EXTENSIONS.isdisjoint(archive_extensions),
+        archive_extensions=sorted(archive_extensions),
+        pak_files=sorted(pak_files),
+    )
+
+
+def load_game_install_profile() -> GameInstallProfile | None:
+    profile_path = get_game_install_profile_path()
+    if not os.path.isfile(profile_path):
+        return None
+    try:
+        with open(profile_path, encoding="utf-8") as file:
+            return GameInstallProfile(**json.load(file))
+    except (OSError, json.JSONDecodeError, TypeError) as e:
+        logger.log_message(
+            f'Warning: Ignoring unreadable game install profile "{profile_path}": {e}'
+        )
+        return None
+
+
+def save_game_install_profile(game_install_profile: GameInstallProfile):
+    profile_path = get_game_install_profile_path()
+    temp_profile_path = f"{profile_path}.tmp"
+    with open(temp_profile_path, "w", encoding="utf-8") as file:
+        json.dump(asdict(game_install_profile), file)
+    os.replace(temp_profile_path, profile_path)
+
+
+# the game Paks tree is probed once per run, and only re-walked across runs when
+# the Paks dir (or a dir directly inside it) changed
+def get_game_install_profile() -> GameInstallProfile:
+    context = project_context.get_project_context()
+    paks_dir = unreal_engine.get_game_paks_dir(context.uproject_file, context.game_dir)
+    with game_install_profile_lock:
+        game_install_profile = game_install_profile_information.game_install_profile
+        if (
+            game_install_profile is not None
+            and game_install_profile.paks_dir == paks_dir
+        ):
+            return game_install_profile
+        signature = get_paks_dir_signature(paks_dir)
+        game_install_profile = load_game_install_profile()
+        if (
+            game_install_profile is None
+            or game_install_profile.paks_dir != paks_dir
+            or game_install_profile.signature != signature
+        ):
+            game_install_profile = build_game_install_profile(paks_dir, signature)
+            save_game_install_profile(game_install_profile)
+            logger.log_message(
+                f'Check: Probed {len(game_install_profile.pak_files)} game archives in "{paks_dir}"'
+            )
+        game_install_profile_information.game_install_profile = game_install_profile
+    return game_install_profile
+
+
+def clear_game_install_profile():
+    game_install_profile_information.game_install_profile = None
+
+
+def is_game_iostore() -> bool:
+    return get_game_install_profile().is_iostore
+
+
+# same as unreal_engine.get_game_pak_folder_archives, returns a new list each call
+def get_game_pak_folder_archives() -> list[str]:
+    if is_game_iostore():
+        return ["pak", "utoc", "ucas"]
+    return ["pak"]
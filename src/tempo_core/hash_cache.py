@@ -0,0 +1,118 @@
+import atexit
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from tempo_core import file_io, logger, settings
+
+
+@dataclass
+class HashCacheInformation:
+    # absolute path -> [size, mtime_ns, inode, sha256 hex digest]
+    entries: dict[str, list]
+    has_loaded_cache: bool
+    has_unsaved_changes: bool
+    # entries of files that were gone are dropped on the first save of a run
+    has_pruned_cache: bool
+    # paths looked up this run, known to exist when the cache is pruned
+    used_paths: set[str]
+
+
+hash_cache_information = HashCacheInformation(
+    entries={},
+    has_loaded_cache=False,
+    has_unsaved_changes=False,
+    has_pruned_cache=False,
+    used_paths=set(),
+)
+hash_cache_lock = threading.Lock()
+
+
+def get_hash_cache_path() -> str:
+    return f"{settings.get_working_dir()}/hash_cache.json"
+
+
+def load_hash_cache():
+    if hash_cache_information.has_loaded_cache:
+        return
+    hash_cache_path = get_hash_cache_path()
+    if os.path.isfile(hash_cache_path):
+        try:
+            with open(hash_cache_path, encoding="utf-8") as file:
+                hash_cache_information.entries = json.load(file)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.log_message(
+                f'Warning: Ignoring unreadable hash cache "{hash_cache_path}": {e}'
+            )
+            hash_cache_information.entries = {}
+    hash_cache_information.has_loaded_cache = True
+    atexit.register(save_hash_cache)
+
+
+# drops the entries of deleted files and old staging paths, so the cache does not grow
+# with every path it ever saw
+def prune_hash_cache():
+    used_paths = hash_cache_information.used_paths
+    hash_cache_information.entries = {
+        cache_key: entry
+        for cache_key, entry in hash_cache_information.entries.items()
+        if cache_key in used_paths or os.path.isfile(cache_key)
+    }
+    hash_cache_information.has_pruned_cache = True
+
+
+def save_hash_cache():
+    with hash_cache_lock:
+        if not hash_cache_information.has_unsaved_changes:
+            return
+        if not hash_cache_information.has_pruned_cache:
+            prune_hash_cache()
+        hash_cache_path = get_hash_cache_path()
+        temp_hash_cache_path = f"{hash_cache_path}.tmp"
+        with open(temp_hash_cache_path, "w", encoding="utf-8") as file:
+            json.dump(hash_cache_information.entries, file)
+        os.replace(temp_hash_cache_path, hash_cache_path)
+        hash_cache_information.has_unsaved_changes = False
+
+
+def get_file_hash(file_path: str) -> str:
+    file_stat = os.stat(file_path)
+    cache_key = os.path.abspath(file_path)
+    file_signature = [file_stat.st_size, file_stat.st_mtime_ns, file_stat.st_ino]
+    with hash_cache_lock:
+        load_hash_cache()
+        entry = hash_cache_information.entries.get(cache_key)
+        hash_cache_information.used_paths.add(cache_key)
+    if entry is not None and entry[:3] == file_signature:
+        return entry[3]
+    digest = file_io.get_file_hash(file_path)
+    with hash_cache_lock:
+        hash_cache_information.entries[cache_key] = [*file_signature, digest]
+        hash_cache_information.has_unsaved_changes = True
+    return digest
+
+
+# hashlib releases the GIL while hashing, so threads give a real speed up here
+def get_file_hashes(file_paths: list[str], max_workers: int | None = None) -> dict:
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(file_paths, executor.map(get_file_hash, file_paths)))
+
+
+def get_do_files_have_same_hash(file_path_one: str, file_path_two: str) -> bool:
+    try:
+        file_stat_one = os.stat(file_path_one)
+        file_stat_two = os.stat(file_path_two)
+    except OSError:
+        return False
+    if file_stat_one.st_size != file_stat_two.st_size:
+        return False
+    # the same file, like a hardlink, always has the same content
+    if file_stat_one.st_ino != 0 and (file_stat_one.st_dev, file_stat_one.st_ino) == (
+        file_stat_two.st_dev,
+        file_stat_two.st_ino,
+    ):
+        return True
+    # equal mtimes prove nothing about content, only the cached hashes skip rereads
+    return get_file_hash(file_path_one) == get_file_hash(file_path_two)
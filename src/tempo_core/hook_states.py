@@ -1,5 +1,9 @@
 from __future__ import annotations
 
+import functools
+import math
+import threading
+import time
 from dataclasses import dataclass
 from typing import Any, Callable
 
@@ -25,90 +29,145 @@ class HookStateInfo:
 
 
 hook_state_info = HookStateInfo(HookStateType.PRE_INIT)
+# seconds between two runs of the same constant kill or exec event
+CONSTANT_SPAWN_INTERVAL = 1.0
 
 
-def exec_events_checks(hook_state_type: HookStateType):
-    exec_events = settings.get_exec_events()
-    for exec_event in exec_events:
-        value = exec_event["hook_state"]
-        exe_state = get_enum_from_val(HookStateType, value)
-        if exe_state == hook_state_type:
-            exe_path = exec_event["alt_exe_path"]
-            exe_args = exec_event["variable_args"]
-            exe_exec_mode = get_enum_from_val(
-                ExecutionMode, exec_event["execution_mode"]
+@dataclass
+class HookActionsInformation:
+    # the settings dict the table was compiled from
+    settings: dict | None
+    # hook state -> every action to run for it, in settings order, kills first, then
+    # window changes, then execs, states without actions are left out
+    hook_actions: dict[HookStateType, tuple[Callable[[], Any], ...]]
+
+
+hook_actions_information = HookActionsInformation(settings=None, hook_actions={})
+hook_actions_lock = threading.Lock()
+
+
+def run_exec_event(exe_path: str, exe_exec_mode: ExecutionMode, exe_args: list):
+    app_runner.run_app(exe_path, exe_exec_mode, exe_args)
+
+
+def get_exec_event_action(exec_event: dict) -> Callable[[], Any]:
+    exe_exec_mode = get_enum_from_val(ExecutionMode, exec_event["execution_mode"])
+    return functools.partial(
+        run_exec_event,
+        exec_event["alt_exe_path"],
+        exe_exec_mode,
+        exec_event["variable_args"],
+    )
+
+
+def apply_window_event(window_settings: dict, way_to_change_window: WindowAction):
+    title = window_settings["window_name"]
+    windows_to_change = window_management.get_windows_by_title(
+        title, use_substring_check=window_settings["use_substring_check"]
+    )
+    for window_to_change in windows_to_change:
+        if way_to_change_window == WindowAction.MAX:
+            window_management.maximize_window(window_to_change)
+        elif way_to_change_window == WindowAction.MIN:
+            window_management.minimize_window(window_to_change)
+        elif way_to_change_window == WindowAction.CLOSE:
+            window_management.close_window(window_to_change)
+        elif way_to_change_window == WindowAction.MOVE:
+            window_management.move_window(
+                window_to_change,
+                window_settings["position"]["x"],
+                window_settings["position"]["y"],
+                window_settings["resolution"]["width"],
+                window_settings["resolution"]["height"],
+            )
+        else:
+            logger.log_message("Monitor: invalid window behavior specified in settings")
+
+
+def get_window_event_action(window_settings: dict) -> Callable[[], Any]:
+    way_to_change_window = get_enum_from_val(
+        WindowAction, window_settings["window_behaviour"]
+    )
+    return functools.partial(apply_window_event, window_settings, way_to_change_window)
+
+
+# skips calls made less than min_interval seconds after the last one it ran
+def get_rate_limited_action(
+    action: Callable[[], Any], min_interval: float
+) -> Callable[[], Any]:
+    last_run_time = -math.inf
+
+    def rate_limited_action():
+        nonlocal last_run_time
+        now = time.monotonic()
+        if now - last_run_time < min_interval:
+            return None
+        last_run_time = now
+        return action()
+
+    return rate_limited_action
+
+
+# kills and execs start a process each run, the constant state is checked every tick
+# of the constant thread, so on it they run at most once every CONSTANT_SPAWN_INTERVAL
+def get_spawning_action(
+    hook_state: HookStateType, action: Callable[[], Any]
+) -> Callable[[], Any]:
+    if hook_state == HookStateType.CONSTANT:
+        return get_rate_limited_action(action, CONSTANT_SPAWN_INTERVAL)
+    return action
+
+
+def compile_hook_actions(settings_dict: dict) -> dict:
+    hook_actions = {}
+    for process_info in settings_dict.get("process_kill_events", {}).get(
+        "processes", []
+    ):
+        hook_state = get_enum_from_val(HookStateType, process_info.get("hook_state"))
+        hook_actions.setdefault(hook_state, []).append(
+            get_spawning_action(
+                hook_state,
+                functools.partial(process_management.kill_process_event, process_info),
             )
-            if not exe_exec_mode:
-                app_runner.run_app(exe_path, exe_exec_mode, exe_args)
-            else:
-                exe_exec_error = "exe_exec_mode returned none"
-                raise RuntimeError(exe_exec_error)
+        )
+    for window_settings in settings_dict.get("window_management_events", []):
+        hook_state = get_enum_from_val(HookStateType, window_settings["hook_state"])
+        hook_actions.setdefault(hook_state, []).append(
+            get_window_event_action(window_settings)
+        )
+    for exec_event in settings_dict.get("exec_events", []):
+        hook_state = get_enum_from_val(HookStateType, exec_event["hook_state"])
+        hook_actions.setdefault(hook_state, []).append(
+            get_spawning_action(hook_state, get_exec_event_action(exec_event))
+        )
+    return {hook_state: tuple(actions) for hook_state, actions in hook_actions.items()}
+
+
+# compiled once per loaded settings, so dispatching a state is a single dict lookup
+def get_hook_actions() -> dict[HookStateType, tuple[Callable[[], Any], ...]]:
+    settings_dict = settings.settings_information.settings
+    if hook_actions_information.settings is settings_dict:
+        return hook_actions_information.hook_actions
+    with hook_actions_lock:
+        if hook_actions_information.settings is not settings_dict:
+            hook_actions = {}
+            if isinstance(settings_dict, dict):
+                hook_actions = compile_hook_actions(settings_dict)
+            hook_actions_information.hook_actions = hook_actions
+            hook_actions_information.settings = settings_dict
+    return hook_actions_information.hook_actions
 
 
 def is_hook_state_used(state: HookStateType) -> bool:
-    if isinstance(settings.settings_information.settings, dict):
-        if "process_kill_events" in settings.settings_information.settings:
-            process_kill_events = settings.settings_information.settings.get(
-                "process_kill_events", {}
-            )
-            if "processes" in process_kill_events:
-                for process in process_kill_events["processes"]:
-                    if process.get("hook_state") == state:
-                        return True
-
-        if "window_management_events" in settings.settings_information.settings:
-            for window in settings.get_window_management_events():
-                if window.get("hook_state") == state:
-                    return True
-
-        if "exec_events" in settings.settings_information.settings:
-            for method in settings.get_exec_events():
-                if method.get("hook_state") == state:
-                    return True
-
-    return False
-
-
-def window_checks(current_state: HookStateType):
-    window_settings_list = settings.get_window_management_events()
-    for window_settings in window_settings_list:
-        settings_state = get_enum_from_val(HookStateType, window_settings["hook_state"])
-        if settings_state == current_state:
-            title = window_settings["window_name"]
-            windows_to_change = window_management.get_windows_by_title(
-                title, use_substring_check=window_settings["use_substring_check"]
-            )
-            for window_to_change in windows_to_change:
-                way_to_change_window = get_enum_from_val(
-                    WindowAction, window_settings["window_behaviour"]
-                )
-                if way_to_change_window == WindowAction.MAX:
-                    window_management.maximize_window(window_to_change)
-                elif way_to_change_window == WindowAction.MIN:
-                    window_management.minimize_window(window_to_change)
-                elif way_to_change_window == WindowAction.CLOSE:
-                    window_management.close_window(window_to_change)
-                elif way_to_change_window == WindowAction.MOVE:
-                    window_management.move_window(
-                        window_to_change,
-                        window_settings["position"]["x"],
-                        window_settings["position"]["y"],
-                        window_settings["resolution"]["width"],
-                        window_settings["resolution"]["height"],
-                    )
-                else:
-                    logger.log_message(
-                        "Monitor: invalid window behavior specified in settings"
-                    )
+    return state in get_hook_actions()
 
 
 def hook_state_checks(hook_state: HookStateType):
+    hook_actions = get_hook_actions().get(hook_state, ())
     if hook_state != HookStateType.CONSTANT:
         logger.log_message(f"Hook State Check: {hook_state} is running")
-    if is_hook_state_used(hook_state):
-        process_management.kill_processes(hook_state)
-        window_checks(hook_state)
-        exec_events_checks(hook_state)
+    for hook_action in hook_actions:
+        hook_action()
     if hook_state != HookStateType.CONSTANT:
         logger.log_message(f"Hook State Check: {hook_state} finished")
 
@@ -6,10 +6,11 @@ from tempo_core import (
     file_io,
     logger,
     main_logic,
+    project_context,
     settings,
     wrapper,
 )
-from tempo_core.programs import repak, unreal_engine
+from tempo_core.programs import repak
 
 
 def uproject_check():
@@ -30,7 +31,7 @@ def unreal_engine_check():
 
     if should_do_check:
         engine_str = "UE4Editor"
-        if unreal_engine.is_game_ue5(settings.get_unreal_engine_dir()):
+        if project_context.get_project_context().is_ue5:
             engine_str = "UnrealEditor"
         file_io.check_file_exists(
             f"{settings.get_unreal_engine_dir()}/Engine/Binaries/Win64/{engine_str}.exe"
@@ -0,0 +1,183 @@
+import json
+import os
+from dataclasses import asdict, dataclass
+
+from tempo_core import (
+    copy_engine,
+    file_links,
+    hash_cache,
+    logger,
+    mod_scheduler,
+    settings,
+)
+from tempo_core.data_structures import LinkType
+
+
+@dataclass
+class InstallManifestEntry:
+    source: str
+    destination: str
+    size: int
+    mtime_ns: int
+    digest: str
+    link_type: str
+
+
+def get_install_manifests_dir() -> str:
+    return f"{settings.get_working_dir()}/install_manifests"
+
+
+def get_install_manifest_path(mod_name: str) -> str:
+    return f"{get_install_manifests_dir()}/{mod_name}.json"
+
+
+def load_install_manifest(mod_name: str) -> dict[str, InstallManifestEntry]:
+    manifest_path = get_install_manifest_path(mod_name)
+    if not os.path.isfile(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, encoding="utf-8") as file:
+            manifest = json.load(file)
+        return {
+            entry["destination"]: InstallManifestEntry(**entry)
+            for entry in manifest["files"]
+        }
+    except (OSError, json.JSONDecodeError, KeyError, TypeError) as e:
+        logger.log_message(
+            f'Warning: Ignoring unreadable install manifest "{manifest_path}": {e}'
+        )
+        return {}
+
+
+def save_install_manifest(mod_name: str, entries: dict[str, InstallManifestEntry]):
+    manifest_path = get_install_manifest_path(mod_name)
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    manifest = {
+        "mod_name": mod_name,
+        "files": [asdict(entries[destination]) for destination in sorted(entries)],
+    }
+    temp_manifest_path = f"{manifest_path}.tmp"
+    with open(temp_manifest_path, "w", encoding="utf-8") as file:
+        json.dump(manifest, file)
+    os.replace(temp_manifest_path, manifest_path)
+
+
+def delete_install_manifest(mod_name: str):
+    manifest_path = get_install_manifest_path(mod_name)
+    if os.path.isfile(manifest_path):
+        os.remove(manifest_path)
+
+
+def remove_installed_file(destination: str):
+    if os.path.islink(destination):
+        os.unlink(destination)
+    elif os.path.isfile(destination):
+        os.remove(destination)
+
+
+def install_file(source: str, destination: str, link_type: LinkType):
+    file_links.place_file(source, destination, link_type)
+
+
+def is_destination_intact(entry: InstallManifestEntry) -> bool:
+    if entry.link_type == LinkType.SYMLINK.value:
+        return os.path.islink(entry.destination)
+    try:
+        return os.stat(entry.destination).st_size == entry.size
+    except OSError:
+        return False
+
+
+def is_entry_unchanged(
+    entry: InstallManifestEntry | None,
+    source: str,
+    source_stat: os.stat_result,
+    link_type: LinkType,
+) -> bool:
+    if entry is None or entry.source != source or entry.link_type != link_type.value:
+        return False
+    if entry.size != source_stat.st_size or not is_destination_intact(entry):
+        return False
+    if entry.mtime_ns == source_stat.st_mtime_ns:
+        return True
+    # the source was rewritten, but it may still hold the exact same bytes, which
+    # happens a lot when the engine recooks unchanged packages
+    if link_type == LinkType.SYMLINK:
+        return True
+    return entry.digest != "" and hash_cache.get_file_hash(source) == entry.digest
+
+
+def remove_stale_files(stale_destinations: list[str]):
+    for destination in stale_destinations:
+        remove_installed_file(destination)
+    for folder in {os.path.dirname(destination) for destination in stale_destinations}:
+        try:
+            if os.path.isdir(folder) and not os.listdir(folder):
+                os.removedirs(folder)
+        except OSError:
+            pass
+
+
+# installs mod_files (source -> destination), only touching what changed since the last run
+def sync_mod_files(
+    mod_name: str,
+    mod_files: dict[str, str],
+    *,
+    link_type: LinkType,
+    progress_description: str | None = None,
+):
+    previous_entries = load_install_manifest(mod_name)
+    new_entries = {}
+    pending_files = {}
+    source_stats = {}
+    for source, destination in mod_files.items():
+        try:
+            source_stat = os.stat(source)
+        except OSError:
+            continue
+        entry = previous_entries.get(destination)
+        if entry is not None and is_entry_unchanged(
+            entry, source, source_stat, link_type
+        ):
+            entry.mtime_ns = source_stat.st_mtime_ns
+            new_entries[destination] = entry
+            continue
+        pending_files[source] = destination
+        source_stats[source] = source_stat
+
+    with mod_scheduler.copy_slot():
+        if link_type == LinkType.COPY:
+            copy_engine.copy_files(
+                pending_files, progress_description=progress_description
+            )
+        else:
+            for destination_dir in {
+                os.path.dirname(destination) for destination in pending_files.values()
+            }:
+                os.makedirs(destination_dir, exist_ok=True)
+            for source, destination in pending_files.items():
+                install_file(source, destination, link_type)
+
+    for source, destination in pending_files.items():
+        digest = ""
+        if link_type != LinkType.SYMLINK:
+            digest = hash_cache.get_file_hash(source)
+        new_entries[destination] = InstallManifestEntry(
+            source=source,
+            destination=destination,
+            size=source_stats[source].st_size,
+            mtime_ns=source_stats[source].st_mtime_ns,
+            digest=digest,
+            link_type=link_type.value,
+        )
+
+    stale_destinations = [
+        destination
+        for destination in previous_entries
+        if destination not in new_entries
+    ]
+    remove_stale_files(stale_destinations)
+    save_install_manifest(mod_name, new_entries)
+    logger.log_message(
+        f"Check: {mod_name} mod files: {len(pending_files)} installed, {len(new_entries) - len(pending_files)} unchanged, {len(stale_destinations)} removed"
+    )
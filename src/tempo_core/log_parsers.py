@@ -0,0 +1,307 @@
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+
+from rich.errors import LiveError
+from rich.progress import BarColumn, MofNCompleteColumn, Progress, TextColumn
+
+from tempo_core import logger, settings
+from tempo_core.console import console
+from tempo_core.data_structures import LogLevel
+
+# matches "LogCook: Warning: ...", "LogCook: Error: ..." and bare "Error: ..." lines,
+# after the optional [time][frame] prefix unreal adds without -NoLogTimes
+SEVERITY_PATTERN = re.compile(
+    r"^(?:\[[^\]]*\]\[\s*\d+\])?\s*(?:(?P<category>\w+): )?(?P<severity>Error|ERROR|Warning|WARNING): "
+)
+SEVERITY_LOG_LEVELS = {"error": LogLevel.ERROR, "warning": LogLevel.WARNING}
+# used when general_info.fatal_log_patterns is not set
+DEFAULT_FATAL_LOG_PATTERNS = [
+    r"Unknown Cook Failure",
+    r"Error: .*Couldn't find file for package",
+]
+UAT_PHASE_PATTERN = re.compile(
+    r"\*+ (?P<phase>BUILD|COOK|STAGE|PACKAGE|ARCHIVE|DEPLOY) COMMAND STARTED"
+)
+COOK_PROGRESS_PATTERN = re.compile(
+    r"Cooked packages (?P<done>\d+) Packages Remain (?P<remaining>\d+) Total (?P<total>\d+)"
+)
+
+
+# how to read the output of one kind of program, the first registered parser whose
+# command_pattern matches the command line is used
+@dataclass
+class LogParser:
+    name: str
+    command_pattern: re.Pattern
+    # named groups done and total
+    progress_pattern: re.Pattern | None = None
+    progress_description: str = ""
+    # named group phase, a phase starts at the first line naming it
+    phase_pattern: re.Pattern | None = None
+    # whether the fatal log patterns abort this program
+    can_abort: bool = False
+
+
+@dataclass
+class LogSummary:
+    parser_name: str
+    command: str
+    return_code: int | None = None
+    duration: float = 0.0
+    line_count: int = 0
+    # category -> count, uncategorized lines go under "General"
+    errors: dict[str, int] = field(default_factory=dict)
+    warnings: dict[str, int] = field(default_factory=dict)
+    # phase -> seconds after the program started
+    phases: dict[str, float] = field(default_factory=dict)
+    progress_done: int | None = None
+    progress_total: int | None = None
+    # the line the program was aborted on
+    fatal_line: str | None = None
+
+
+# the state of parsing one running program's output
+@dataclass
+class LogParseState:
+    log_parser: LogParser
+    summary: LogSummary
+    started_at: float
+    fatal_pattern: re.Pattern | None
+    should_show_progress: bool
+    progress: Progress | None = None
+    progress_task: int | None = None
+
+
+@dataclass
+class LogParsersInformation:
+    log_parsers: list[LogParser]
+
+
+log_parsers_information = LogParsersInformation(
+    log_parsers=[
+        LogParser(
+            name="run_uat",
+            command_pattern=re.compile(r"RunUAT", re.IGNORECASE),
+            progress_pattern=COOK_PROGRESS_PATTERN,
+            progress_description="Cooking packages",
+            phase_pattern=UAT_PHASE_PATTERN,
+            can_abort=True,
+        ),
+        LogParser(
+            name="iostore",
+            command_pattern=re.compile(r"-run=IoStore\b", re.IGNORECASE),
+            can_abort=True,
+        ),
+        LogParser(
+            name="cook",
+            command_pattern=re.compile(r"-run=cook\b", re.IGNORECASE),
+            progress_pattern=COOK_PROGRESS_PATTERN,
+            progress_description="Cooking packages",
+            phase_pattern=re.compile(
+                r"LogCook: Display: (?P<phase>Cooked packages|Done)!?"
+            ),
+            can_abort=True,
+        ),
+        LogParser(
+            name="unreal_pak",
+            command_pattern=re.compile(r"UnrealPak", re.IGNORECASE),
+            can_abort=True,
+        ),
+        LogParser(
+            name="repak",
+            command_pattern=re.compile(r"\brepak", re.IGNORECASE),
+        ),
+    ]
+)
+log_parsers_lock = threading.Lock()
+
+
+# parsers registered later are tried first, so they can take over a built in one
+def register_log_parser(log_parser: LogParser):
+    with log_parsers_lock:
+        log_parsers_information.log_parsers.insert(0, log_parser)
+
+
+def get_log_parser(command: str) -> LogParser | None:
+    with log_parsers_lock:
+        log_parsers = list(log_parsers_information.log_parsers)
+    for log_parser in log_parsers:
+        if log_parser.command_pattern.search(command):
+            return log_parser
+    return None
+
+
+def get_fatal_pattern(log_parser: LogParser) -> re.Pattern | None:
+    if not log_parser.can_abort:
+        return None
+    fatal_log_patterns = settings.get_fatal_log_patterns()
+    if fatal_log_patterns is None:
+        fatal_log_patterns = DEFAULT_FATAL_LOG_PATTERNS
+    if not fatal_log_patterns:
+        return None
+    return re.compile("|".join(f"(?:{pattern})" for pattern in fatal_log_patterns))
+
+
+def start_log_parse(log_parser: LogParser, command: str) -> LogParseState:
+    return LogParseState(
+        log_parser=log_parser,
+        summary=LogSummary(parser_name=log_parser.name, command=command),
+        started_at=time.monotonic(),
+        fatal_pattern=get_fatal_pattern(log_parser),
+        should_show_progress=settings.should_show_progress_bars(),
+    )
+
+
+def update_progress(log_parse_state: LogParseState, done: int, total: int):
+    summary = log_parse_state.summary
+    summary.progress_done = done
+    summary.progress_total = total
+    if log_parse_state.progress is None:
+        if not log_parse_state.should_show_progress:
+            return
+        progress = Progress(
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            MofNCompleteColumn(),
+            console=console,
+        )
+        try:
+            progress.start()
+        except LiveError:
+            # another progress bar is already showing, only the summary gets the count
+            log_parse_state.should_show_progress = False
+            return
+        log_parse_state.progress = progress
+        log_parse_state.progress_task = progress.add_task(
+            log_parse_state.log_parser.progress_description, total=total
+        )
+    log_parse_state.progress.update(
+        log_parse_state.progress_task,  # type: ignore
+        completed=done,
+        total=total,
+    )
+
+
+# returns the level to log the line at, and whether the program should be aborted
+def parse_log_line(log_parse_state: LogParseState, line: str) -> tuple[LogLevel, bool]:
+    log_parser = log_parse_state.log_parser
+    summary = log_parse_state.summary
+    summary.line_count += 1
+    log_level = LogLevel.DEBUG
+
+    severity_match = SEVERITY_PATTERN.match(line)
+    if severity_match:
+        severity = severity_match.group("severity").lower()
+        category = severity_match.group("category") or "General"
+        counts = summary.errors if severity == "error" else summary.warnings
+        counts[category] = counts.get(category, 0) + 1
+        log_level = SEVERITY_LOG_LEVELS[severity]
+
+    if log_parser.phase_pattern is not None:
+        phase_match = log_parser.phase_pattern.search(line)
+        if phase_match:
+            phase = phase_match.group("phase").lower()
+            if phase not in summary.phases:
+                summary.phases[phase] = round(
+                    time.monotonic() - log_parse_state.started_at, 3
+                )
+
+    if log_parser.progress_pattern is not None:
+        progress_match = log_parser.progress_pattern.search(line)
+        if progress_match:
+            update_progress(
+                log_parse_state,
+                int(progress_match.group("done")),
+                int(progress_match.group("total")),
+            )
+
+    if log_parse_state.fatal_pattern is not None and (
+        log_parse_state.fatal_pattern.search(line)
+    ):
+        summary.fatal_line = line
+        return LogLevel.ERROR, True
+    return log_level, False
+
+
+def get_summary_path(summary: LogSummary) -> str:
+    timestamp = datetime.now().strftime("%m_%d_%Y_%H%M_%S_%f")
+    return os.path.join(
+        logger.log_information.log_base_dir,
+        "summaries",
+        f"{logger.log_information.log_prefix}_{summary.parser_name}_{timestamp}.json",
+    )
+
+
+def get_counts_str(counts: dict[str, int]) -> str:
+    return ", ".join(
+        f"{category}: {count}"
+        for category, count in sorted(counts.items(), key=lambda item: -item[1])
+    )
+
+
+# stops the progress bar, logs the summary and saves it as json next to the logs,
+# keeping the newest general_info.max_log_summaries of them
+def finish_log_parse(log_parse_state: LogParseState, return_code: int | None):
+    if log_parse_state.progress is not None:
+        log_parse_state.progress.stop()
+        log_parse_state.progress = None
+    summary = log_parse_state.summary
+    summary.return_code = return_code
+    summary.duration = round(time.monotonic() - log_parse_state.started_at, 3)
+
+    error_count = sum(summary.errors.values())
+    warning_count = sum(summary.warnings.values())
+    logger.log_message(
+        f"Check: {summary.parser_name} finished in {summary.duration}s with return code {return_code}, {error_count} errors and {warning_count} warnings"
+    )
+    if summary.errors:
+        logger.log_message(
+            f"Error: {summary.parser_name} errors by category: {get_counts_str(summary.errors)}"
+        )
+    if summary.warnings:
+        logger.log_message(
+            f"Warning: {summary.parser_name} warnings by category: {get_counts_str(summary.warnings)}"
+        )
+    if summary.progress_total is not None:
+        logger.log_message(
+            f"Check: {summary.parser_name} progress: {summary.progress_done}/{summary.progress_total}"
+        )
+    for phase, seconds in summary.phases.items():
+        logger.log_message(f"Timer: {summary.parser_name} {phase} phase at {seconds}s")
+
+    max_log_summaries = settings.get_max_log_summaries()
+    if max_log_summaries == 0:
+        return
+    summary_path = get_summary_path(summary)
+    try:
+        os.makedirs(os.path.dirname(summary_path), exist_ok=True)
+        with open(summary_path, "w") as file:
+            json.dump(asdict(summary), file, indent=4)
+    except OSError as e:
+        logger.log_message(f'Warning: Could not save log summary "{summary_path}": {e}')
+        return
+    prune_summaries(os.path.dirname(summary_path), max_log_summaries)
+
+
+# deletes the oldest summaries beyond the newest max_log_summaries
+def prune_summaries(summaries_dir: str, max_log_summaries: int):
+    try:
+        with os.scandir(summaries_dir) as entries:
+            summary_entries = [
+                (entry.stat().st_mtime_ns, entry.path)
+                for entry in entries
+                if entry.name.endswith(".json") and entry.is_file()
+            ]
+    except OSError:
+        return
+    summary_entries.sort(reverse=True)
+    for _, old_summary_path in summary_entries[max_log_summaries:]:
+        try:
+            os.remove(old_summary_path)
+        except OSError:
+            pass
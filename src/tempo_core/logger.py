@@ -1,13 +1,32 @@
+import atexit
 import os
+import queue
+import re
 import sys
 import textwrap
+import threading
+import time
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime
 from shutil import get_terminal_size
+from typing import TextIO
+
+from rich.errors import ConsoleError, StyleError
+from rich.style import Style
+from rich.text import Text
 
 from tempo_core.console import console
+from tempo_core.data_structures import LogLevel, get_enum_from_val
 from tempo_core.log_info import LOG_INFO
 
+# how often the writer flushes the log file while messages keep coming in
+LOG_FLUSH_INTERVAL = 0.25
+LOG_FILE_BUFFER_SIZE = 1024 * 1024
+# most messages the writer renders to the console in one go
+LOG_BATCH_SIZE = 1000
+LOG_LEVEL_RANKS = {log_level: rank for rank, log_level in enumerate(LogLevel)}
+
 
 def get_is_log_file_use_disabled() -> bool:
     return "--disable_log_file_output" in sys.argv
@@ -21,6 +40,24 @@ def get_default_log_name_prefix() -> str:
     return f"{__name__.split('.')[0]}"
 
 
+def get_log_level_from_args(arg: str, default_log_level: LogLevel) -> LogLevel:
+    if arg in sys.argv:
+        index = sys.argv.index(arg) + 1
+        if index < len(sys.argv):
+            return get_enum_from_val(LogLevel, sys.argv[index].lower())  # type: ignore
+    return default_log_level
+
+
+# --console_log_level info keeps raw engine output out of the console, it still goes
+# to the log file
+def get_console_log_level() -> LogLevel:
+    return get_log_level_from_args("--console_log_level", LogLevel.DEBUG)
+
+
+def get_file_log_level() -> LogLevel:
+    return get_log_level_from_args("--file_log_level", LogLevel.DEBUG)
+
+
 @dataclass
 class LogInformation:
     log_base_dir: str
@@ -34,6 +71,49 @@ log_information = LogInformation(
     has_configured_logging=False,
 )
 
+log_lock = threading.RLock()
+thread_log_information = threading.local()
+
+
+@dataclass
+class LogThemeInformation:
+    # every theme keyword, in theme order, None for a theme without keywords
+    keyword_pattern: re.Pattern | None
+    keyword_indexes: dict[str, int]
+    keyword_styles: list[Style]
+    # keyword index -> (index, keyword) of the earlier keywords a match can hide
+    overlapping_keywords: list[list[tuple[int, str]]]
+    default_style: Style
+    error_style: Style
+
+
+@dataclass
+class LogWriterInformation:
+    # every writer thread gets its own queue, so one being stopped never takes
+    # messages meant for the next
+    log_queue: queue.SimpleQueue | None
+    writer_thread: threading.Thread | None
+    console_log_rank: int
+    file_log_rank: int
+    log_theme: LogThemeInformation | None
+
+
+log_writer_information = LogWriterInformation(
+    log_queue=None,
+    writer_thread=None,
+    console_log_rank=LOG_LEVEL_RANKS[get_console_log_level()],
+    file_log_rank=LOG_LEVEL_RANKS[get_file_log_level()],
+    log_theme=None,
+)
+
+
+# owned by a single writer thread
+@dataclass
+class LogFileInformation:
+    log_file: TextIO | None
+    log_path: str | None
+    has_unflushed_lines: bool
+
 
 def set_log_base_dir(base_dir: str):
     log_information.log_base_dir = base_dir
@@ -42,6 +122,8 @@ def set_log_base_dir(base_dir: str):
 def configure_logging(
     log_name_prefix: str = get_default_log_name_prefix(),
 ):
+    # the writer holds the latest log open, which would block renaming it
+    stop_log_writer()
     log_information.log_prefix = log_name_prefix
 
     log_dir = os.path.join(log_information.log_base_dir)
@@ -49,6 +131,7 @@ def configure_logging(
         os.makedirs(log_dir)
 
     rename_latest_log(log_dir)
+    log_writer_information.log_theme = compile_log_theme(LOG_INFO)
     log_information.has_configured_logging = True
 
 
@@ -74,62 +157,309 @@ def rename_latest_log(log_dir):
             return
 
 
-def log_message(message: str):
-    if log_information.has_configured_logging:
-        color_options = LOG_INFO.get("theme_colors", {})
-        default_background_color = LOG_INFO.get("background_color", (40, 42, 54))
-        default_background_color = f"rgb({default_background_color[0]},{default_background_color[1]},{default_background_color[2]})"
+# messages logged by the current thread are held back as (message, log level) until the
+# block exits, so work running on several threads at once does not interleave its output
+@contextmanager
+def capture_thread_messages():
+    captured_messages = []
+    thread_log_information.captured_messages = captured_messages
+    try:
+        yield captured_messages
+    finally:
+        thread_log_information.captured_messages = None
 
-        default_text_color = LOG_INFO.get("default_color", (94, 94, 255))
-        default_text_color = f"rgb({default_text_color[0]},{default_text_color[1]},{default_text_color[2]})"
 
-        terminal_width = get_terminal_size().columns
-        wrapped_lines = textwrap.wrap(message, width=terminal_width)
+def log_messages(messages: list[tuple[str, LogLevel | None]]):
+    with log_lock:
+        for message, log_level in messages:
+            log_message(message, log_level)
 
-        for line in enumerate(wrapped_lines):
-            padded_line = line[1].ljust(terminal_width)
-            for keyword, color in color_options.items():
-                if keyword in message:
-                    rgb_color = f"rgb({color[0]},{color[1]},{color[2]})"
-                    console.print(
-                        padded_line, style=f"{rgb_color} on {default_background_color}"
-                    )
-                    break
-            else:
-                console.print(
-                    padded_line,
-                    style=f"{default_text_color} on {default_background_color}",
-                )
 
-        log_dir = os.path.join(log_information.log_base_dir)
-        log_path = os.path.join(log_dir, f"{log_information.log_prefix}_latest.log")
+def get_message_log_level(message: str) -> LogLevel:
+    if message.startswith("Error"):
+        return LogLevel.ERROR
+    if message.startswith("Warning"):
+        return LogLevel.WARNING
+    return LogLevel.INFO
 
-        if not os.path.isdir(log_dir):
-            if not get_is_log_file_use_disabled():
-                os.makedirs(log_dir)
 
-        if not os.path.isfile(log_path):
-            try:
-                if not get_is_log_file_use_disabled():
-                    with open(log_path, "w") as log_file:
-                        log_file.write("")
-            except OSError as e:
-                error_color = LOG_INFO.get("error_color", (255, 0, 0))
-                error_color = f"rgb({error_color[0]},{error_color[1]},{error_color[2]})"
-                console.print(
-                    f"Failed to create log file: {e}",
-                    style=f"{error_color} on {default_background_color}",
-                )
-                return
+# messages are queued and written by a background thread, so logging never waits on
+# the console or the log file, without a level it is taken from the message prefix
+def log_message(message: str, log_level: LogLevel | None = None):
+    captured_messages = getattr(thread_log_information, "captured_messages", None)
+    if captured_messages is not None:
+        captured_messages.append((message, log_level))
+        return
+    if not log_information.has_configured_logging:
+        return
+    if log_level is None:
+        log_level = get_message_log_level(message)
+    log_rank = LOG_LEVEL_RANKS[log_level]
+    to_console = log_rank >= log_writer_information.console_log_rank
+    to_file = log_rank >= log_writer_information.file_log_rank
+    if not to_console and not to_file:
+        return
+    with log_lock:
+        if log_writer_information.writer_thread is None:
+            start_log_writer()
+        log_writer_information.log_queue.put((message, to_console, to_file))  # type: ignore
 
-        try:
-            if not get_is_log_file_use_disabled():
-                with open(log_path, "a") as log_file:
-                    log_file.write(f"{message}\n")
-        except OSError as e:
-            error_color = LOG_INFO.get("error_color", (255, 0, 0))
-            error_color = f"rgb({error_color[0]},{error_color[1]},{error_color[2]})"
-            console.print(
-                f"Failed to write to log file: {e}",
-                style=f"{error_color} on {default_background_color}",
+
+def start_log_writer():
+    log_queue = queue.SimpleQueue()
+    writer_thread = threading.Thread(
+        target=run_log_writer, args=(log_queue,), name="tempo_log_writer", daemon=True
+    )
+    log_writer_information.log_queue = log_queue
+    log_writer_information.writer_thread = writer_thread
+    writer_thread.start()
+
+
+# blocks until every message queued so far is on the console and in the log file
+def flush_logs():
+    with log_lock:
+        if log_writer_information.writer_thread is None:
+            return
+        flushed_event = threading.Event()
+        log_writer_information.log_queue.put(flushed_event)  # type: ignore
+    flushed_event.wait()
+
+
+def stop_log_writer():
+    with log_lock:
+        writer_thread = log_writer_information.writer_thread
+        if writer_thread is None:
+            return
+        log_writer_information.log_queue.put(None)  # type: ignore
+        log_writer_information.log_queue = None
+        log_writer_information.writer_thread = None
+    writer_thread.join()
+
+
+atexit.register(stop_log_writer)
+
+
+def get_rgb_style(color: tuple, background_color: tuple) -> Style:
+    return Style.parse(
+        f"rgb({color[0]},{color[1]},{color[2]}) on rgb({background_color[0]},{background_color[1]},{background_color[2]})"
+    )
+
+
+# whether other could start partway through a match of keyword, where the keyword
+# search would step over it
+def is_keyword_overlapping(keyword: str, other: str) -> bool:
+    for offset in range(1, len(keyword)):
+        overlap_length = min(len(keyword) - offset, len(other))
+        if keyword[offset : offset + overlap_length] == other[:overlap_length]:
+            return True
+    return False
+
+
+def compile_log_theme(log_info: dict) -> LogThemeInformation:
+    background_color = log_info.get("background_color", (40, 42, 54))
+    theme_colors = log_info.get("theme_colors", {})
+    keywords = list(theme_colors)
+    keyword_pattern = None
+    if keywords:
+        keyword_pattern = re.compile("|".join(map(re.escape, keywords)))
+    return LogThemeInformation(
+        keyword_pattern=keyword_pattern,
+        keyword_indexes={keyword: index for index, keyword in enumerate(keywords)},
+        keyword_styles=[
+            get_rgb_style(theme_colors[keyword], background_color)
+            for keyword in keywords
+        ],
+        overlapping_keywords=[
+            [
+                (other_index, other)
+                for other_index, other in enumerate(keywords[:index])
+                if is_keyword_overlapping(keyword, other)
+            ]
+            for index, keyword in enumerate(keywords)
+        ],
+        default_style=get_rgb_style(
+            log_info.get("default_color", (94, 94, 255)), background_color
+        ),
+        error_style=get_rgb_style(
+            log_info.get("error_color", (255, 0, 0)), background_color
+        ),
+    )
+
+
+def get_log_theme() -> LogThemeInformation:
+    if log_writer_information.log_theme is None:
+        log_writer_information.log_theme = compile_log_theme(LOG_INFO)
+    return log_writer_information.log_theme
+
+
+# the style of the first theme keyword (in theme order) anywhere in the message, found
+# with a single scan
+def get_message_style(log_theme: LogThemeInformation, message: str) -> Style:
+    if log_theme.keyword_pattern is None:
+        return log_theme.default_style
+    keyword_index = len(log_theme.keyword_styles)
+    for keyword_match in log_theme.keyword_pattern.finditer(message):
+        match_index = log_theme.keyword_indexes[keyword_match.group()]
+        keyword_index = min(keyword_index, match_index)
+        # an earlier keyword the scan stepped over inside this match
+        for other_index, other in log_theme.overlapping_keywords[match_index]:
+            if other_index < keyword_index and other in message:
+                keyword_index = other_index
+        if keyword_index == 0:
+            break
+    if keyword_index == len(log_theme.keyword_styles):
+        return log_theme.default_style
+    return log_theme.keyword_styles[keyword_index]
+
+
+def print_log_error(error_message: str):
+    console.print(error_message, style=get_log_theme().error_style)
+
+
+def get_wrapped_lines(message: str, terminal_width: int) -> list[str]:
+    if not message.strip():
+        return []
+    if len(message) <= terminal_width and message.isprintable():
+        return [message]
+    return textwrap.wrap(message, width=terminal_width)
+
+
+# one console write for the whole batch instead of one per line, when the console is
+# not a terminal (ci logs, redirected output) messages are written as they are
+def print_log_messages(messages: list[str]):
+    if not messages:
+        return
+    if not console.is_terminal:
+        console.file.write("".join(f"{message}\n" for message in messages))
+        console.file.flush()
+        return
+    log_theme = get_log_theme()
+    terminal_width = get_terminal_size().columns
+    lines = []
+    for message in messages:
+        style = get_message_style(log_theme, message)
+        for wrapped_line in get_wrapped_lines(message, terminal_width):
+            lines.append(
+                console.render_str(wrapped_line.ljust(terminal_width), style=style)
             )
+    if lines:
+        console.print(Text("\n").join(lines))
+
+
+def get_log_file(
+    log_file_information: LogFileInformation, log_path: str
+) -> TextIO | None:
+    if log_file_information.log_path == log_path:
+        return log_file_information.log_file
+    close_log_file(log_file_information)
+    try:
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        # kept open across batches in log_file_information, close_log_file closes it
+        log_file = open(  # noqa: SIM115
+            log_path,
+            "a",
+            encoding="utf-8",
+            errors="replace",
+            buffering=LOG_FILE_BUFFER_SIZE,
+        )
+    except OSError as e:
+        print_log_error(f"Failed to create log file: {e}")
+        return None
+    log_file_information.log_file = log_file
+    log_file_information.log_path = log_path
+    return log_file
+
+
+def write_log_lines(log_file_information: LogFileInformation, lines: list[str]):
+    log_path = os.path.join(
+        log_information.log_base_dir, f"{log_information.log_prefix}_latest.log"
+    )
+    log_file = get_log_file(log_file_information, log_path)
+    if log_file is None:
+        return
+    try:
+        log_file.writelines(lines)
+    except OSError as e:
+        print_log_error(f"Failed to write to log file: {e}")
+        return
+    log_file_information.has_unflushed_lines = True
+
+
+def flush_log_file(log_file_information: LogFileInformation):
+    log_file = log_file_information.log_file
+    if log_file is None or not log_file_information.has_unflushed_lines:
+        return
+    try:
+        log_file.flush()
+    except OSError as e:
+        print_log_error(f"Failed to write to log file: {e}")
+    log_file_information.has_unflushed_lines = False
+
+
+def close_log_file(log_file_information: LogFileInformation):
+    flush_log_file(log_file_information)
+    log_file = log_file_information.log_file
+    log_file_information.log_file = None
+    log_file_information.log_path = None
+    if log_file is not None:
+        try:
+            log_file.close()
+        except OSError:
+            pass
+
+
+def write_log_records(
+    log_file_information: LogFileInformation, records: list[tuple[str, bool, bool]]
+):
+    if not records:
+        return
+    console_messages = [message for message, to_console, _ in records if to_console]
+    try:
+        print_log_messages(console_messages)
+    except (ConsoleError, StyleError, OSError, UnicodeError) as e:
+        # a console that can not show a message must not stop the log file
+        print_log_error(f"Failed to print log messages: {e}")
+    if not get_is_log_file_use_disabled():
+        write_log_lines(
+            log_file_information,
+            [f"{message}\n" for message, _, to_file in records if to_file],
+        )
+
+
+# the queue holds (message, to_console, to_file) records, an event to set once all
+# before it are written, or None to stop, which is always the last item
+def run_log_writer(log_queue: queue.SimpleQueue):
+    log_file_information = LogFileInformation(
+        log_file=None, log_path=None, has_unflushed_lines=False
+    )
+    last_flush_time = time.monotonic()
+    is_running = True
+    while is_running:
+        try:
+            queue_items = [log_queue.get(timeout=LOG_FLUSH_INTERVAL)]
+        except queue.Empty:
+            flush_log_file(log_file_information)
+            last_flush_time = time.monotonic()
+            continue
+        while len(queue_items) < LOG_BATCH_SIZE:
+            try:
+                queue_items.append(log_queue.get_nowait())
+            except queue.Empty:
+                break
+        records = []
+        for queue_item in queue_items:
+            if isinstance(queue_item, tuple):
+                records.append(queue_item)
+                continue
+            write_log_records(log_file_information, records)
+            records = []
+            if queue_item is None:
+                close_log_file(log_file_information)
+                is_running = False
+            else:
+                flush_log_file(log_file_information)
+                queue_item.set()
+        write_log_records(log_file_information, records)
+        if time.monotonic() - last_flush_time >= LOG_FLUSH_INTERVAL:
+            flush_log_file(log_file_information)
+            last_flush_time = time.monotonic()
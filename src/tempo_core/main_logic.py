@@ -3,18 +3,27 @@ import os
 import shutil
 import subprocess
 import sys
+from collections.abc import Mapping
 
 from tempo_core import (
     app_runner,
+    cleanup_engine,
+    cooked_asset_index,
     data_structures,
     engine,
     file_io,
+    game_file_snapshot,
+    game_install_profile,
     game_runner,
+    hash_cache,
     hook_states,
     log_info,
     logger,
+    mod_registry,
     packing,
     process_management,
+    project_context,
+    release_builder,
     settings,
     utilities,
 )
@@ -27,7 +36,7 @@ from tempo_core.programs import (
     unreal_engine,
     stove,
 )
-from tempo_core.threads import constant, game_monitor
+from tempo_core.threads import constant, game_monitor, monitor_loop
 
 
 @hook_states.hook_state_decorator(
@@ -39,6 +48,7 @@ def init_thread_system():
 
 def close_thread_system():
     constant.stop_constant_thread()
+    monitor_loop.stop_monitor_loop()
 
 
 # all things below this should be functions that correspond to cli logic
@@ -54,8 +64,7 @@ def generate_mods_other(*, use_symlinks: bool):
 def test_mods(*, input_mod_names: list[str], toggle_engine: bool, use_symlinks: bool):
     if toggle_engine:
         engine.toggle_engine_off()
-    for mod_name in input_mod_names:
-        settings.settings_information.mod_names.append(mod_name)
+    mod_registry.select_mods(input_mod_names)
     generate_mods_other(use_symlinks=use_symlinks)
     if toggle_engine:
         engine.toggle_engine_on()
@@ -64,8 +73,7 @@ def test_mods(*, input_mod_names: list[str], toggle_engine: bool, use_symlinks:
 def test_mods_all(*, toggle_engine: bool, use_symlinks: bool):
     if toggle_engine:
         engine.toggle_engine_off()
-    for entry in settings.settings_information.settings["mods_info"]:
-        settings.settings_information.mod_names.append(entry["mod_name"])
+    mod_registry.select_all_mods()
     generate_mods_other(use_symlinks=use_symlinks)
     if toggle_engine:
         engine.toggle_engine_on()
@@ -81,8 +89,7 @@ def full_run(
 ):
     if toggle_engine:
         engine.toggle_engine_off()
-    for mod_name in input_mod_names:
-        settings.settings_information.mod_names.append(mod_name)
+    mod_registry.select_mods(input_mod_names)
     packing.cooking()
     generate_mods(input_mod_names=input_mod_names, use_symlinks=use_symlinks)
     generate_mod_releases(
@@ -103,8 +110,7 @@ def full_run_all(
 ):
     if toggle_engine:
         engine.toggle_engine_off()
-    for entry in settings.settings_information.settings["mods_info"]:
-        settings.settings_information.mod_names.append(entry["mod_name"])
+    mod_registry.select_all_mods()
     packing.cooking()
     generate_mods_all(use_symlinks=use_symlinks)
     generate_mod_releases_all(
@@ -157,6 +163,7 @@ def install_uasset_gui(*, output_directory: str, run_after_install: bool):
 
 
 def open_latest_log():
+    logger.flush_logs()
     log_prefix = log_info.LOG_INFO["log_name_prefix"]
     file_to_open = f"{file_io.SCRIPT_DIR}/logs/{log_prefix}latest.log"
     file_io.open_file_in_default(file_to_open)
@@ -231,6 +238,8 @@ def build(*, toggle_engine: bool):
 def upload_changes_to_repo():
     repo_path = settings.settings_information.settings["git_info"]["repo_path"]
     branch = settings.settings_information.settings["git_info"]["repo_branch"]
+    # the prompt must come after everything logged so far
+    logger.flush_logs()
     desc = input("Enter commit description: ")
     git_path = shutil.which("git")
     if git_path is None:
@@ -486,9 +495,7 @@ def get_solo_package_command() -> str:
     #     command = f'{command} -build'
     for arg in settings.get_engine_packaging_args():
         command = f"{command} {arg}"
-    is_game_iostore = unreal_engine.get_is_game_iostore(
-        settings.get_uproject_file(), utilities.custom_get_game_dir()
-    )
+    is_game_iostore = game_install_profile.is_game_iostore()
     if is_game_iostore:
         command = f"{command} -iostore"
         logger.log_message("Check: Game is iostore")
@@ -500,8 +507,7 @@ def get_solo_package_command() -> str:
 def package(*, toggle_engine: bool, use_symlinks: bool):
     if toggle_engine:
         engine.toggle_engine_off()
-    for entry in settings.get_mods_info_list_from_json():
-        settings.settings_information.mod_names.append(entry["mod_name"])
+    mod_registry.select_all_mods()
     logger.log_message("Packaging Starting")
     run_proj_build_command(get_solo_package_command())
     packing.generate_mods(use_symlinks=use_symlinks)
@@ -531,16 +537,28 @@ def cleanup_full():
     logger.log_message(f'Cleaned up repo at: "{repo_path}"')
 
     dist_dir = f"{file_io.SCRIPT_DIR}/dist"
-    if os.path.isdir(dist_dir):
-        shutil.rmtree(dist_dir)
+    cleanup_engine.remove_tree(dist_dir)
     logger.log_message(f'Cleaned up dist dir at: "{dist_dir}"')
 
     working_dir = settings.get_working_dir()
-    if os.path.isdir(working_dir):
-        shutil.rmtree(working_dir)
+    # the trash dir is in the working dir, finish emptying it before moving it
+    cleanup_engine.wait_for_pending_deletes()
+    cleanup_engine.remove_tree(working_dir)
+    project_context.invalidate_project_context()
     logger.log_message(f'Cleaned up working dir at: "{working_dir}"')
 
 
+def remove_build_dirs(repo_path: str, build_dirs: set[str]):
+    trash_dir = cleanup_engine.get_trash_dir()
+    # the trash dir earlier versions left in the repo
+    cleanup_engine.remove_tree(
+        os.path.join(repo_path, cleanup_engine.TRASH_DIR_NAME), trash_dir
+    )
+    cleanup_engine.remove_trees(
+        cleanup_engine.find_target_dirs(repo_path, build_dirs), trash_dir
+    )
+
+
 def cleanup_cooked():
     repo_path = settings.get_cleanup_repo_path()
 
@@ -548,14 +566,9 @@ def cleanup_cooked():
         f'Starting cleanup of Unreal Engine build directories in: "{repo_path}"'
     )
 
-    build_dirs = ["Cooked"]
+    build_dirs = {"Cooked"}
 
-    for root, dirs, _ in os.walk(repo_path):
-        for dir_name in dirs:
-            if dir_name in build_dirs:
-                full_path = os.path.normpath(os.path.join(root, dir_name))
-                shutil.rmtree(full_path)
-                logger.log_message(f"Removed directory: {full_path}")
+    remove_build_dirs(repo_path, build_dirs)
 
 
 def cleanup_build():
@@ -565,35 +578,41 @@ def cleanup_build():
         f'Starting cleanup of Unreal Engine build directories in: "{repo_path}"'
     )
 
-    build_dirs = [
+    build_dirs = {
         "Intermediate",
         "DerivedDataCache",
         "Build",
         "Binaries",
-    ]
+    }
 
-    for root, dirs, _ in os.walk(repo_path):
-        for dir_name in dirs:
-            if dir_name in build_dirs:
-                full_path = os.path.normpath(os.path.join(root, dir_name))
-                shutil.rmtree(full_path)
-                logger.log_message(f"Removed directory: {full_path}")
+    remove_build_dirs(repo_path, build_dirs)
 
 
-def cleanup_game():
-    game_directory = os.path.dirname(utilities.custom_get_game_dir())
-    file_list_json = os.path.join(
+def get_game_file_snapshot_path() -> str:
+    snapshot_path = os.path.join(
+        settings.settings_information.settings_json_dir, "game_file_list.snapshot"
+    )
+    legacy_file_list_json = os.path.join(
         settings.settings_information.settings_json_dir, "game_file_list.json"
     )
-    delete_unlisted_files(game_directory, file_list_json)
+    if not os.path.isfile(snapshot_path) and os.path.isfile(legacy_file_list_json):
+        return legacy_file_list_json
+    return snapshot_path
 
 
+def cleanup_game():
+    game_directory = os.path.dirname(utilities.custom_get_game_dir())
+    delete_unlisted_files(game_directory, get_game_file_snapshot_path())
+
+
+# keeps its name for existing callers, the game file list is a binary snapshot
+# (game_file_list.snapshot) now, see game_file_snapshot.save_snapshot
 def generate_game_file_list_json():
     game_directory = os.path.dirname(utilities.custom_get_game_dir())
-    file_list_json = os.path.join(
-        settings.settings_information.settings_json_dir, "game_file_list.json"
+    snapshot_path = os.path.join(
+        settings.settings_information.settings_json_dir, "game_file_list.snapshot"
     )
-    generate_file_paths_json(game_directory, file_list_json)
+    generate_file_snapshot(game_directory, snapshot_path)
 
 
 def cleanup_from_file_list(file_list: str, directory: str):
@@ -605,99 +624,71 @@ def generate_file_list(directory: str, file_list: str):
 
 
 def generate_mods(*, input_mod_names: list[str], use_symlinks: bool):
-    for mod_name in input_mod_names:
-        settings.settings_information.mod_names.append(mod_name)
-    for entry in settings.get_mods_info_list_from_json():
-        settings.settings_information.mod_names.append(entry["mod_name"])
+    mod_registry.select_mods(input_mod_names)
+    mod_registry.select_all_mods()
     packing.generate_mods(use_symlinks=use_symlinks)
 
 
 def generate_mods_all(*, use_symlinks: bool):
-    for entry in settings.get_mods_info_list_from_json():
-        settings.settings_information.mod_names.append(entry["mod_name"])
-        logger.log_message(entry["mod_name"])
+    for mod_name in mod_registry.get_mod_registry().mods:
+        logger.log_message(mod_name)
+    mod_registry.select_all_mods()
     packing.generate_mods(use_symlinks=use_symlinks)
 
 
-def make_unreal_pak_mod_release(
-    singular_mod_info: dict, base_files_directory: str, output_directory: str
-):
+def get_unreal_pak_mod_release_files(
+    singular_mod_info: Mapping, base_files_directory: str
+) -> dict[str, str]:
     mod_name = singular_mod_info["mod_name"]
     before_pak_file = f"{utilities.custom_get_game_paks_dir()}/{utilities.get_pak_dir_structure(mod_name)}/{mod_name}.pak"
     final_pak_file = f"{base_files_directory}/{mod_name}/{utilities.get_pak_dir_structure(mod_name)}/{mod_name}.pak"
-    if os.path.isfile(final_pak_file):
-        os.remove(final_pak_file)
     logger.log_message(os.path.dirname(final_pak_file))
-    os.makedirs(os.path.dirname(final_pak_file), exist_ok=True)
-    shutil.copyfile(before_pak_file, final_pak_file)
-    file_io.zip_directory_tree(
-        input_dir=f"{base_files_directory}/{mod_name}",
-        output_dir=output_directory,
-        zip_name=f"{mod_name}.zip",
-    )
+    return {before_pak_file: final_pak_file}
 
 
-def make_repak_mod_release(
-    singular_mod_info: dict, base_files_directory: str, output_directory: str
-):
+def get_repak_mod_release_files(
+    singular_mod_info: Mapping, base_files_directory: str
+) -> dict[str, str]:
     mod_name = singular_mod_info["mod_name"]
     before_pak_file = f"{utilities.custom_get_game_paks_dir()}/{utilities.get_pak_dir_structure(mod_name)}/{mod_name}.pak"
     final_pak_file = f"{base_files_directory}/{mod_name}/{utilities.get_pak_dir_structure(mod_name)}/{mod_name}.pak"
-    if os.path.isfile(final_pak_file):
-        os.remove(final_pak_file)
     logger.log_message(os.path.dirname(final_pak_file))
-    os.makedirs(os.path.dirname(final_pak_file), exist_ok=True)
-    shutil.copyfile(before_pak_file, final_pak_file)
-    file_io.zip_directory_tree(
-        input_dir=f"{base_files_directory}/{mod_name}",
-        output_dir=output_directory,
-        zip_name=f"{mod_name}.zip",
-    )
+    return {before_pak_file: final_pak_file}
 
 
-def make_engine_mod_release(
-    singular_mod_info: dict, base_files_directory: str, output_directory: str
-):
+def get_engine_mod_release_files(
+    singular_mod_info: Mapping, base_files_directory: str
+) -> dict[str, str]:
     mod_name = singular_mod_info["mod_name"]
     uproject_file = settings.get_uproject_file()
     mod_files = []
     pak_chunk_num = singular_mod_info["pak_chunk_num"]
     uproject_file = settings.get_uproject_file()
     uproject_dir = unreal_engine.get_uproject_dir(uproject_file)
-    win_dir_str = unreal_engine.get_win_dir_str(settings.get_unreal_engine_dir())
+    win_dir_str = project_context.get_project_context().win_dir_str
     uproject_name = unreal_engine.get_uproject_name(uproject_file)
     prefix = f"{uproject_dir}/Saved/StagedBuilds/{win_dir_str}/{uproject_name}/Content/Paks/pakchunk{pak_chunk_num}-{win_dir_str}."
     mod_files.append(prefix)
+    release_files = {}
     for file in mod_files:
-        for suffix in unreal_engine.get_game_pak_folder_archives(
-            uproject_file, utilities.custom_get_game_dir()
-        ):
+        for suffix in game_install_profile.get_game_pak_folder_archives():
             dir_engine_mod = f"{utilities.custom_get_game_dir()}/Content/Paks/{utilities.get_pak_dir_structure(mod_name)}"
             os.makedirs(dir_engine_mod, exist_ok=True)
             before_file = f"{file}{suffix}"
             after_file = f"{base_files_directory}/{mod_name}/{utilities.get_pak_dir_structure(mod_name)}/{mod_name}.{suffix}"
-            if os.path.isfile(after_file):
-                os.remove(after_file)
-            os.makedirs(os.path.dirname(after_file), exist_ok=True)
-            shutil.copyfile(before_file, after_file)
-    file_io.zip_directory_tree(
-        input_dir=f"{base_files_directory}/{mod_name}",
-        output_dir=output_directory,
-        zip_name=f"{mod_name}.zip",
-    )
+            release_files[before_file] = after_file
+    return release_files
 
 
 def get_mod_files_asset_paths_for_loose_mods(
     mod_name: str, base_files_directory: str
 ) -> dict:
     file_dict = {}
-    cooked_uproject_dir = unreal_engine.get_cooked_uproject_dir(
-        settings.get_uproject_file(), settings.get_unreal_engine_dir()
-    )
+    cooked_uproject_dir = cooked_asset_index.get_cooked_asset_index().cooked_dir
     mod_info = packing.get_mod_pak_entry(mod_name)
     for asset in mod_info["file_includes"]["asset_paths"]:
         base_path = f"{cooked_uproject_dir}/{asset}"
-        for extension in file_io.get_file_extensions(base_path):
+        for extension in cooked_asset_index.get_asset_extensions(asset):
             before_path = f"{base_path}{extension}"
             after_path = (
                 f"{base_files_directory}/{mod_name}/mod_files/{asset}{extension}"
@@ -710,20 +701,13 @@ def get_mod_files_tree_paths_for_loose_mods(
     mod_name: str, base_files_directory: str
 ) -> dict:
     file_dict = {}
-    cooked_uproject_dir = unreal_engine.get_cooked_uproject_dir(
-        settings.get_uproject_file(), settings.get_unreal_engine_dir()
-    )
+    cooked_uproject_dir = cooked_asset_index.get_cooked_asset_index().cooked_dir
     mod_info = packing.get_mod_pak_entry(mod_name)
     for tree in mod_info["file_includes"]["tree_paths"]:
-        tree_path = f"{cooked_uproject_dir}/{tree}"
-        for entry in file_io.get_files_in_tree(tree_path):
-            if os.path.isfile(entry):
-                base_entry = os.path.splitext(entry)[0]
-                for extension in file_io.get_file_extensions_two(entry):
-                    before_path = f"{base_entry}{extension}"
-                    relative_path = os.path.relpath(base_entry, cooked_uproject_dir)
-                    after_path = f"{base_files_directory}/{mod_name}/mod_files/{relative_path}{extension}"
-                    file_dict[before_path] = after_path
+        for relative_path in cooked_asset_index.get_tree_file_paths(tree):
+            before_path = f"{cooked_uproject_dir}/{relative_path}"
+            after_path = f"{base_files_directory}/{mod_name}/mod_files/{relative_path}"
+            file_dict[before_path] = after_path
     return file_dict
 
 
@@ -746,11 +730,12 @@ def get_mod_files_mod_name_dir_paths_for_loose_mods(
     mod_name: str, base_files_directory: str
 ) -> dict:
     file_dict = {}
-    cooked_game_name_mod_dir = f"{unreal_engine.get_cooked_uproject_dir(settings.get_uproject_file(), settings.get_unreal_engine_dir())}/Content/{utilities.get_unreal_mod_tree_type_str(mod_name)}/{utilities.get_mod_name_dir_name(mod_name)}"
+    cooked_uproject_dir = cooked_asset_index.get_cooked_asset_index().cooked_dir
+    mod_name_dir = f"Content/{utilities.get_unreal_mod_tree_type_str(mod_name)}/{utilities.get_mod_name_dir_name(mod_name)}"
 
-    for file in file_io.get_files_in_tree(cooked_game_name_mod_dir):
-        relative_file_path = os.path.relpath(file, cooked_game_name_mod_dir)
-        before_path = os.path.abspath(file)
+    for relative_path in cooked_asset_index.get_tree_file_paths(mod_name_dir):
+        relative_file_path = relative_path[len(mod_name_dir) + 1 :]
+        before_path = os.path.abspath(f"{cooked_uproject_dir}/{relative_path}")
         after_path = f"{base_files_directory}/{mod_name}/mod_files/{relative_file_path}"
         file_dict[before_path] = after_path
     return file_dict
@@ -774,68 +759,72 @@ def get_mod_paths_for_loose_mods(mod_name: str, base_files_directory: str) -> di
     return file_dict
 
 
-def make_loose_mod_release(
-    singular_mod_info: dict, base_files_directory: str, output_directory: str
-):
+def get_loose_mod_release_files(
+    singular_mod_info: Mapping, base_files_directory: str
+) -> dict[str, str]:
     mod_name = singular_mod_info["mod_name"]
     mod_files = get_mod_paths_for_loose_mods(mod_name, base_files_directory)
-    dict_keys = mod_files.keys()
-    for key in dict_keys:
-        before_file = key
-        after_file = mod_files[key]
-        os.makedirs(os.path.dirname(after_file), exist_ok=True)
-        if os.path.exists(before_file):
-            if os.path.islink(after_file):
-                os.unlink(after_file)
-            if os.path.isfile(after_file):
-                os.remove(after_file)
-        if os.path.isfile(before_file):
-            shutil.copy(before_file, after_file)
-    file_io.zip_directory_tree(
-        input_dir=f"{base_files_directory}/{mod_name}",
-        output_dir=output_directory,
-        zip_name=f"{mod_name}.zip",
-    )
+    return utilities.filter_file_paths(mod_files)
+
+
+def get_mod_release_files(mod_name: str, base_files_directory: str) -> dict[str, str]:
+    singular_mod_info = utilities.get_mods_info_dict_from_mod_name(mod_name)
+    if singular_mod_info["packing_type"] == "unreal_pak":
+        return get_unreal_pak_mod_release_files(singular_mod_info, base_files_directory)
+    if singular_mod_info["packing_type"] == "repak":
+        return get_repak_mod_release_files(singular_mod_info, base_files_directory)
+    if singular_mod_info["packing_type"] == "engine":
+        return get_engine_mod_release_files(singular_mod_info, base_files_directory)
+    if singular_mod_info["packing_type"] == "loose":
+        return get_loose_mod_release_files(singular_mod_info, base_files_directory)
+    return {}
+
+
+# what the release zip of a mod holds (path inside the zip -> source file), the base
+# files of the mod plus its built files, read in place instead of being copied over first
+def get_mod_release_members(mod_name: str, base_files_directory: str) -> dict[str, str]:
+    mod_release_dir = f"{base_files_directory}/{mod_name}"
+    members = release_builder.get_tree_members(mod_release_dir)
+    for before_file, after_file in get_mod_release_files(
+        mod_name, base_files_directory
+    ).items():
+        arcname = os.path.relpath(after_file, mod_release_dir).replace("\\", "/")
+        members[arcname] = before_file
+    return members
+
+
+def get_mod_release_zip_path(mod_name: str, output_directory: str) -> str:
+    return os.path.join(output_directory, f"{mod_name}.zip")
 
 
 def generate_mod_release(
     mod_name: str, base_files_directory: str, output_directory: str
 ):
-    singular_mod_info = next(
-        (
-            mod_info
-            for mod_info in settings.get_mods_info_list_from_json()
-            if mod_info["mod_name"] == mod_name
-        ),
-    )
-    if singular_mod_info["packing_type"] == "unreal_pak":
-        make_unreal_pak_mod_release(
-            singular_mod_info, base_files_directory, output_directory
-        )
-    elif singular_mod_info["packing_type"] == "repak":
-        make_repak_mod_release(
-            singular_mod_info, base_files_directory, output_directory
-        )
-    elif singular_mod_info["packing_type"] == "engine":
-        make_engine_mod_release(
-            singular_mod_info, base_files_directory, output_directory
-        )
-    elif singular_mod_info["packing_type"] == "loose":
-        make_loose_mod_release(
-            singular_mod_info, base_files_directory, output_directory
-        )
+    generate_mod_releases([mod_name], base_files_directory, output_directory)
 
 
 def generate_mod_releases(
     mod_names: list[str], base_files_directory: str, output_directory: str
 ):
-    for mod_name in mod_names:
-        generate_mod_release(mod_name, base_files_directory, output_directory)
+    release_builder.build_mod_releases(
+        [
+            release_builder.ModRelease(
+                mod_name=mod_name,
+                zip_path=get_mod_release_zip_path(mod_name, output_directory),
+                members=get_mod_release_members(mod_name, base_files_directory),
+            )
+            for mod_name in mod_names
+        ]
+    )
+    hash_cache.save_hash_cache()
 
 
 def generate_mod_releases_all(base_files_directory: str, output_directory: str):
-    for entry in settings.get_mods_info_list_from_json():
-        generate_mod_release(entry["mod_name"], base_files_directory, output_directory)
+    generate_mod_releases(
+        [entry["mod_name"] for entry in settings.get_mods_info_list_from_json()],
+        base_files_directory,
+        output_directory,
+    )
 
 
 def resync_dir_with_repo():
@@ -1124,34 +1113,30 @@ def remove_uplugins(uplugin_paths: list):
             shutil.rmtree(uplugin_dir)
 
 
-def generate_file_paths_json(dir_path, output_json):
-    all_file_paths = []
-
-    for root, _, files in os.walk(dir_path):
-        for file in files:
-            full_path = os.path.join(root, file)
-            all_file_paths.append(full_path)
+def generate_file_snapshot(dir_path, snapshot_path):
+    snapshot = game_file_snapshot.take_snapshot(
+        dir_path, with_digests=settings.get_should_snapshot_digests()
+    )
+    game_file_snapshot.save_snapshot(snapshot, snapshot_path)
+    logger.log_message(
+        f"Snapshot of {len(snapshot.names)} files created at: {snapshot_path}"
+    )
 
-    json_string = json.dumps(all_file_paths)
-    os.makedirs(os.path.dirname(output_json), exist_ok=True)
-    with open(output_json, "w", encoding="utf-8") as json_file:
-        json_file.write(json_string)
 
+# still writes a json array of every file path, cleanup reads either format
+def generate_file_paths_json(dir_path, output_json):
+    snapshot = game_file_snapshot.take_snapshot(dir_path)
+    game_file_snapshot.save_json_file_list(snapshot, dir_path, output_json)
     logger.log_message(f"JSON file with all file paths created at: {output_json}")
 
 
 def delete_unlisted_files(dir_path, json_file):
-    with open(json_file) as file:
-        allowed_files = set(json.load(file))
-
-    for root, _, files in os.walk(dir_path):
-        for file in files:
-            full_path = os.path.join(root, file)
-            if full_path not in allowed_files:
-                os.remove(full_path)
-                logger.log_message(f"Deleted: {full_path}")
-
-    logger.log_message("Cleanup complete. All unlisted files have been removed.")
+    is_dry_run = settings.get_is_dry_run_enabled()
+    game_file_snapshot.delete_unlisted_files(dir_path, json_file, is_dry_run=is_dry_run)
+    if is_dry_run:
+        logger.log_message("Dry run complete. No files were removed.")
+    else:
+        logger.log_message("Cleanup complete. All unlisted files have been removed.")
 
 
 def save_json_to_file(json_string, file_path):
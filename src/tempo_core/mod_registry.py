@@ -0,0 +1,150 @@
+import threading
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from tempo_core import settings
+from tempo_core.data_structures import PackingType
+
+
+@dataclass(slots=True, frozen=True)
+class ModInfo:
+    mod_name: str
+    # position in the settings mods_info list
+    index: int
+    # None when the settings entry holds an invalid packing type
+    packing_type: PackingType | None
+    is_enabled: bool
+    # the settings entry itself, for every other key
+    raw: dict
+
+
+@dataclass(slots=True)
+class ModRegistry:
+    mods_info_list: list
+    mod_entry_count: int
+    mods: dict[str, ModInfo]
+    # mods in settings order, grouped by packing type
+    enabled_mods_by_packing_type: dict[PackingType | None, list[ModInfo]]
+    disabled_mods_by_packing_type: dict[PackingType | None, list[ModInfo]]
+
+
+@dataclass
+class ModRegistryInformation:
+    mod_registry: ModRegistry | None
+    # (id, length) of the mod_names list the set was built from
+    selected_mod_names_key: tuple[int, int] | None
+    selected_mod_names: set[str]
+
+
+mod_registry_information = ModRegistryInformation(
+    mod_registry=None, selected_mod_names_key=None, selected_mod_names=set()
+)
+mod_registry_lock = threading.Lock()
+
+
+def get_packing_type(packing_type_str: str) -> PackingType | None:
+    for packing_type in PackingType:
+        if packing_type.value == packing_type_str:
+            return packing_type
+    return None
+
+
+def build_mod_registry(mods_info_list: list) -> ModRegistry:
+    mods = {}
+    enabled_mods_by_packing_type = {}
+    disabled_mods_by_packing_type = {}
+    for index, entry in enumerate(mods_info_list):
+        if entry["mod_name"] in mods:
+            # lookups always returned the first entry with a given name
+            continue
+        mod_info = ModInfo(
+            mod_name=entry["mod_name"],
+            index=index,
+            packing_type=get_packing_type(entry.get("packing_type")),
+            is_enabled=bool(entry.get("is_enabled")),
+            raw=entry,
+        )
+        mods[mod_info.mod_name] = mod_info
+        if mod_info.is_enabled:
+            grouping = enabled_mods_by_packing_type
+        else:
+            grouping = disabled_mods_by_packing_type
+        grouping.setdefault(mod_info.packing_type, []).append(mod_info)
+    return ModRegistry(
+        mods_info_list=mods_info_list,
+        mod_entry_count=len(mods_info_list),
+        mods=mods,
+        enabled_mods_by_packing_type=enabled_mods_by_packing_type,
+        disabled_mods_by_packing_type=disabled_mods_by_packing_type,
+    )
+
+
+# rebuilt whenever the settings mods_info list is replaced or grows/shrinks
+def get_mod_registry() -> ModRegistry:
+    mods_info_list = settings.get_mods_info_list_from_json()
+    mod_registry = mod_registry_information.mod_registry
+    if (
+        mod_registry is not None
+        and mod_registry.mods_info_list is mods_info_list
+        and mod_registry.mod_entry_count == len(mods_info_list)
+    ):
+        return mod_registry
+    with mod_registry_lock:
+        mod_registry = build_mod_registry(mods_info_list)
+        mod_registry_information.mod_registry = mod_registry
+    return mod_registry
+
+
+def get_mod_info(mod_name: str) -> ModInfo | None:
+    return get_mod_registry().mods.get(mod_name)
+
+
+def select_mods(mod_names: Iterable[str]):
+    selected_mod_names = get_selected_mod_names()
+    for mod_name in mod_names:
+        if mod_name not in selected_mod_names:
+            settings.settings_information.mod_names.append(mod_name)
+            selected_mod_names.add(mod_name)
+    mod_registry_information.selected_mod_names_key = (
+        id(settings.settings_information.mod_names),
+        len(settings.settings_information.mod_names),
+    )
+
+
+def select_all_mods():
+    select_mods(get_mod_registry().mods)
+
+
+def get_selected_mod_names() -> set[str]:
+    mod_names = settings.settings_information.mod_names
+    selected_mod_names_key = (id(mod_names), len(mod_names))
+    if mod_registry_information.selected_mod_names_key != selected_mod_names_key:
+        mod_registry_information.selected_mod_names = set(mod_names)
+        mod_registry_information.selected_mod_names_key = selected_mod_names_key
+    return mod_registry_information.selected_mod_names
+
+
+def is_mod_selected(mod_name: str) -> bool:
+    return mod_name in get_selected_mod_names()
+
+
+# selected mods in settings order, optionally limited to some packing types
+def get_selected_mods(
+    *, is_enabled: bool, packing_types: Iterable[PackingType | None] | None = None
+) -> list[ModInfo]:
+    mod_registry = get_mod_registry()
+    if is_enabled:
+        grouping = mod_registry.enabled_mods_by_packing_type
+    else:
+        grouping = mod_registry.disabled_mods_by_packing_type
+    if packing_types is None:
+        packing_types = list(grouping)
+    selected_mod_names = get_selected_mod_names()
+    selected_mods = [
+        mod_info
+        for packing_type in set(packing_types)
+        for mod_info in grouping.get(packing_type, ())
+        if mod_info.mod_name in selected_mod_names
+    ]
+    selected_mods.sort(key=lambda mod_info: mod_info.index)
+    return selected_mods
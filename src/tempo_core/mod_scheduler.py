@@ -0,0 +1,139 @@
+import os
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from rich.progress import Progress
+
+from tempo_core import logger, settings
+from tempo_core.console import console
+from tempo_core.data_structures import LogLevel
+
+
+@dataclass
+class ModSchedulerInformation:
+    packer_slots: threading.BoundedSemaphore | None
+    copy_slots: threading.BoundedSemaphore | None
+
+
+mod_scheduler_information = ModSchedulerInformation(packer_slots=None, copy_slots=None)
+thread_mod_scheduler_information = threading.local()
+
+
+# limits how many cpu heavy packer subprocesses (repak, UnrealPak, IoStore) run at once
+@contextmanager
+def packer_slot():
+    packer_slots = mod_scheduler_information.packer_slots
+    if packer_slots is None:
+        yield
+        return
+    with packer_slots:
+        yield
+
+
+# limits how many mods copy files at once, so disks are not thrashed
+@contextmanager
+def copy_slot():
+    copy_slots = mod_scheduler_information.copy_slots
+    if copy_slots is None:
+        yield
+        return
+    with copy_slots:
+        yield
+
+
+def is_in_mod_task() -> bool:
+    return getattr(thread_mod_scheduler_information, "mod_name", None) is not None
+
+
+def get_mod_logs_dir() -> str:
+    return f"{settings.get_working_dir()}/mod_logs"
+
+
+def write_mod_log(mod_name: str, messages: list[tuple[str, LogLevel | None]]):
+    mod_log_path = f"{get_mod_logs_dir()}/{mod_name}.log"
+    os.makedirs(os.path.dirname(mod_log_path), exist_ok=True)
+    with open(mod_log_path, "w", encoding="utf-8") as mod_log:
+        mod_log.writelines(f"{message}\n" for message, _ in messages)
+
+
+def run_mod_task(
+    mod_name: str, task: Callable[[], None]
+) -> tuple[list[tuple[str, LogLevel | None]], Exception | None]:
+    thread_mod_scheduler_information.mod_name = mod_name
+    task_exception = None
+    try:
+        with logger.capture_thread_messages() as captured_messages:
+            try:
+                task()
+            # any failure is kept and raised once every other mod task is done
+            except Exception as e:  # noqa: BLE001
+                captured_messages.append(
+                    (f"Error: {mod_name} mod failed: {e}", LogLevel.ERROR)
+                )
+                task_exception = e
+            write_mod_log(mod_name, captured_messages)
+    finally:
+        thread_mod_scheduler_information.mod_name = None
+    return captured_messages, task_exception
+
+
+def flush_mod_task(mod_name: str, future: Future, failures: dict[str, Exception]):
+    messages, task_exception = future.result()
+    if task_exception is not None:
+        failures[mod_name] = task_exception
+    logger.log_messages(
+        [
+            (f"Thread: Output for the {mod_name} mod", None),
+            *messages,
+            (f"Thread: End of output for the {mod_name} mod", None),
+        ]
+    )
+
+
+# runs one task per mod (mod name -> callable) concurrently, each task's log output is
+# kept together and also written to <working_dir>/mod_logs/<mod_name>.log
+def run_mod_tasks(mod_tasks: dict[str, Callable[[], None]]):
+    if not mod_tasks:
+        return
+    worker_count = min(settings.get_mod_install_worker_count(), len(mod_tasks))
+    mod_scheduler_information.packer_slots = threading.BoundedSemaphore(
+        settings.get_max_concurrent_packers()
+    )
+    mod_scheduler_information.copy_slots = threading.BoundedSemaphore(
+        settings.get_max_concurrent_file_copies()
+    )
+    logger.log_message(
+        f"Thread: Running {len(mod_tasks)} mod tasks on {worker_count} workers"
+    )
+    failures = {}
+    try:
+        with ThreadPoolExecutor(
+            max_workers=worker_count, thread_name_prefix="tempo_mod"
+        ) as executor:
+            futures = {
+                executor.submit(run_mod_task, mod_name, task): mod_name
+                for mod_name, task in mod_tasks.items()
+            }
+            if settings.should_show_progress_bars():
+                with Progress(console=console) as progress:
+                    progress_task = progress.add_task(
+                        "[green]Installing mods...", total=len(futures)
+                    )
+                    for future in as_completed(futures):
+                        flush_mod_task(futures[future], future, failures)
+                        progress.update(progress_task, advance=1)
+            else:
+                for future in as_completed(futures):
+                    flush_mod_task(futures[future], future, failures)
+    finally:
+        mod_scheduler_information.packer_slots = None
+        mod_scheduler_information.copy_slots = None
+
+    if failures:
+        failed_mods_error = (
+            f"The following mods failed to install: {', '.join(sorted(failures))}"
+        )
+        raise RuntimeError(failed_mods_error) from next(iter(failures.values()))
@@ -1,21 +1,31 @@
+import functools
 import os
-import shutil
+from collections.abc import Callable, Mapping
 from dataclasses import dataclass
-
-from rich.progress import Progress
+from types import MappingProxyType
 
 from tempo_core import (
     app_runner,
+    build_fingerprints,
+    cooked_asset_index,
     data_structures,
     file_io,
+    file_links,
+    game_install_profile,
+    hash_cache,
     hook_states,
+    install_manifest,
     logger,
+    mod_registry,
+    mod_scheduler,
+    project_context,
     settings,
     utilities,
 )
 from tempo_core.data_structures import (
     CompressionType,
     HookStateType,
+    LinkType,
     PackingType,
     get_enum_from_val,
 )
@@ -36,55 +46,42 @@ has_populated_queue = False
 
 
 def populate_queue():
-    for mod_info in settings.get_mods_info_list_from_json():
-        if (
-            mod_info["is_enabled"]
-            and mod_info["mod_name"] in settings.settings_information.mod_names
-        ):
-            install_queue_type = PackingType(
-                get_enum_from_val(PackingType, mod_info["packing_type"])
-            )
-            if install_queue_type not in queue_information.install_queue_types:
-                queue_information.install_queue_types.append(install_queue_type)
-        if (
-            not mod_info["is_enabled"]
-            and mod_info["mod_name"] in settings.settings_information.mod_names
-        ):
-            uninstall_queue_type = PackingType(
-                get_enum_from_val(PackingType, mod_info["packing_type"])
-            )
-            if uninstall_queue_type not in queue_information.uninstall_queue_types:
-                queue_information.uninstall_queue_types.append(uninstall_queue_type)
+    for mod_info in mod_registry.get_selected_mods(is_enabled=True):
+        install_queue_type = PackingType(
+            get_enum_from_val(PackingType, mod_info.raw["packing_type"])
+        )
+        if install_queue_type not in queue_information.install_queue_types:
+            queue_information.install_queue_types.append(install_queue_type)
+    for mod_info in mod_registry.get_selected_mods(is_enabled=False):
+        uninstall_queue_type = PackingType(
+            get_enum_from_val(PackingType, mod_info.raw["packing_type"])
+        )
+        if uninstall_queue_type not in queue_information.uninstall_queue_types:
+            queue_information.uninstall_queue_types.append(uninstall_queue_type)
 
 
 def get_mod_packing_type(mod_name: str) -> PackingType:
-    for mods_info in settings.get_mods_info_list_from_json():
-        if mod_name == mods_info["mod_name"]:
-            return PackingType(
-                get_enum_from_val(PackingType, mods_info["packing_type"])
-            )
+    mod_info = mod_registry.get_mod_info(mod_name)
+    if mod_info is not None:
+        return PackingType(get_enum_from_val(PackingType, mod_info.raw["packing_type"]))
     invalid_packing_type_error = "invalid packing type found in config file"
     raise RuntimeError(invalid_packing_type_error)
 
 
 def get_is_mod_name_in_use(mod_name: str) -> bool:
-    return any(
-        mod_name == mod_info["mod_name"]
-        for mod_info in settings.get_mods_info_list_from_json()
-    )
+    return mod_registry.get_mod_info(mod_name) is not None
 
 
-def get_mod_pak_entry(mod_name: str) -> dict:
-    for info in settings.get_mods_info_list_from_json():
-        if info["mod_name"] == mod_name:
-            return dict(info)
-    return {}
+# a read only view of the registry entry
+def get_mod_pak_entry(mod_name: str) -> Mapping:
+    mod_info = mod_registry.get_mod_info(mod_name)
+    if mod_info is not None:
+        return MappingProxyType(mod_info.raw)
+    return MappingProxyType({})
 
 
 def get_is_mod_installed(mod_name: str) -> bool:
-    return any(
-        info["mod_name"] == mod_name for info in settings.get_mods_info_list_from_json()
-    )
+    return mod_registry.get_mod_info(mod_name) is not None
 
 
 def get_engine_pak_command() -> str:
@@ -96,9 +93,7 @@ def get_engine_pak_command() -> str:
         command = f"{command} -build"
     for arg in settings.get_engine_packaging_args():
         command = f"{command} {arg}"
-    is_game_iostore = unreal_engine.get_is_game_iostore(
-        settings.get_uproject_file(), utilities.custom_get_game_dir()
-    )
+    is_game_iostore = game_install_profile.is_game_iostore()
     if is_game_iostore:
         command = f"{command} -iostore"
         logger.log_message("Check: Game is iostore")
@@ -119,55 +114,118 @@ def get_cook_project_command() -> str:
         command = f"{command} {build_arg}"
     for arg in settings.get_engine_cooking_args():
         command = f"{command} {arg}"
+    if settings.get_is_scoped_cook_enabled():
+        command = add_scoped_cook_args(command)
+    return command
+
+
+# "Content/Maps/MyMap" -> "/Game/Maps/MyMap", "Plugins/MyPlugin/Content/A" -> "/MyPlugin/A"
+def get_package_name(asset_path: str) -> str:
+    asset_path = cooked_asset_index.normalize_relative_path(asset_path)
+    if asset_path.startswith("Content/"):
+        return f"/Game/{asset_path.removeprefix('Content/')}"
+    path_parts = asset_path.split("/")
+    if "Content" in path_parts:
+        content_index = path_parts.index("Content")
+        if content_index > 0:
+            mount_name = path_parts[content_index - 1]
+            return f"/{mount_name}/{'/'.join(path_parts[content_index + 1 :])}"
+    return f"/Game/{asset_path}"
+
+
+# source dirs and maps the selected mods pull their files from, used to only cook those
+# packages (and whatever they depend on) instead of the whole uproject
+def get_scoped_cook_targets() -> tuple[list[str], list[str]]:
+    uproject_dir = utilities.get_uproject_dir()
+    cook_dirs = []
+    maps = []
+    for mod_info in mod_registry.get_selected_mods(is_enabled=True):
+        mod_name = mod_info.mod_name
+        file_includes = mod_info.raw.get("file_includes", {})
+        source_dirs = [
+            *(file_includes.get("tree_paths") or []),
+            f"Content/{utilities.get_unreal_mod_tree_type_str(mod_name)}/{utilities.get_mod_name_dir_name(mod_name)}",
+        ]
+        for asset in file_includes.get("asset_paths") or []:
+            if os.path.isfile(f"{uproject_dir}/{asset}.umap"):
+                maps.append(get_package_name(asset))
+            else:
+                # the cook commandlet has no per package filter through RunUAT, so
+                # single assets are cooked through their containing directory
+                source_dirs.append(os.path.dirname(asset))
+        for source_dir in source_dirs:
+            cook_dir = os.path.normpath(f"{uproject_dir}/{source_dir}")
+            if os.path.isdir(cook_dir) and cook_dir not in cook_dirs:
+                cook_dirs.append(cook_dir)
+    return cook_dirs, list(dict.fromkeys(maps))
+
+
+def add_scoped_cook_args(command: str) -> str:
+    cook_dirs, maps = get_scoped_cook_targets()
+    if not cook_dirs and not maps:
+        logger.log_message(
+            "Warning: Scoped cook found no content for the selected mods, cooking the whole uproject"
+        )
+        return command
+    logger.log_message(
+        f"Check: Scoped cook of {len(cook_dirs)} directories and {len(maps)} maps"
+    )
+    if cook_dirs:
+        # quoted like -project, so dirs with spaces stay one argument
+        quoted_cook_dirs = "+".join(f'"{cook_dir}"' for cook_dir in cook_dirs)
+        command = f"{command} -CookDir={quoted_cook_dirs}"
+    if maps:
+        command = f"{command} -map={'+'.join(maps)}"
     return command
 
 
-def cook_uproject():
-    run_proj_command(get_cook_project_command())
+def cook_uproject() -> int | None:
+    return run_proj_command(get_cook_project_command())
 
 
-def package_uproject_non_iostore():
-    run_proj_command(get_engine_pak_command())
+def package_uproject_non_iostore() -> int | None:
+    return run_proj_command(get_engine_pak_command())
 
 
-def run_proj_command(command: str):
+def run_proj_command(command: str) -> int | None:
     command_parts = command.split(" ")
     executable = command_parts[0]
     args = command_parts[1:]
-    app_runner.run_app(
+    return app_runner.run_app(
         exe_path=executable, args=args, working_dir=settings.get_unreal_engine_dir()
     )
 
 
 def handle_uninstall_logic(packing_type: PackingType):
-    for mod_info in settings.get_mods_info_list_from_json():
-        if (
-            not mod_info["is_enabled"]
-            and mod_info["mod_name"] in settings.settings_information.mod_names
-            and get_enum_from_val(PackingType, mod_info["packing_type"]) == packing_type
-        ):
-            uninstall_mod(packing_type, mod_info["mod_name"])
+    for mod_info in mod_registry.get_selected_mods(
+        is_enabled=False, packing_types=[packing_type]
+    ):
+        uninstall_mod(packing_type, mod_info.mod_name)
 
 
 @hook_states.hook_state_decorator(
     start_hook_state_type=HookStateType.PRE_PAK_DIR_SETUP,
     end_hook_state_type=HookStateType.POST_PAK_DIR_SETUP,
 )
-def handle_install_logic(packing_type: PackingType, *, use_symlinks: bool):
-    for mod_info in settings.get_mods_info_list_from_json():
-        if (
-            mod_info["is_enabled"]
-            and mod_info["mod_name"] in settings.settings_information.mod_names
-            and get_enum_from_val(PackingType, mod_info["packing_type"]) == packing_type
-        ):
-            install_mod(
-                packing_type=packing_type,
-                mod_name=mod_info["mod_name"],
-                compression_type=CompressionType(
-                    get_enum_from_val(CompressionType, mod_info["compression_type"])
-                ),
-                use_symlinks=use_symlinks,
-            )
+def handle_install_logic(packing_types: list[PackingType], *, use_symlinks: bool):
+    mod_tasks = {}
+    for mod_info in mod_registry.get_selected_mods(
+        is_enabled=True, packing_types=packing_types
+    ):
+        mod_tasks[mod_info.mod_name] = functools.partial(
+            install_mod,
+            packing_type=PackingType(mod_info.packing_type),
+            mod_name=mod_info.mod_name,
+            compression_type=CompressionType(
+                get_enum_from_val(CompressionType, mod_info.raw["compression_type"])
+            ),
+            use_symlinks=use_symlinks,
+        )
+    try:
+        mod_scheduler.run_mod_tasks(mod_tasks)
+    finally:
+        # unreal_pak IoStore mods may have been queued for one shared IoStore run
+        unreal_pak.run_iostore_batch()
 
 
 @hook_states.hook_state_decorator(
@@ -184,8 +242,9 @@ def mods_uninstall():
     end_hook_state_type=HookStateType.POST_MODS_INSTALL,
 )
 def mods_install(*, use_symlinks: bool):
-    for install_queue_type in queue_information.install_queue_types:
-        handle_install_logic(install_queue_type, use_symlinks=use_symlinks)
+    handle_install_logic(
+        queue_information.install_queue_types, use_symlinks=use_symlinks
+    )
 
 
 def generate_mods(*, use_symlinks: bool):
@@ -194,6 +253,7 @@ def generate_mods(*, use_symlinks: bool):
     mods_install(use_symlinks=use_symlinks)
     for command in command_queue:
         app_runner.run_app(command)
+    hash_cache.save_hash_cache()
 
 
 def uninstall_loose_mod(mod_name: str):
@@ -209,13 +269,12 @@ def uninstall_loose_mod(mod_name: str):
     for folder in {os.path.dirname(file) for file in mod_files.values()}:
         if os.path.exists(folder) and not os.listdir(folder):
             os.removedirs(folder)
+    install_manifest.delete_install_manifest(mod_name)
 
 
 def uninstall_pak_mod(mod_name: str):
-    extensions = unreal_engine.get_game_pak_folder_archives(
-        settings.get_uproject_file(), utilities.custom_get_game_dir()
-    )
-    if unreal_engine.is_game_ue5(settings.get_unreal_engine_dir()):
+    extensions = game_install_profile.get_game_pak_folder_archives()
+    if project_context.get_project_context().is_ue5:
         extensions.extend(["ucas", "utoc"])
     for extension in extensions:
         base_path = os.path.join(
@@ -261,10 +320,11 @@ def install_mod_sig(mod_name: str, *, use_symlinks: bool):
                 no_sigs_found = ""
                 raise RuntimeError(no_sigs_found)
             before_sig_file = os.path.normpath(f"{game_paks_dir}/{sig_files[0]}")
-            if use_symlinks:
-                os.symlink(before_sig_file, sig_location)
-            else:
-                shutil.copy(before_sig_file, sig_location)
+            file_links.place_file(
+                before_sig_file,
+                sig_location,
+                file_links.get_install_link_type(use_symlinks=use_symlinks),
+            )
         if sig_method_type == data_structures.SigMethodType.EMPTY:
             if use_symlinks:
                 other_sig_location = os.path.normpath(
@@ -273,8 +333,11 @@ def install_mod_sig(mod_name: str, *, use_symlinks: bool):
                 os.makedirs(os.path.dirname(other_sig_location), exist_ok=True)
                 with open(other_sig_location, "w"):
                     pass
-                os.symlink(other_sig_location, sig_location)
+                file_links.place_file(
+                    other_sig_location, sig_location, LinkType.SYMLINK
+                )
             else:
+                file_links.remove_destination(sig_location)
                 with open(sig_location, "w"):
                     pass
     else:
@@ -292,22 +355,11 @@ def install_mod_sig(mod_name: str, *, use_symlinks: bool):
 
 
 def install_loose_mod(mod_name: str, *, use_symlinks: bool):
-    mod_files = get_mod_paths_for_loose_mods(mod_name)
-    dict_keys = mod_files.keys()
-    for key in dict_keys:
-        before_file = key
-        after_file = mod_files[key]
-        os.makedirs(os.path.dirname(after_file), exist_ok=True)
-        if os.path.exists(before_file):
-            if os.path.islink(after_file):
-                os.unlink(after_file)
-            if os.path.isfile(after_file):
-                os.remove(after_file)
-        if os.path.isfile(before_file):
-            if use_symlinks:
-                os.symlink(before_file, after_file)
-            else:
-                shutil.copyfile(before_file, after_file)
+    install_manifest.sync_mod_files(
+        mod_name,
+        get_mod_paths_for_loose_mods(mod_name),
+        link_type=file_links.get_install_link_type(use_symlinks=use_symlinks),
+    )
 
 
 def install_engine_mod(mod_name: str, *, use_symlinks: bool):
@@ -317,14 +369,12 @@ def install_engine_mod(mod_name: str, *, use_symlinks: bool):
     ]
     uproject_file = settings.get_uproject_file()
     uproject_dir = unreal_engine.get_uproject_dir(uproject_file)
-    win_dir_str = unreal_engine.get_win_dir_str(settings.get_unreal_engine_dir())
+    win_dir_str = project_context.get_project_context().win_dir_str
     uproject_name = unreal_engine.get_uproject_name(uproject_file)
     prefix = f"{uproject_dir}/Saved/StagedBuilds/{win_dir_str}/{uproject_name}/Content/Paks/pakchunk{pak_chunk_num}-{win_dir_str}."
     mod_files.append(prefix)
     for file in mod_files:
-        for suffix in unreal_engine.get_game_pak_folder_archives(
-            uproject_file, utilities.custom_get_game_dir()
-        ):
+        for suffix in game_install_profile.get_game_pak_folder_archives():
             dir_engine_mod = f"{utilities.custom_get_game_dir()}/Content/Paks/{utilities.get_pak_dir_structure(mod_name)}"
             os.makedirs(dir_engine_mod, exist_ok=True)
             before_file = f"{file}{suffix}"
@@ -333,21 +383,18 @@ def install_engine_mod(mod_name: str, *, use_symlinks: bool):
                 logger.log_message(error_message)
                 raise FileNotFoundError(error_message)
             after_file = f"{dir_engine_mod}/{mod_name}.{suffix}"
-            if os.path.islink(after_file):
-                os.unlink(after_file)
-            if os.path.isfile(after_file):
-                os.remove(after_file)
             install_mod_sig(mod_name, use_symlinks=use_symlinks)
-            if use_symlinks:
-                os.symlink(before_file, after_file)
-            else:
-                shutil.copyfile(before_file, after_file)
+            with mod_scheduler.copy_slot():
+                file_links.place_file(
+                    before_file,
+                    after_file,
+                    file_links.get_install_link_type(use_symlinks=use_symlinks),
+                )
 
 
 def make_pak_repak(*, mod_name: str, use_symlinks: bool):
     pak_dir = f"{utilities.custom_get_game_paks_dir()}/{utilities.get_pak_dir_structure(mod_name)}"
     os.makedirs(pak_dir, exist_ok=True)
-    os.chdir(pak_dir)
 
     compression_type_str = utilities.get_mods_info_dict_from_mod_name(mod_name)[
         "compression_type"
@@ -372,49 +419,77 @@ def make_pak_repak(*, mod_name: str, use_symlinks: bool):
     command = f'"{repak.get_repak_package_path()}" pack "{before_symlinked_dir}" "{intermediate_pak_file}"'
     if compression_type_str != "None":
         command = f"{command} --compression {compression_type_str} --version {repak.get_repak_pak_version_str()}"
-    if os.path.islink(final_pak_location):
-        os.unlink(final_pak_location)
-    if os.path.isfile(final_pak_location):
-        os.remove(final_pak_location)
-    app_runner.run_app(command)
+    fingerprint = build_fingerprints.get_fingerprint(
+        {
+            "packer": "repak",
+            "inputs": build_fingerprints.get_files_digest(
+                build_fingerprints.get_tree_files(before_symlinked_dir)
+            ),
+            "compression_type": compression_type_str,
+            "pak_version": repak.get_repak_pak_version_str(),
+            "packer_identity": build_fingerprints.get_file_identity(
+                repak.get_repak_package_path()
+            ),
+        }
+    )
+    run_packer_if_inputs_changed(mod_name, command, intermediate_pak_file, fingerprint)
     install_mod_sig(mod_name, use_symlinks=use_symlinks)
-    if use_symlinks:
-        os.symlink(intermediate_pak_file, final_pak_location)
-    else:
-        shutil.copyfile(intermediate_pak_file, final_pak_location)
+    install_built_pak(
+        intermediate_pak_file,
+        final_pak_location,
+        file_links.get_install_link_type(use_symlinks=use_symlinks),
+    )
+
+
+# runs the packer unless the fingerprint of its inputs matches the one the
+# existing intermediate pak was built from
+def run_packer_if_inputs_changed(
+    mod_name: str, command: str, intermediate_pak_file: str, fingerprint: str
+):
+    fingerprint_path = build_fingerprints.get_pak_fingerprint_path(mod_name)
+    if os.path.isfile(intermediate_pak_file) and (
+        build_fingerprints.load_fingerprint(fingerprint_path) == fingerprint
+    ):
+        logger.log_message(
+            f"Check: {mod_name} mod inputs are unchanged, reusing {intermediate_pak_file}"
+        )
+        return
+    build_fingerprints.delete_fingerprint(fingerprint_path)
+    if os.path.isfile(intermediate_pak_file):
+        os.remove(intermediate_pak_file)
+    with mod_scheduler.packer_slot():
+        return_code = app_runner.run_app(command)
+    if return_code == 0 and os.path.isfile(intermediate_pak_file):
+        build_fingerprints.save_fingerprint(fingerprint_path, fingerprint)
+
+
+def install_built_pak(
+    intermediate_pak_file: str, final_pak_location: str, link_type: LinkType
+):
+    if file_links.is_file_placed(intermediate_pak_file, final_pak_location, link_type):
+        return
+    if (
+        link_type != LinkType.SYMLINK
+        and os.path.isfile(final_pak_location)
+        and not os.path.islink(final_pak_location)
+        and hash_cache.get_do_files_have_same_hash(
+            intermediate_pak_file, final_pak_location
+        )
+    ):
+        return
+    with mod_scheduler.copy_slot():
+        file_links.place_file(intermediate_pak_file, final_pak_location, link_type)
 
 
 def install_repak_mod(mod_name: str, *, use_symlinks: bool):
-    should_use_progress_bars = settings.should_show_progress_bars()
     mod_files_dict = get_mod_file_paths_for_manually_made_pak_mods(mod_name)
     mod_files_dict = utilities.filter_file_paths(mod_files_dict)
-
-    def copy_files():
-        for before_file, after_file in mod_files_dict.items():
-            dest_dir = os.path.dirname(after_file)
-            if os.path.exists(after_file):
-                os.remove(after_file)
-            if not os.path.isdir(dest_dir):
-                os.makedirs(dest_dir)
-            if os.path.isfile(before_file):
-                shutil.copy2(before_file, after_file)
-
-    if should_use_progress_bars:
-        with Progress() as progress:
-            task = progress.add_task(
-                f"[green]Copying files for {mod_name} mod...", total=len(mod_files_dict)
-            )
-            for before_file, after_file in mod_files_dict.items():
-                dest_dir = os.path.dirname(after_file)
-                if os.path.exists(after_file):
-                    os.remove(after_file)
-                if not os.path.isdir(dest_dir):
-                    os.makedirs(dest_dir)
-                if os.path.isfile(before_file):
-                    shutil.copy2(before_file, after_file)
-                progress.update(task, advance=1)
-    else:
-        copy_files()
+    install_manifest.sync_mod_files(
+        mod_name,
+        mod_files_dict,
+        link_type=file_links.get_staging_link_type(),
+        progress_description=f"[green]Staging files for {mod_name} mod...",
+    )
 
     make_pak_repak(mod_name=mod_name, use_symlinks=use_symlinks)
 
@@ -452,19 +527,35 @@ def install_mod(
         raise RuntimeError(invalid_packing_type_error)
 
 
-def package_project_iostore():
-    if unreal_engine.is_game_ue4(settings.get_unreal_engine_dir()):
-        package_project_iostore_ue4()
-    else:
-        package_project_iostore_ue5()
+def package_project_iostore() -> int | None:
+    if project_context.get_project_context().is_ue4:
+        return package_project_iostore_ue4()
+    return package_project_iostore_ue5()
+
+
+# the executable and args the iostore packaging runs
+def get_package_project_iostore_command() -> tuple[str, list[str]]:
+    if project_context.get_project_context().is_ue4:
+        return get_package_project_iostore_ue4_command()
+    return get_package_project_iostore_ue5_command()
+
+
+def run_package_project_iostore_command(main_exec: str, args: list[str]) -> int | None:
+    return app_runner.run_app(
+        exe_path=main_exec, args=args, working_dir=settings.get_unreal_engine_dir()
+    )
+
+
+def package_project_iostore_ue4() -> int | None:
+    return run_package_project_iostore_command(
+        *get_package_project_iostore_ue4_command()
+    )
 
 
-def package_project_iostore_ue4():
+def get_package_project_iostore_ue4_command() -> tuple[str, list[str]]:
     main_exec = f'"{settings.get_unreal_engine_dir()}/Engine/Build/BatchFiles/RunUAT.{file_io.get_platform_wrapper_extension()}"'
     uproject_path = settings.get_uproject_file()
-    editor_cmd_exe_path = unreal_engine.get_editor_cmd_path(
-        settings.get_unreal_engine_dir()
-    )
+    editor_cmd_exe_path = project_context.get_project_context().editor_cmd_path
     archive_directory = f"{settings.get_working_dir()}/iostore_packaging/output"
     target_platform = "Win64"
     client_config = "Development"
@@ -492,17 +583,19 @@ def package_project_iostore_ue4():
         f'-clientconfig="{client_config}"',
         "-utf8output",
     ]
-    app_runner.run_app(
-        exe_path=main_exec, args=args, working_dir=settings.get_unreal_engine_dir()
+    return main_exec, args
+
+
+def package_project_iostore_ue5() -> int | None:
+    return run_package_project_iostore_command(
+        *get_package_project_iostore_ue5_command()
     )
 
 
-def package_project_iostore_ue5():
+def get_package_project_iostore_ue5_command() -> tuple[str, list[str]]:
     main_exec = f'"{settings.get_unreal_engine_dir()}/Engine/Build/BatchFiles/RunUAT.{file_io.get_platform_wrapper_extension()}"'
     uproject_path = settings.get_uproject_file()
-    editor_cmd_exe_path = unreal_engine.get_editor_cmd_path(
-        settings.get_unreal_engine_dir()
-    )
+    editor_cmd_exe_path = project_context.get_project_context().editor_cmd_path
     archive_directory = f"{settings.get_working_dir()}/iostore_packaging/output"
     target_platform = "Win64"
     client_config = "Development"
@@ -530,9 +623,7 @@ def package_project_iostore_ue5():
         f'-clientconfig="{client_config}"',
         "-utf8output",
     ]
-    app_runner.run_app(
-        exe_path=main_exec, args=args, working_dir=settings.get_unreal_engine_dir()
-    )
+    return main_exec, args
 
 
 # for if you are just repacking an ini for an iostore game and don't need a ucas or utoc for example
@@ -549,52 +640,154 @@ def does_iostore_game_need_utoc_ucas() -> bool:
 )
 def cooking():
     populate_queue()
-    if unreal_engine.get_is_game_iostore(
-        settings.get_uproject_file(), utilities.custom_get_game_dir()
-    ):
+    cook_command, cook_step = get_cook_step()
+    cook_fingerprint = get_cook_fingerprint(cook_command)
+    cook_fingerprint_path = build_fingerprints.get_cook_fingerprint_path()
+    if settings.get_is_force_cook_enabled():
+        logger.log_message("Check: --force_cook was passed, cooking")
+    elif is_cooked_output_up_to_date(cook_fingerprint_path, cook_fingerprint):
+        logger.log_message(
+            "Check: Cook inputs are unchanged and the cooked output is intact, skipping the cook"
+        )
+        return
+    build_fingerprints.delete_fingerprint(cook_fingerprint_path)
+    return_code = cook_step()
+    cooked_asset_index.clear_cooked_asset_index()
+    if return_code == 0:
+        build_fingerprints.save_fingerprint(
+            cook_fingerprint_path,
+            cook_fingerprint,
+            {
+                "cooked_file_count": cooked_asset_index.get_cooked_asset_index().file_count,
+                "staged_output_stats": get_cook_staged_output_stats(),
+            },
+        )
+
+
+# the command line cooking would run, and the function that runs it
+def get_cook_step() -> tuple[str, Callable[[], int | None]]:
+    if game_install_profile.is_game_iostore():
         if does_iostore_game_need_utoc_ucas():
-            package_project_iostore()
-        else:
-            cook_uproject()
+            main_exec, args = get_package_project_iostore_command()
+            cook_command = " ".join([main_exec, *args])
+            return cook_command, functools.partial(
+                run_package_project_iostore_command, main_exec, args
+            )
+        cook_command = get_cook_project_command()
     elif PackingType.ENGINE in queue_information.install_queue_types:
-        package_uproject_non_iostore()
+        cook_command = get_engine_pak_command()
     else:
-        cook_uproject()
+        cook_command = get_cook_project_command()
+    return cook_command, functools.partial(run_proj_command, cook_command)
+
+
+def get_cook_fingerprint(cook_command: str) -> str:
+    uproject_dir = utilities.get_uproject_dir()
+    uproject_file = settings.get_uproject_file()
+    if settings.get_should_hash_cook_inputs():
+        get_digest = build_fingerprints.get_files_digest
+    else:
+        get_digest = build_fingerprints.get_files_stat_digest
+    excluded_dir_names = frozenset({"Intermediate", "Saved", ".git"})
+    return build_fingerprints.get_fingerprint(
+        {
+            "uproject": [
+                uproject_file,
+                get_digest({os.path.basename(uproject_file): uproject_file}),
+            ],
+            "inputs": {
+                tree_name: get_digest(
+                    build_fingerprints.get_tree_files(
+                        f"{uproject_dir}/{tree_name}", excluded_dir_names
+                    )
+                )
+                for tree_name in ("Content", "Config", "Plugins", "Binaries")
+            },
+            "engine_version": settings.custom_get_unreal_engine_version(
+                settings.get_unreal_engine_dir()
+            ),
+            "command": cook_command,
+        }
+    )
+
+
+# outputs besides the cooked dir the mods are packed from, the iostore packaging
+# stages the global container every iostore mod is built against
+def get_cook_staged_output_paths() -> list[str]:
+    if not (
+        game_install_profile.is_game_iostore() and does_iostore_game_need_utoc_ucas()
+    ):
+        return []
+    uproject_dir = utilities.get_uproject_dir()
+    win_dir_str = project_context.get_project_context().win_dir_str
+    uproject_name = project_context.get_project_context().uproject_name
+    paks_dir = (
+        f"{uproject_dir}/Saved/StagedBuilds/{win_dir_str}/{uproject_name}/Content/Paks"
+    )
+    return [f"{paks_dir}/global.utoc", f"{paks_dir}/global.ucas"]
+
+
+# path -> [size, mtime_ns], None for a missing file
+def get_cook_staged_output_stats() -> dict[str, list[int] | None]:
+    staged_output_stats = {}
+    for staged_output_path in get_cook_staged_output_paths():
+        try:
+            staged_output_stat = os.stat(staged_output_path)
+        except OSError:
+            staged_output_stats[staged_output_path] = None
+            continue
+        staged_output_stats[staged_output_path] = [
+            staged_output_stat.st_size,
+            staged_output_stat.st_mtime_ns,
+        ]
+    return staged_output_stats
+
+
+def is_cooked_output_up_to_date(
+    cook_fingerprint_path: str, cook_fingerprint: str
+) -> bool:
+    fingerprint_data = build_fingerprints.load_fingerprint_data(cook_fingerprint_path)
+    if fingerprint_data is None or fingerprint_data["fingerprint"] != cook_fingerprint:
+        return False
+    cooked_file_count = cooked_asset_index.get_cooked_asset_index().file_count
+    if cooked_file_count == 0 or cooked_file_count != fingerprint_data.get(
+        "cooked_file_count"
+    ):
+        logger.log_message("Check: Cooked output does not match the last cook")
+        return False
+    staged_output_stats = get_cook_staged_output_stats()
+    if None in staged_output_stats.values() or staged_output_stats != (
+        fingerprint_data.get("staged_output_stats", {})
+    ):
+        logger.log_message("Check: Staged IoStore output does not match the last cook")
+        return False
+    return True
 
 
 def get_mod_files_asset_paths_for_loose_mods(mod_name: str) -> dict:
     file_dict = {}
-    cooked_uproject_dir = unreal_engine.get_cooked_uproject_dir(
-        settings.get_uproject_file(), settings.get_unreal_engine_dir()
-    )
+    cooked_uproject_dir = cooked_asset_index.get_cooked_asset_index().cooked_dir
+    game_dir = utilities.custom_get_game_dir()
     mod_info = get_mod_pak_entry(mod_name)
     for asset in mod_info["file_includes"]["asset_paths"]:
         base_path = f"{cooked_uproject_dir}/{asset}"
-        for extension in file_io.get_file_extensions(base_path):
+        for extension in cooked_asset_index.get_asset_extensions(asset):
             before_path = f"{base_path}{extension}"
-            after_path = f"{utilities.custom_get_game_dir()}/{asset}{extension}"
+            after_path = f"{game_dir}/{asset}{extension}"
             file_dict[before_path] = after_path
     return file_dict
 
 
 def get_mod_files_tree_paths_for_loose_mods(mod_name: str) -> dict:
     file_dict = {}
-    cooked_uproject_dir = unreal_engine.get_cooked_uproject_dir(
-        settings.get_uproject_file(), settings.get_unreal_engine_dir()
-    )
+    cooked_uproject_dir = cooked_asset_index.get_cooked_asset_index().cooked_dir
+    game_dir = utilities.custom_get_game_dir()
     mod_info = get_mod_pak_entry(mod_name)
     for tree in mod_info["file_includes"]["tree_paths"]:
-        tree_path = f"{cooked_uproject_dir}/{tree}"
-        for entry in file_io.get_files_in_tree(tree_path):
-            if os.path.isfile(entry):
-                base_entry = os.path.splitext(entry)[0]
-                for extension in file_io.get_file_extensions_two(entry):
-                    before_path = f"{base_entry}{extension}"
-                    relative_path = os.path.relpath(base_entry, cooked_uproject_dir)
-                    after_path = (
-                        f"{utilities.custom_get_game_dir()}/{relative_path}{extension}"
-                    )
-                    file_dict[before_path] = after_path
+        for relative_path in cooked_asset_index.get_tree_file_paths(tree):
+            before_path = f"{cooked_uproject_dir}/{relative_path}"
+            after_path = f"{game_dir}/{relative_path}"
+            file_dict[before_path] = after_path
     return file_dict
 
 
@@ -614,12 +807,12 @@ def get_mod_files_persistent_paths_for_loose_mods(mod_name: str) -> dict:
 
 def get_mod_files_mod_name_dir_paths_for_loose_mods(mod_name: str) -> dict:
     file_dict = {}
-    cooked_game_name_mod_dir = f"{unreal_engine.get_cooked_uproject_dir(settings.get_uproject_file(), settings.get_unreal_engine_dir())}/Content/{utilities.get_unreal_mod_tree_type_str(mod_name)}/{utilities.get_mod_name_dir_name(mod_name)}"
-    for file in file_io.get_files_in_tree(cooked_game_name_mod_dir):
-        relative_file_path = os.path.relpath(file, cooked_game_name_mod_dir)
-        before_path = f"{cooked_game_name_mod_dir}/{relative_file_path}"
-        after_base = utilities.custom_get_game_dir()
-        after_path = f"{after_base}/Content/{utilities.get_unreal_mod_tree_type_str(mod_name)}/{utilities.get_mod_name_dir_name(mod_name)}/{relative_file_path}"
+    cooked_uproject_dir = cooked_asset_index.get_cooked_asset_index().cooked_dir
+    mod_name_dir = f"Content/{utilities.get_unreal_mod_tree_type_str(mod_name)}/{utilities.get_mod_name_dir_name(mod_name)}"
+    after_base = utilities.custom_get_game_dir()
+    for relative_path in cooked_asset_index.get_tree_file_paths(mod_name_dir):
+        before_path = f"{cooked_uproject_dir}/{relative_path}"
+        after_path = f"{after_base}/{relative_path}"
         file_dict[before_path] = after_path
     return file_dict
 
@@ -644,37 +837,34 @@ def get_game_mod_file_paths(mod_name: str) -> list:
 
 def get_mod_file_paths_for_manually_made_pak_mods_asset_paths(mod_name: str) -> dict:
     file_dict = {}
-    cooked_uproject_dir = unreal_engine.get_cooked_uproject_dir(
-        settings.get_uproject_file(), settings.get_unreal_engine_dir()
-    )
+    cooked_uproject_dir = cooked_asset_index.get_cooked_asset_index().cooked_dir
+    uproject_name = project_context.get_project_context().uproject_name
+    working_dir = settings.get_working_dir()
     mod_info = get_mod_pak_entry(mod_name)
     if mod_info["file_includes"]["asset_paths"] is not None:
         for asset in mod_info["file_includes"]["asset_paths"]:
             base_path = f"{cooked_uproject_dir}/{asset}"
-            for extension in file_io.get_file_extensions(base_path):
+            for extension in cooked_asset_index.get_asset_extensions(asset):
                 before_path = f"{base_path}{extension}"
-                after_path = f"{settings.get_working_dir()}/{mod_name}/{unreal_engine.get_uproject_name(settings.get_uproject_file())}/{asset}{extension}"
+                after_path = (
+                    f"{working_dir}/{mod_name}/{uproject_name}/{asset}{extension}"
+                )
                 file_dict[before_path] = after_path
     return file_dict
 
 
 def get_mod_file_paths_for_manually_made_pak_mods_tree_paths(mod_name: str) -> dict:
     file_dict = {}
-    cooked_uproject_dir = unreal_engine.get_cooked_uproject_dir(
-        settings.get_uproject_file(), settings.get_unreal_engine_dir()
-    )
+    cooked_uproject_dir = cooked_asset_index.get_cooked_asset_index().cooked_dir
+    uproject_name = project_context.get_project_context().uproject_name
+    working_dir = settings.get_working_dir()
     mod_info = get_mod_pak_entry(mod_name)
     if mod_info["file_includes"]["tree_paths"] is not None:
         for tree in mod_info["file_includes"]["tree_paths"]:
-            tree_path = f"{cooked_uproject_dir}/{tree}"
-            for entry in file_io.get_files_in_tree(tree_path):
-                if os.path.isfile(entry):
-                    base_entry = os.path.splitext(entry)[0]
-                    for extension in file_io.get_file_extensions(base_entry):
-                        before_path = f"{base_entry}{extension}"
-                        relative_path = os.path.relpath(base_entry, cooked_uproject_dir)
-                        after_path = f"{settings.get_working_dir()}/{mod_name}/{unreal_engine.get_uproject_name(settings.get_uproject_file())}/{relative_path}{extension}"
-                        file_dict[before_path] = after_path
+            for relative_path in cooked_asset_index.get_tree_file_paths(tree):
+                before_path = f"{cooked_uproject_dir}/{relative_path}"
+                after_path = f"{working_dir}/{mod_name}/{uproject_name}/{relative_path}"
+                file_dict[before_path] = after_path
     return file_dict
 
 
@@ -699,15 +889,16 @@ def get_mod_file_paths_for_manually_made_pak_mods_mod_name_dir_paths(
     mod_name: str,
 ) -> dict:
     file_dict = {}
-    cooked_game_name_mod_dir = f"{unreal_engine.get_cooked_uproject_dir(settings.get_uproject_file(), settings.get_unreal_engine_dir())}/Content/{utilities.get_unreal_mod_tree_type_str(mod_name)}/{utilities.get_mod_name_dir_name(mod_name)}"
-    for file in file_io.get_files_in_tree(cooked_game_name_mod_dir):
-        relative_file_path = os.path.relpath(file, cooked_game_name_mod_dir)
-        before_path = f"{cooked_game_name_mod_dir}/{relative_file_path}"
-        if settings.get_is_using_alt_dir_name():
-            dir_name = settings.get_alt_packing_dir_name()
-        else:
-            dir_name = unreal_engine.get_uproject_name(settings.get_uproject_file())
-        after_path = f"{settings.get_working_dir()}/{mod_name}/{dir_name}/Content/{utilities.get_unreal_mod_tree_type_str(mod_name)}/{utilities.get_mod_name_dir_name(mod_name)}/{relative_file_path}"
+    cooked_uproject_dir = cooked_asset_index.get_cooked_asset_index().cooked_dir
+    mod_name_dir = f"Content/{utilities.get_unreal_mod_tree_type_str(mod_name)}/{utilities.get_mod_name_dir_name(mod_name)}"
+    if settings.get_is_using_alt_dir_name():
+        dir_name = settings.get_alt_packing_dir_name()
+    else:
+        dir_name = project_context.get_project_context().uproject_name
+    working_dir = settings.get_working_dir()
+    for relative_path in cooked_asset_index.get_tree_file_paths(mod_name_dir):
+        before_path = f"{cooked_uproject_dir}/{relative_path}"
+        after_path = f"{working_dir}/{mod_name}/{dir_name}/{relative_path}"
         file_dict[before_path] = after_path
     return file_dict
 
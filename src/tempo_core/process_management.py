@@ -4,7 +4,7 @@ import subprocess
 
 import psutil
 
-from tempo_core import settings
+from tempo_core import process_snapshot, settings
 from tempo_core.data_structures import HookStateType
 from tempo_core.programs import unreal_engine
 
@@ -14,13 +14,7 @@ def get_process_name(exe_path: str) -> str:
 
 
 def is_process_running(process_name: str) -> bool:
-    for proc in psutil.process_iter():
-        try:
-            if process_name.lower() in proc.name().lower():
-                return True
-        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-            pass
-    return False
+    return process_snapshot.is_process_running(process_name)
 
 
 def kill_process(process_name: str):
@@ -31,14 +25,30 @@ def kill_process(process_name: str):
     else:
         taskkill_exe_not_found_error = "taskkill.exe not found."
         raise FileNotFoundError(taskkill_exe_not_found_error)
+    process_snapshot.invalidate_process_snapshot()
+
+
+# kills a process and everything it started, like the editor a RunUAT script launched,
+# the process itself is left for its owner to wait on, so its return code is kept
+def kill_process_tree(pid: int):
+    try:
+        proc = psutil.Process(pid)
+        child_procs = proc.children(recursive=True)
+    except psutil.NoSuchProcess:
+        return
+    for kill_proc in [*child_procs, proc]:
+        try:
+            kill_proc.kill()
+        except psutil.NoSuchProcess:
+            pass
+    psutil.wait_procs(child_procs, timeout=5)
+    process_snapshot.invalidate_process_snapshot()
 
 
 def get_processes_by_substring(substring: str) -> list:
-    all_processes = psutil.process_iter(["pid", "name"])
     return [
-        proc.info  # type: ignore
-        for proc in all_processes
-        if substring.lower() in proc.info["name"].lower()  # type: ignore
+        {"pid": process_entry.pid, "name": process_entry.name}
+        for process_entry in process_snapshot.get_processes_by_substring(substring)
     ]
 
 
@@ -46,19 +56,23 @@ def get_process_kill_events() -> list:
     return settings.settings_information.settings["process_kill_events"]["processes"]
 
 
+def kill_process_event(process_info: dict):
+    if process_info["use_substring_check"]:
+        proc_name_substring = process_info["process_name"]
+        for proc_info in get_processes_by_substring(proc_name_substring):
+            proc_name = proc_info["name"]
+            kill_process(proc_name)
+    else:
+        proc_name = process_info["process_name"]
+        kill_process(proc_name)
+
+
 def kill_processes(state: HookStateType):
     current_state = state.value if isinstance(state, HookStateType) else state
     for process_info in get_process_kill_events():
         target_state = process_info.get("hook_state")
         if target_state == current_state:
-            if process_info["use_substring_check"]:
-                proc_name_substring = process_info["process_name"]
-                for proc_info in get_processes_by_substring(proc_name_substring):
-                    proc_name = proc_info["name"]
-                    kill_process(proc_name)
-            else:
-                proc_name = process_info["process_name"]
-                kill_process(proc_name)
+            kill_process_event(process_info)
 
 
 def get_game_process_name():
@@ -70,17 +84,21 @@ def close_programs(exe_names: list[str]):
 
     for exe_name in exe_names:
         found = False
-        for proc in psutil.process_iter(["pid", "name"]):
+        for process_entry in process_snapshot.get_processes_by_name(exe_name):
             try:
-                if proc.info["name"] and proc.info["name"].lower() == exe_name.lower():  # type: ignore
-                    proc.terminate()
-                    proc.wait(timeout=5)
-                    found = True
-                    results[exe_name] = "Closed"
-                    break
+                proc = psutil.Process(process_entry.pid)
+                # the pid may belong to a newer process by now
+                if proc.create_time() != process_entry.create_time:
+                    continue
+                proc.terminate()
+                proc.wait(timeout=5)
+                found = True
+                results[exe_name] = "Closed"
+                break
             except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.TimeoutExpired):
                 pass
         if not found:
             results[exe_name] = "Not Found"
 
+    process_snapshot.invalidate_process_snapshot()
     return results
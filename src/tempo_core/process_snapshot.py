@@ -0,0 +1,166 @@
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import psutil
+
+from tempo_core import settings
+from tempo_core.data_structures import ProcessEventType
+
+
+@dataclass(slots=True, frozen=True)
+class ProcessEntry:
+    pid: int
+    name: str
+    # tells a process apart from a later one that reused its pid
+    create_time: float
+
+
+@dataclass(slots=True)
+class ProcessSnapshot:
+    taken_at: float
+    processes: dict[tuple[int, float], ProcessEntry]
+    # lowercase process name -> every process with that name
+    processes_by_name: dict[str, list[ProcessEntry]]
+    # lowercase substring -> lowercase names containing it, filled as it is queried
+    names_by_substring: dict[str, list[str]]
+
+
+@dataclass
+class ProcessSnapshotInformation:
+    process_snapshot: ProcessSnapshot | None
+    listeners: list[Callable[[ProcessEventType, ProcessEntry], None]]
+
+
+process_snapshot_information = ProcessSnapshotInformation(
+    process_snapshot=None, listeners=[]
+)
+process_snapshot_lock = threading.Lock()
+
+
+def take_process_snapshot() -> ProcessSnapshot:
+    processes = {}
+    processes_by_name = {}
+    for proc in psutil.process_iter(["pid", "name", "create_time"]):
+        process_entry = ProcessEntry(
+            pid=proc.info["pid"],  # type: ignore
+            name=proc.info["name"] or "",  # type: ignore
+            create_time=proc.info["create_time"] or 0.0,  # type: ignore
+        )
+        processes[(process_entry.pid, process_entry.create_time)] = process_entry
+        processes_by_name.setdefault(process_entry.name.lower(), []).append(
+            process_entry
+        )
+    return ProcessSnapshot(
+        taken_at=time.monotonic(),
+        processes=processes,
+        processes_by_name=processes_by_name,
+        names_by_substring={},
+    )
+
+
+def get_process_events(
+    previous_snapshot: ProcessSnapshot | None, process_snapshot: ProcessSnapshot
+) -> list[tuple[ProcessEventType, ProcessEntry]]:
+    # the first snapshot has nothing to compare against
+    if previous_snapshot is None:
+        return []
+    process_events = [
+        (ProcessEventType.EXITED, process_entry)
+        for process_key, process_entry in previous_snapshot.processes.items()
+        if process_key not in process_snapshot.processes
+    ]
+    process_events.extend(
+        (ProcessEventType.APPEARED, process_entry)
+        for process_key, process_entry in process_snapshot.processes.items()
+        if process_key not in previous_snapshot.processes
+    )
+    return process_events
+
+
+def is_process_snapshot_fresh(process_snapshot: ProcessSnapshot | None) -> bool:
+    return (
+        process_snapshot is not None
+        and time.monotonic() - process_snapshot.taken_at
+        < settings.get_process_snapshot_ttl()
+    )
+
+
+# scans the processes and tells the listeners what changed since the last scan, with
+# only_if_stale a snapshot another thread just took is reused instead
+def refresh_process_snapshot(*, only_if_stale: bool = False) -> ProcessSnapshot:
+    with process_snapshot_lock:
+        previous_snapshot = process_snapshot_information.process_snapshot
+        if only_if_stale and is_process_snapshot_fresh(previous_snapshot):
+            return previous_snapshot  # type: ignore
+        process_snapshot = take_process_snapshot()
+        process_snapshot_information.process_snapshot = process_snapshot
+        listeners = list(process_snapshot_information.listeners)
+    if listeners:
+        for process_event_type, process_entry in get_process_events(
+            previous_snapshot, process_snapshot
+        ):
+            for listener in listeners:
+                listener(process_event_type, process_entry)
+    return process_snapshot
+
+
+# every caller within general_info.process_snapshot_ttl seconds shares one process scan
+def get_process_snapshot() -> ProcessSnapshot:
+    process_snapshot = process_snapshot_information.process_snapshot
+    if is_process_snapshot_fresh(process_snapshot):
+        return process_snapshot  # type: ignore
+    return refresh_process_snapshot(only_if_stale=True)
+
+
+# for after killing or starting processes, so the next query scans again
+def invalidate_process_snapshot():
+    with process_snapshot_lock:
+        process_snapshot = process_snapshot_information.process_snapshot
+        if process_snapshot is not None:
+            process_snapshot.taken_at = float("-inf")
+
+
+def add_process_listener(
+    listener: Callable[[ProcessEventType, ProcessEntry], None],
+):
+    with process_snapshot_lock:
+        process_snapshot_information.listeners.append(listener)
+
+
+def remove_process_listener(
+    listener: Callable[[ProcessEventType, ProcessEntry], None],
+):
+    with process_snapshot_lock:
+        if listener in process_snapshot_information.listeners:
+            process_snapshot_information.listeners.remove(listener)
+
+
+def get_processes_by_name(process_name: str) -> list[ProcessEntry]:
+    return list(get_process_snapshot().processes_by_name.get(process_name.lower(), ()))
+
+
+def get_processes_by_substring(substring: str) -> list[ProcessEntry]:
+    process_snapshot = get_process_snapshot()
+    substring = substring.lower()
+    matching_names = process_snapshot.names_by_substring.get(substring)
+    if matching_names is None:
+        matching_names = [
+            process_name
+            for process_name in process_snapshot.processes_by_name
+            if substring in process_name
+        ]
+        process_snapshot.names_by_substring[substring] = matching_names
+    return [
+        process_entry
+        for process_name in matching_names
+        for process_entry in process_snapshot.processes_by_name[process_name]
+    ]
+
+
+def is_process_running(process_name: str) -> bool:
+    process_snapshot = get_process_snapshot()
+    if process_name.lower() in process_snapshot.processes_by_name:
+        return True
+    return bool(get_processes_by_substring(process_name))
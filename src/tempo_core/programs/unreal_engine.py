@@ -32,17 +32,12 @@ def get_is_game_iostore(uproject_file_path: str, game_dir: str) -> bool:
     extensions = [".ucas", ".utoc", "ucas", "utoc"]
     _game_dir = game_dir
     _uproject_file_path = uproject_file_path
-    is_game_iostore = False
-    all_files = file_io.get_files_in_tree(
-        get_game_paks_dir(_uproject_file_path, _game_dir)
-    )
-    for file in all_files:
-        file_extensions = file_io.get_file_extensions(file)
-        for file_extension in file_extensions:
-            if file_extension in extensions:
-                is_game_iostore = True
-                break
-    return is_game_iostore
+    # every file's own extension is among its siblings' extensions, so one walk is enough
+    for _, _, files in os.walk(get_game_paks_dir(_uproject_file_path, _game_dir)):
+        for file in files:
+            if os.path.splitext(file)[1] in extensions:
+                return True
+    return False
 
 
 def get_game_dir(game_exe_path: str):
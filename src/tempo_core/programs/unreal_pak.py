@@ -1,14 +1,36 @@
 import os
-import shutil
-
+import threading
+import time
+from dataclasses import dataclass
 
 import tempo_core.app_runner
 import tempo_core.settings
-from tempo_core import file_io, packing, utilities
+from tempo_core import (
+    build_fingerprints,
+    file_io,
+    file_links,
+    game_install_profile,
+    install_manifest,
+    logger,
+    mod_scheduler,
+    packing,
+    project_context,
+    utilities,
+)
 from tempo_core.data_structures import CompressionType
 from tempo_core.programs import unreal_engine
 
 
+@dataclass
+class IoStoreBatchInformation:
+    # mod name -> (final pak file, response file)
+    pending_mods: dict[str, tuple[str, str]]
+
+
+iostore_batch_information = IoStoreBatchInformation(pending_mods={})
+iostore_batch_lock = threading.Lock()
+
+
 def get_pak_dir_to_pack(mod_name: str):
     return f"{tempo_core.settings.get_working_dir()}/{mod_name}"
 
@@ -62,6 +84,33 @@ def make_response_file_non_iostore(mod_name: str) -> str:
     return file_list_path
 
 
+# relative path in the pak dir -> source file, the layout the staged copy would have
+def get_staged_files(mod_name: str, mod_files_dict: dict[str, str]) -> dict[str, str]:
+    dir_to_pack = get_pak_dir_to_pack(mod_name)
+    return {
+        os.path.relpath(after_path, dir_to_pack).replace("\\", "/"): before_path
+        for before_path, after_path in mod_files_dict.items()
+    }
+
+
+# same response file as make_response_file_non_iostore, written straight from the
+# cooked files so nothing has to be staged in the working dir first
+def make_response_file_non_iostore_from_staged_files(
+    mod_name: str, staged_files: dict[str, str]
+) -> str:
+    file_list_path = os.path.join(
+        tempo_core.settings.get_working_dir(), f"{mod_name}_filelist.txt"
+    )
+    with open(file_list_path, "w") as file:
+        for relative_path in sorted(staged_files):
+            relative_dir = os.path.dirname(relative_path) or "."
+            mount_point = f"../../../{relative_dir}/"
+            file.write(
+                f'"{os.path.normpath(staged_files[relative_path])}" "{mount_point}"\n'
+            )
+    return file_list_path
+
+
 def get_iostore_commands_file_contents(mod_name: str, final_pak_file: str) -> str:
     chunk_utoc = os.path.normpath(f"{os.path.dirname(final_pak_file)}/{mod_name}.utoc")
     container_name = mod_name
@@ -83,13 +132,10 @@ def make_iostore_unreal_pak_mod_checks(
 
 # def make_ue4_iostore_mod(mod_name: str, final_pak_file: str, use_symlinks: bool):
 def make_ue4_iostore_mod(mod_name: str, final_pak_file: str):
-    unreal_engine_dir = tempo_core.settings.get_unreal_engine_dir()
     # unreal_pak = unreal_engine.get_unreal_pak_exe_path(unreal_engine_dir)
-    exe = unreal_engine.get_editor_cmd_path(unreal_engine_dir)
-    ue_win_dir_str = unreal_engine.get_win_dir_str(unreal_engine_dir)
-    uproject_name = os.path.splitext(
-        os.path.basename(tempo_core.settings.get_uproject_file())
-    )[0]
+    exe = project_context.get_project_context().editor_cmd_path
+    ue_win_dir_str = project_context.get_project_context().win_dir_str
+    uproject_name = project_context.get_project_context().uproject_name
     global_utoc_path = f"{utilities.get_uproject_dir()}/Saved/StagedBuilds/{ue_win_dir_str}/{uproject_name}/Content/Paks/global.utoc"
     cooked_content_dir = f"{tempo_core.settings.get_working_dir()}/{mod_name}"
 
@@ -105,9 +151,7 @@ def make_ue4_iostore_mod(mod_name: str, final_pak_file: str):
         cooked_content_dir, global_utoc_path, crypto_keys_json, commands_txt_path
     )
 
-    platform_string = unreal_engine.get_win_dir_str(
-        tempo_core.settings.get_unreal_engine_dir()
-    )
+    platform_string = project_context.get_project_context().win_dir_str
     iostore_txt_location = f"{tempo_core.settings.get_working_dir()}/iostore_packaging/{mod_name}_iostore.txt"
     # default_engine_patch_padding_alignment = 2048
     args = [
@@ -129,20 +173,18 @@ def make_ue4_iostore_mod(mod_name: str, final_pak_file: str):
         "-NoLogTimes",
         "-UTF8Output",
     ]
-    tempo_core.app_runner.run_app(exe_path=exe, args=args)
+    with mod_scheduler.packer_slot():
+        tempo_core.app_runner.run_app(exe_path=exe, args=args)
 
 
 # def make_ue5_iostore_mods(mod_name: str, final_pak_file: str, use_symlinks: bool):
 
 
 def make_ue5_iostore_mods(mod_name: str, final_pak_file: str):
-    unreal_engine_dir = tempo_core.settings.get_unreal_engine_dir()
     # unreal_pak = unreal_engine.get_unreal_pak_exe_path(unreal_engine_dir)
-    exe = unreal_engine.get_editor_cmd_path(unreal_engine_dir)
-    ue_win_dir_str = unreal_engine.get_win_dir_str(unreal_engine_dir)
-    uproject_name = os.path.splitext(
-        os.path.basename(tempo_core.settings.get_uproject_file())
-    )[0]
+    exe = project_context.get_project_context().editor_cmd_path
+    ue_win_dir_str = project_context.get_project_context().win_dir_str
+    uproject_name = project_context.get_project_context().uproject_name
     global_utoc_path = f"{utilities.get_uproject_dir()}/Saved/StagedBuilds/{ue_win_dir_str}/{uproject_name}/Content/Paks/global.utoc"
     cooked_content_dir = f"{tempo_core.settings.get_working_dir()}/{mod_name}"
 
@@ -161,9 +203,7 @@ def make_ue5_iostore_mods(mod_name: str, final_pak_file: str):
         cooked_content_dir, global_utoc_path, crypto_keys_json, commands_txt_path
     )
 
-    platform_string = unreal_engine.get_win_dir_str(
-        tempo_core.settings.get_unreal_engine_dir()
-    )
+    platform_string = project_context.get_project_context().win_dir_str
     iostore_txt_location = f"{tempo_core.settings.get_working_dir()}/iostore_packaging/{mod_name}_iostore.txt"
     # default_engine_patch_padding_alignment = 2048
     args = [
@@ -187,13 +227,14 @@ def make_ue5_iostore_mods(mod_name: str, final_pak_file: str):
         "-NoLogTimes",
         "-UTF8Output",
     ]
-    tempo_core.app_runner.run_app(exe_path=exe, args=args)
+    with mod_scheduler.packer_slot():
+        tempo_core.app_runner.run_app(exe_path=exe, args=args)
 
 
 def make_iostore_unreal_pak_mod(
     mod_name: str, final_pak_file: str, *, use_symlinks: bool
 ):
-    if unreal_engine.is_game_ue4(tempo_core.settings.get_unreal_engine_dir()):
+    if project_context.get_project_context().is_ue4:
         make_ue4_iostore_mod(mod_name, final_pak_file)
         # make_ue4_iostore_mod(mod_name, final_pak_file, use_symlinks)
     else:
@@ -209,26 +250,45 @@ def make_non_iostore_unreal_pak_mod(
     final_pak_file: str,
     *,
     use_symlinks: bool,
+    staged_files: dict[str, str] | None = None,
 ):
-    command = f'{exe_path} "{intermediate_pak_file}" -Create="{make_response_file_non_iostore(mod_name)}"'
+    if staged_files is None:
+        staged_files = build_fingerprints.get_tree_files(get_pak_dir_to_pack(mod_name))
+        response_file = make_response_file_non_iostore(mod_name)
+    else:
+        response_file = make_response_file_non_iostore_from_staged_files(
+            mod_name, staged_files
+        )
+    command = f'{exe_path} "{intermediate_pak_file}" -Create="{response_file}"'
     if compression_str != "None":
         command = f"{command} -compress -compressionformat={compression_str}"
-    tempo_core.app_runner.run_app(command)
-    if os.path.islink(final_pak_file):
-        os.unlink(final_pak_file)
-    if os.path.isfile(final_pak_file):
-        os.remove(final_pak_file)
+    fingerprint = build_fingerprints.get_fingerprint(
+        {
+            "packer": "unreal_pak",
+            "inputs": build_fingerprints.get_files_digest(staged_files),
+            "compression_type": compression_str,
+            "engine_version": tempo_core.settings.custom_get_unreal_engine_version(
+                tempo_core.settings.get_unreal_engine_dir()
+            ),
+            "packer_identity": build_fingerprints.get_file_identity(
+                exe_path.strip('"')
+            ),
+        }
+    )
+    packing.run_packer_if_inputs_changed(
+        mod_name, command, intermediate_pak_file, fingerprint
+    )
     packing.install_mod_sig(mod_name, use_symlinks=use_symlinks)
-    if use_symlinks:
-        os.symlink(intermediate_pak_file, final_pak_file)
-    else:
-        shutil.copyfile(intermediate_pak_file, final_pak_file)
+    packing.install_built_pak(
+        intermediate_pak_file,
+        final_pak_file,
+        file_links.get_install_link_type(use_symlinks=use_symlinks),
+    )
 
 
 def install_unreal_pak_mod(
     mod_name: str, compression_type: CompressionType, *, use_symlinks: bool
 ):
-    move_files_for_packing(mod_name)
     compression_str = CompressionType(compression_type).value
     output_pak_dir = f"{tempo_core.settings.get_working_dir()}/{utilities.get_pak_dir_structure(mod_name)}"
     intermediate_pak_file = f"{tempo_core.settings.get_working_dir()}/{utilities.get_pak_dir_structure(mod_name)}/{mod_name}.pak"
@@ -241,10 +301,33 @@ def install_unreal_pak_mod(
     exe_path = unreal_engine.get_unreal_pak_exe_path(
         tempo_core.settings.get_unreal_engine_dir()
     )
-    is_game_iostore = unreal_engine.get_is_game_iostore(
-        tempo_core.settings.get_uproject_file(), utilities.custom_get_game_dir()
+    is_game_iostore = game_install_profile.is_game_iostore()
+
+    mod_files_dict = utilities.filter_file_paths(
+        packing.get_mod_file_paths_for_manually_made_pak_mods(mod_name)
     )
 
+    if not is_game_iostore and tempo_core.settings.get_is_zero_copy_staging_enabled():
+        # unreal pak reads the cooked files in place, nothing is staged
+        make_non_iostore_unreal_pak_mod(
+            exe_path,
+            intermediate_pak_file,
+            mod_name,
+            compression_str,
+            final_pak_file,
+            use_symlinks=use_symlinks,
+            staged_files=get_staged_files(mod_name, mod_files_dict),
+        )
+        return
+
+    if is_game_iostore and tempo_core.settings.get_should_batch_iostore_mods():
+        # the batch response file points at the cooked files, nothing is staged
+        response_file = make_response_file_iostore_batched(mod_name, mod_files_dict)
+        if response_file:
+            queue_iostore_batch_mod(mod_name, final_pak_file, response_file)
+            return
+
+    stage_files_for_packing(mod_name, mod_files_dict)
     if is_game_iostore:
         make_iostore_unreal_pak_mod(mod_name, final_pak_file, use_symlinks=use_symlinks)
     else:
@@ -258,45 +341,155 @@ def install_unreal_pak_mod(
         )
 
 
-def move_files_for_packing(mod_name: str):
-    from tempo_core import settings
+def stage_files_for_packing(mod_name: str, mod_files_dict: dict[str, str]):
+    install_manifest.sync_mod_files(
+        mod_name,
+        mod_files_dict,
+        link_type=file_links.get_staging_link_type(),
+        progress_description=f"[green]Staging files for {mod_name} mod...",
+    )
+
+
+def get_cooked_platform_dir() -> str:
+    return os.path.dirname(project_context.get_project_context().cooked_uproject_dir)
 
-    should_use_progress_bars = settings.should_show_progress_bars()
-    mod_files_dict = packing.get_mod_file_paths_for_manually_made_pak_mods(mod_name)
-    mod_files_dict = utilities.filter_file_paths(mod_files_dict)
 
-    def copy_files():
-        for before_file, after_file in mod_files_dict.items():
-            dest_dir = os.path.dirname(after_file)
+# a batched run shares one -CookedDirectory, so the response file points at the cooked
+# files themselves, returns None when the mod has files that do not come from the cook
+# with the same layout (persistent files, alt packing dir name), those mods are packed alone
+def make_response_file_iostore_batched(
+    mod_name: str, mod_files_dict: dict[str, str]
+) -> str | None:
+    cooked_platform_dir = os.path.normpath(get_cooked_platform_dir())
+    dir_to_pack = os.path.normpath(get_pak_dir_to_pack(mod_name))
+    lines = []
+    processed_base_paths = set()
+    for before_path, after_path in sorted(mod_files_dict.items()):
+        relative_path = os.path.relpath(
+            os.path.normpath(before_path), cooked_platform_dir
+        )
+        if relative_path != os.path.relpath(os.path.normpath(after_path), dir_to_pack):
+            return None
+        base_path = os.path.splitext(relative_path)[0]
+        if base_path in processed_base_paths:
+            continue
+        processed_base_paths.add(base_path)
+        relative_dir = os.path.dirname(relative_path).replace("\\", "/")
+        lines.append(f'"{os.path.normpath(before_path)}" "../../../{relative_dir}/"\n')
+    if not lines:
+        return None
 
-            if os.path.exists(after_file):
-                if not file_io.get_do_files_have_same_hash(before_file, after_file):
-                    os.remove(after_file)
-            elif not os.path.isdir(dest_dir):
-                os.makedirs(dest_dir)
+    file_list_path = os.path.join(
+        tempo_core.settings.get_working_dir(),
+        "iostore_packaging",
+        f"{mod_name}_batch_filelist.txt",
+    )
+    os.makedirs(os.path.dirname(file_list_path), exist_ok=True)
+    with open(file_list_path, "w") as file:
+        file.writelines(lines)
+    return file_list_path
 
-            if os.path.isfile(before_file):
-                shutil.copy2(before_file, after_file)
 
-    if should_use_progress_bars:
-        from rich.progress import Progress
+def queue_iostore_batch_mod(mod_name: str, final_pak_file: str, response_file: str):
+    with iostore_batch_lock:
+        iostore_batch_information.pending_mods[mod_name] = (
+            final_pak_file,
+            response_file,
+        )
+    logger.log_message(f"Check: {mod_name} mod queued for the batched IoStore run")
+
+
+def get_iostore_container_paths(mod_name: str, final_pak_file: str) -> list[str]:
+    output_dir = os.path.dirname(final_pak_file)
+    return [
+        os.path.normpath(f"{output_dir}/{mod_name}{extension}")
+        for extension in (".utoc", ".ucas")
+    ]
+
+
+# packs every queued unreal_pak IoStore mod with a single IoStore commandlet run
+def run_iostore_batch():
+    with iostore_batch_lock:
+        pending_mods = dict(iostore_batch_information.pending_mods)
+        iostore_batch_information.pending_mods.clear()
+    if not pending_mods:
+        return
+
+    exe = project_context.get_project_context().editor_cmd_path
+    ue_win_dir_str = project_context.get_project_context().win_dir_str
+    uproject_name = project_context.get_project_context().uproject_name
+    global_utoc_path = f"{utilities.get_uproject_dir()}/Saved/StagedBuilds/{ue_win_dir_str}/{uproject_name}/Content/Paks/global.utoc"
+    cooked_content_dir = get_cooked_platform_dir()
+    meta_data_dir = f"{utilities.get_uproject_dir()}/Saved/Cooked/{ue_win_dir_str}/{uproject_name}/Metadata"
+    crypto_keys_json = f"{meta_data_dir}/Crypto.json"
 
-        with Progress() as progress:
-            task = progress.add_task(
-                f"[green]Copying files for {mod_name} mod...", total=len(mod_files_dict)
+    commands_txt_path = f"{tempo_core.settings.get_working_dir()}/iostore_packaging/batch_commands_list.txt"
+    os.makedirs(os.path.dirname(commands_txt_path), exist_ok=True)
+    with open(commands_txt_path, "w") as file:
+        for mod_name, (final_pak_file, response_file) in sorted(pending_mods.items()):
+            chunk_utoc = get_iostore_container_paths(mod_name, final_pak_file)[0]
+            file.write(
+                f'-Output="{chunk_utoc}" -ContainerName={mod_name} -ResponseFile="{response_file}"\n'
             )
-            for before_file, after_file in mod_files_dict.items():
-                dest_dir = os.path.dirname(after_file)
+            for container_path in get_iostore_container_paths(mod_name, final_pak_file):
+                if os.path.isfile(container_path):
+                    os.remove(container_path)
 
-                if os.path.exists(after_file):
-                    if not file_io.get_do_files_have_same_hash(before_file, after_file):
-                        os.remove(after_file)
-                elif not os.path.isdir(dest_dir):
-                    os.makedirs(dest_dir)
+    make_iostore_unreal_pak_mod_checks(
+        cooked_content_dir, global_utoc_path, crypto_keys_json, commands_txt_path
+    )
 
-                if os.path.isfile(before_file):
-                    shutil.copy2(before_file, after_file)
+    iostore_txt_location = (
+        f"{tempo_core.settings.get_working_dir()}/iostore_packaging/batch_iostore.txt"
+    )
+    args = [
+        f'"{tempo_core.settings.get_uproject_file()}"',
+        "-run=IoStore",
+        f'-CreateGlobalContainer="{os.path.normpath(global_utoc_path)}"',
+        f'-CookedDirectory="{os.path.normpath(cooked_content_dir)}"',
+        f'-Commands="{os.path.normpath(commands_txt_path)}"',
+    ]
+    if not project_context.get_project_context().is_ue4:
+        args.extend(
+            [
+                f'-PackageStoreManifest="{meta_data_dir}/packagestore.manifest"',
+                f'-ScriptObjects="{meta_data_dir}/scriptobjects.bin"',
+            ]
+        )
+    args.extend(
+        [
+            "-NoDirectoryIndex",
+            f"-TargetPlatform={ue_win_dir_str}",
+            f'-abslog="{iostore_txt_location}"',
+            "-stdout",
+            "-CrashForUAT",
+            "-unattended",
+            "-NoLogTimes",
+            "-UTF8Output",
+        ]
+    )
+    logger.log_message(
+        f"Check: Packing {len(pending_mods)} IoStore mods with one IoStore commandlet run"
+    )
+    start_time = time.time()
+    tempo_core.app_runner.run_app(exe_path=exe, args=args)
 
-                progress.update(task, advance=1)
-    else:
-        copy_files()
+    failed_mods = []
+    for mod_name, (final_pak_file, _) in sorted(pending_mods.items()):
+        missing_paths = [
+            container_path
+            for container_path in get_iostore_container_paths(mod_name, final_pak_file)
+            if not os.path.isfile(container_path)
+            or os.path.getmtime(container_path) < start_time - 1
+        ]
+        if missing_paths:
+            failed_mods.append(mod_name)
+            for missing_path in missing_paths:
+                logger.log_message(
+                    f'Error: {mod_name} mod IoStore output was not written "{missing_path}"'
+                )
+        else:
+            logger.log_message(f"Check: {mod_name} mod IoStore containers built")
+    if failed_mods:
+        iostore_batch_error = f"The batched IoStore run failed for the following mods: {', '.join(failed_mods)}"
+        raise RuntimeError(iostore_batch_error)
@@ -0,0 +1,134 @@
+import os
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from tempo_core import file_io, settings
+from tempo_core.data_structures import PackagingDirType
+from tempo_core.programs import unreal_engine
+
+
+def get_unreal_engine_dir(context: "ProjectContext") -> str:
+    unreal_engine_dir = context.settings["engine_info"]["unreal_engine_dir"]
+    file_io.check_path_exists(unreal_engine_dir)
+    return unreal_engine_dir
+
+
+def get_engine_version(context: "ProjectContext") -> str:
+    if settings.get_override_automatic_version_finding():
+        engine_info = context.settings["engine_info"]
+        return f"{engine_info['unreal_engine_major_version']}.{engine_info['unreal_engine_minor_version']}"
+    return unreal_engine.get_unreal_engine_version(context.unreal_engine_dir)
+
+
+# the actual engine install, which can differ from the overridable engine version
+def get_installed_engine_version(context: "ProjectContext") -> str:
+    return unreal_engine.get_unreal_engine_version(context.unreal_engine_dir)
+
+
+def get_working_dir(context: "ProjectContext") -> str:
+    if settings.get_is_overriding_default_working_dir():
+        working_dir = settings.get_override_working_dir()
+    else:
+        working_dir = os.path.join(file_io.SCRIPT_DIR, "working_dir")
+    os.makedirs(working_dir, exist_ok=True)
+    return working_dir
+
+
+def get_game_paks_dir(context: "ProjectContext") -> str:
+    if settings.get_is_using_alt_dir_name():
+        return os.path.join(
+            os.path.dirname(context.game_dir),
+            settings.get_alt_packing_dir_name(),
+            "Content",
+            "Paks",
+        )
+    return unreal_engine.get_game_paks_dir(context.uproject_file, context.game_dir)
+
+
+def get_editor_cmd_path(context: "ProjectContext") -> str:
+    if context.win_dir_type == PackagingDirType.WINDOWS_NO_EDITOR:
+        engine_path_suffix = "UE4Editor-Cmd.exe"
+    else:
+        engine_path_suffix = "UnrealEditor-Cmd.exe"
+    return f'"{context.unreal_engine_dir}/Engine/Binaries/Win64/{engine_path_suffix}"'
+
+
+# field name -> how to compute it, each field is computed the first time it is read
+PROJECT_CONTEXT_FIELDS: dict[str, Callable[["ProjectContext"], Any]] = {
+    "unreal_engine_dir": get_unreal_engine_dir,
+    "engine_version": get_engine_version,
+    "installed_engine_version": get_installed_engine_version,
+    "is_ue4": lambda context: context.installed_engine_version.startswith("4"),
+    "is_ue5": lambda context: context.installed_engine_version.startswith("5"),
+    "win_dir_type": lambda context: (
+        PackagingDirType.WINDOWS
+        if context.is_ue5
+        else PackagingDirType.WINDOWS_NO_EDITOR
+    ),
+    "win_dir_str": lambda context: "WindowsNoEditor" if context.is_ue4 else "Windows",
+    "editor_cmd_path": get_editor_cmd_path,
+    "uproject_file": lambda context: context.settings["engine_info"][
+        "unreal_project_file"
+    ],
+    "uproject_dir": lambda context: os.path.dirname(context.uproject_file),
+    "uproject_name": lambda context: unreal_engine.get_uproject_name(
+        context.uproject_file
+    ),
+    "cooked_uproject_dir": lambda context: os.path.join(
+        context.uproject_dir,
+        "Saved",
+        "Cooked",
+        context.win_dir_str,
+        context.uproject_name,
+    ),
+    "working_dir": get_working_dir,
+    "game_exe_path": lambda context: context.settings["game_info"]["game_exe_path"],
+    "game_dir": lambda context: unreal_engine.get_game_dir(context.game_exe_path),
+    "game_paks_dir": get_game_paks_dir,
+}
+
+
+# every engine and project fact derived from the loaded settings, so hot paths stop
+# re-reading Build.version, re-statting the engine dir and rebuilding the same paths
+class ProjectContext:
+    __slots__ = ("settings", *PROJECT_CONTEXT_FIELDS)
+
+    def __init__(self, settings_dict: dict):
+        self.settings = settings_dict
+
+    def __getattr__(self, name: str):
+        # only reached while a slot is still unset
+        compute_field = PROJECT_CONTEXT_FIELDS.get(name)
+        if compute_field is None:
+            raise AttributeError(name)
+        value = compute_field(self)
+        setattr(self, name, value)
+        return value
+
+
+@dataclass
+class ProjectContextInformation:
+    project_context: ProjectContext | None
+
+
+project_context_information = ProjectContextInformation(project_context=None)
+project_context_lock = threading.Lock()
+
+
+def get_project_context() -> ProjectContext:
+    context = project_context_information.project_context
+    settings_dict = settings.settings_information.settings
+    if context is not None and context.settings is settings_dict:
+        return context
+    with project_context_lock:
+        context = project_context_information.project_context
+        if context is None or context.settings is not settings_dict:
+            context = ProjectContext(settings_dict)
+            project_context_information.project_context = context
+    return context
+
+
+def invalidate_project_context():
+    project_context_information.project_context = None
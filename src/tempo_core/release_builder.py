@@ -0,0 +1,271 @@
+import os
+import shutil
+import sys
+import zipfile
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+)
+from dataclasses import dataclass
+
+from tempo_core import build_fingerprints, hash_cache, logger, settings
+
+ZIP_COMPRESSION_METHODS = {
+    "store": zipfile.ZIP_STORED,
+    "deflate": zipfile.ZIP_DEFLATED,
+    "bzip2": zipfile.ZIP_BZIP2,
+    "lzma": zipfile.ZIP_LZMA,
+}
+
+# already compressed by the packer, deflating them again only burns cpu
+STORED_EXTENSIONS = frozenset({".pak", ".ucas", ".utoc"})
+
+# the earliest time a zip entry can hold, so rebuilding a release gives the same bytes
+FIXED_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+MEMBER_COPY_BUFFER_SIZE = 1024 * 1024
+# the zip comment of a release holds the digest of the inputs it was built from
+RELEASE_DIGEST_PREFIX = "tempo_release_digest:"
+# how many file names a rebuild reason lists per kind of change
+MAX_REASON_FILE_NAMES = 3
+
+
+@dataclass
+class ModRelease:
+    mod_name: str
+    zip_path: str
+    # path inside the zip -> source file
+    members: dict[str, str]
+
+
+def get_compression_method() -> int:
+    method_str = settings.get_release_compression_method_str()
+    compression_method = ZIP_COMPRESSION_METHODS.get(method_str)
+    if compression_method is None:
+        invalid_compression_method_error = f'Invalid release_compression_method "{method_str}", valid options are: {", ".join(ZIP_COMPRESSION_METHODS)}'
+        raise ValueError(invalid_compression_method_error)
+    return compression_method
+
+
+# relative path (inside the zip) -> absolute path, for every file below tree_path
+def get_tree_members(tree_path: str) -> dict[str, str]:
+    members = {}
+    for root, _, files in os.walk(tree_path):
+        for file in files:
+            file_path = os.path.join(root, file)
+            arcname = os.path.relpath(file_path, tree_path).replace("\\", "/")
+            members[arcname] = file_path
+    return members
+
+
+def write_zip_member(
+    zip_file: zipfile.ZipFile,
+    arcname: str,
+    source_path: str,
+    compression_method: int,
+    compression_level: int | None,
+):
+    zip_info = zipfile.ZipInfo(arcname, date_time=FIXED_DATE_TIME)
+    zip_info.create_system = 3
+    zip_info.external_attr = 0o644 << 16
+    if os.path.splitext(arcname)[1].lower() in STORED_EXTENSIONS:
+        zip_info.compress_type = zipfile.ZIP_STORED
+    else:
+        zip_info.compress_type = compression_method
+        # public as compress_level from python 3.13 on, which keeps this alias
+        zip_info._compresslevel = compression_level
+    file_size = os.path.getsize(source_path)
+    zip_info.file_size = file_size
+    with (
+        open(source_path, "rb") as source_file,
+        zip_file.open(
+            zip_info, "w", force_zip64=file_size >= zipfile.ZIP64_LIMIT
+        ) as member_file,
+    ):
+        shutil.copyfileobj(source_file, member_file, MEMBER_COPY_BUFFER_SIZE)
+
+
+# streams members (path inside the zip -> source file) into zip_path in sorted order,
+# runs in worker processes, so it only takes plain values and does not log
+def write_release_zip(
+    zip_path: str,
+    members: dict[str, str],
+    compression_method: int = zipfile.ZIP_DEFLATED,
+    compression_level: int | None = None,
+    digest: str = "",
+) -> str:
+    os.makedirs(os.path.dirname(zip_path), exist_ok=True)
+    temp_zip_path = f"{zip_path}.tmp"
+    with zipfile.ZipFile(temp_zip_path, "w") as zip_file:
+        if digest:
+            zip_file.comment = f"{RELEASE_DIGEST_PREFIX}{digest}".encode("ascii")
+        for arcname in sorted(members):
+            write_zip_member(
+                zip_file,
+                arcname,
+                members[arcname],
+                compression_method,
+                compression_level,
+            )
+    os.replace(temp_zip_path, zip_path)
+    return zip_path
+
+
+def get_release_executor(worker_count: int) -> Executor:
+    # a frozen build has no freeze_support() call to keep workers from rerunning the
+    # app, zlib releases the gil while compressing, so threads still scale there
+    if getattr(sys, "frozen", False):
+        return ThreadPoolExecutor(
+            max_workers=worker_count, thread_name_prefix="tempo_release"
+        )
+    return ProcessPoolExecutor(max_workers=worker_count)
+
+
+def get_release_zip_digest(zip_path: str) -> str | None:
+    try:
+        with zipfile.ZipFile(zip_path) as zip_file:
+            comment = zip_file.comment.decode("ascii", errors="replace")
+    except (OSError, zipfile.BadZipFile):
+        return None
+    if not comment.startswith(RELEASE_DIGEST_PREFIX):
+        return None
+    return comment[len(RELEASE_DIGEST_PREFIX) :]
+
+
+# everything a release zip is built from: the hash of each member, and how they are compressed
+def get_release_inputs(members: dict[str, str]) -> dict:
+    member_hashes = hash_cache.get_file_hashes(list(members.values()))
+    return {
+        "members": {
+            arcname: member_hashes[source_path]
+            for arcname, source_path in sorted(members.items())
+        },
+        "compression_method": settings.get_release_compression_method_str(),
+        "compression_level": settings.get_release_compression_level(),
+    }
+
+
+def get_changed_files_str(change_kind: str, arcnames: list[str]) -> str:
+    file_names = ", ".join(sorted(arcnames)[:MAX_REASON_FILE_NAMES])
+    if len(arcnames) > MAX_REASON_FILE_NAMES:
+        file_names = f"{file_names}, ..."
+    return f"{len(arcnames)} {change_kind} ({file_names})"
+
+
+def get_release_inputs_diff_str(previous_inputs: dict, release_inputs: dict) -> str:
+    changes = []
+    if (
+        previous_inputs.get("compression_method"),
+        previous_inputs.get("compression_level"),
+    ) != (release_inputs["compression_method"], release_inputs["compression_level"]):
+        changes.append("compression settings changed")
+    previous_members = previous_inputs.get("members", {})
+    members = release_inputs["members"]
+    changed_files = [
+        arcname
+        for arcname in members
+        if arcname in previous_members and previous_members[arcname] != members[arcname]
+    ]
+    added_files = [arcname for arcname in members if arcname not in previous_members]
+    removed_files = [arcname for arcname in previous_members if arcname not in members]
+    for change_kind, arcnames in (
+        ("changed", changed_files),
+        ("added", added_files),
+        ("removed", removed_files),
+    ):
+        if arcnames:
+            changes.append(get_changed_files_str(change_kind, arcnames))
+    return "; ".join(changes) or "inputs changed"
+
+
+# None when the existing release zip was built from exactly these inputs
+def get_rebuild_reason(
+    mod_release: ModRelease, release_inputs: dict, digest: str
+) -> str | None:
+    if not os.path.isfile(mod_release.zip_path):
+        return "no release zip yet"
+    zip_digest = get_release_zip_digest(mod_release.zip_path)
+    if zip_digest == digest:
+        return None
+    if zip_digest is None:
+        return "the release zip has no input digest"
+    previous_release = build_fingerprints.load_fingerprint_data(
+        build_fingerprints.get_release_fingerprint_path(mod_release.mod_name)
+    )
+    if previous_release is None or previous_release["fingerprint"] != zip_digest:
+        return "inputs changed"
+    return get_release_inputs_diff_str(
+        previous_release.get("inputs", {}), release_inputs
+    )
+
+
+# builds every release zip (zip path -> members) concurrently, digests (zip path ->
+# digest) are written to the zip comments
+def build_release_zips(
+    release_zips: dict[str, dict[str, str]], digests: dict[str, str] | None = None
+):
+    if not release_zips:
+        return
+    digests = digests or {}
+    compression_method = get_compression_method()
+    compression_level = settings.get_release_compression_level()
+    worker_count = min(settings.get_release_worker_count(), len(release_zips))
+    if worker_count == 1:
+        for zip_path, members in release_zips.items():
+            write_release_zip(
+                zip_path,
+                members,
+                compression_method,
+                compression_level,
+                digests.get(zip_path, ""),
+            )
+            logger.log_message(f"Directory tree zipped successfully: {zip_path}")
+        return
+    with get_release_executor(worker_count) as executor:
+        futures = [
+            executor.submit(
+                write_release_zip,
+                zip_path,
+                members,
+                compression_method,
+                compression_level,
+                digests.get(zip_path, ""),
+            )
+            for zip_path, members in release_zips.items()
+        ]
+        for future in as_completed(futures):
+            logger.log_message(f"Directory tree zipped successfully: {future.result()}")
+
+
+# only rebuilds the release zips whose inputs changed since they were built
+def build_mod_releases(mod_releases: list[ModRelease]):
+    release_zips = {}
+    digests = {}
+    rebuilt_releases = []
+    for mod_release in mod_releases:
+        release_inputs = get_release_inputs(mod_release.members)
+        digest = build_fingerprints.get_fingerprint(release_inputs)
+        rebuild_reason = get_rebuild_reason(mod_release, release_inputs, digest)
+        if rebuild_reason is None:
+            logger.log_message(
+                f"Check: {mod_release.mod_name} release zip is up to date, reusing it"
+            )
+            continue
+        logger.log_message(
+            f"Check: Rebuilding {mod_release.mod_name} release zip: {rebuild_reason}"
+        )
+        release_zips[mod_release.zip_path] = mod_release.members
+        digests[mod_release.zip_path] = digest
+        rebuilt_releases.append((mod_release, release_inputs, digest))
+
+    build_release_zips(release_zips, digests)
+    for mod_release, release_inputs, digest in rebuilt_releases:
+        build_fingerprints.save_fingerprint(
+            build_fingerprints.get_release_fingerprint_path(mod_release.mod_name),
+            digest,
+            {"inputs": release_inputs},
+        )
+    logger.log_message(
+        f"Check: Release zips: {len(rebuilt_releases)} rebuilt, {len(mod_releases) - len(rebuilt_releases)} up to date"
+    )
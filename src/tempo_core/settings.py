@@ -8,9 +8,9 @@ from typing import Any
 import json
 
 from tempo_core import (
-    file_io,
     logger,
     process_management,
+    project_context,
 )
 from tempo_core.programs import unreal_engine
 
@@ -55,6 +55,7 @@ def init_settings(settings_json_path: pathlib.Path):
             taskkill_exe_not_found_error = "taskkill.exe not found."
             raise FileNotFoundError(taskkill_exe_not_found_error)
     settings_information.init_settings_done = True
+    project_context.invalidate_project_context()
     settings_information.settings_json = str(settings_json_path)
     settings_information.settings_json_dir = os.path.dirname(
         settings_information.settings_json
@@ -68,9 +69,7 @@ def load_settings(settings_json: str):
 
 
 def get_unreal_engine_dir() -> str:
-    ue_dir = settings_information.settings["engine_info"]["unreal_engine_dir"]
-    file_io.check_path_exists(ue_dir)
-    return ue_dir
+    return project_context.get_project_context().unreal_engine_dir
 
 
 def is_unreal_pak_packing_enum_in_use():
@@ -227,6 +226,9 @@ def get_engine_launch_args() -> list:
 
 
 def custom_get_unreal_engine_version(engine_path: str) -> str:
+    context = project_context.get_project_context()
+    if engine_path == context.unreal_engine_dir:
+        return context.engine_version
     if get_override_automatic_version_finding():
         unreal_engine_major_version = settings_information.settings["engine_info"][
             "unreal_engine_major_version"
@@ -239,12 +241,7 @@ def custom_get_unreal_engine_version(engine_path: str) -> str:
 
 
 def get_working_dir() -> str:
-    if get_is_overriding_default_working_dir():
-        working_dir = get_override_working_dir()
-    else:
-        working_dir = os.path.join(file_io.SCRIPT_DIR, "working_dir")
-    os.makedirs(working_dir, exist_ok=True)
-    return working_dir
+    return project_context.get_project_context().working_dir
 
 
 def is_loose_packing_enum_in_use():
@@ -257,3 +254,101 @@ def is_loose_packing_enum_in_use():
 
 def should_show_progress_bars() -> bool:
     return "--disable_progress_bars" not in sys.argv
+
+
+def get_mod_install_worker_count() -> int:
+    general_info = settings_information.settings.get("general_info", {})
+    return max(1, int(general_info.get("mod_install_workers", os.cpu_count() or 1)))
+
+
+def get_max_concurrent_packers() -> int:
+    general_info = settings_information.settings.get("general_info", {})
+    default_packer_count = max(1, (os.cpu_count() or 1) // 2)
+    return max(1, int(general_info.get("max_concurrent_packers", default_packer_count)))
+
+
+def get_max_concurrent_file_copies() -> int:
+    general_info = settings_information.settings.get("general_info", {})
+    return max(1, int(general_info.get("max_concurrent_file_copies", 4)))
+
+
+def get_should_batch_iostore_mods() -> bool:
+    general_info = settings_information.settings.get("general_info", {})
+    return bool(general_info.get("batch_iostore_mods", False))
+
+
+def get_is_scoped_cook_enabled() -> bool:
+    general_info = settings_information.settings.get("general_info", {})
+    return "--scoped_cook" in sys.argv or bool(general_info.get("scoped_cook", False))
+
+
+def get_is_force_cook_enabled() -> bool:
+    return "--force_cook" in sys.argv
+
+
+def get_should_hash_cook_inputs() -> bool:
+    general_info = settings_information.settings.get("general_info", {})
+    return bool(general_info.get("hash_cook_inputs", False))
+
+
+def get_link_type_str() -> str:
+    general_info = settings_information.settings.get("general_info", {})
+    return general_info.get("link_type", "copy")
+
+
+def get_copy_worker_count() -> int:
+    general_info = settings_information.settings.get("general_info", {})
+    return max(1, int(general_info.get("copy_workers", 4)))
+
+
+def get_is_zero_copy_staging_enabled() -> bool:
+    general_info = settings_information.settings.get("general_info", {})
+    return bool(general_info.get("zero_copy_staging", False))
+
+
+def get_release_worker_count() -> int:
+    general_info = settings_information.settings.get("general_info", {})
+    return max(1, int(general_info.get("release_workers", os.cpu_count() or 1)))
+
+
+def get_release_compression_method_str() -> str:
+    general_info = settings_information.settings.get("general_info", {})
+    return general_info.get("release_compression_method", "deflate")
+
+
+def get_release_compression_level() -> int | None:
+    general_info = settings_information.settings.get("general_info", {})
+    return general_info.get("release_compression_level", None)
+
+
+def get_cleanup_worker_count() -> int:
+    general_info = settings_information.settings.get("general_info", {})
+    return max(1, int(general_info.get("cleanup_workers", 8)))
+
+
+def get_should_snapshot_digests() -> bool:
+    general_info = settings_information.settings.get("general_info", {})
+    return bool(general_info.get("snapshot_digests", False))
+
+
+def get_is_dry_run_enabled() -> bool:
+    return "--dry_run" in sys.argv
+
+
+def get_process_snapshot_ttl() -> float:
+    general_info = settings_information.settings.get("general_info", {})
+    return max(0.0, float(general_info.get("process_snapshot_ttl", 0.25)))
+
+
+# regexes that abort a cook or pak as soon as a line of its output matches one, an
+# empty list turns the early abort off, None keeps the built in patterns
+def get_fatal_log_patterns() -> list[str] | None:
+    general_info = settings_information.settings.get("general_info", {})
+    return general_info.get("fatal_log_patterns")
+
+
+# how many log summaries to keep in the logs summaries dir, the oldest are deleted
+# first, 0 turns saving them off
+def get_max_log_summaries() -> int:
+    general_info = settings_information.settings.get("general_info", {})
+    return max(0, int(general_info.get("max_log_summaries", 50)))
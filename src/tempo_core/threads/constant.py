@@ -1,39 +1,43 @@
-import threading
-import time
+from concurrent.futures import Future
 from dataclasses import dataclass
 
 from tempo_core import hook_states, logger
 from tempo_core.data_structures import HookStateType
+from tempo_core.threads import monitor_loop
 
 
 @dataclass
 class ConstantThreadInformation:
     run_constant_thread: bool
-    constant_thread: threading.Thread
+    constant_task: Future | None
 
 
 constant_thread_information = ConstantThreadInformation(
     run_constant_thread=False,
-    constant_thread=None,  # type: ignore
+    constant_task=None,
 )
+CONSTANT_TASK_NAME = "constant"
+CONSTANT_TICK_RATE = 0.01
+# how far the tick backs off while no event uses the constant hook state
+MAX_IDLE_CONSTANT_TICK_RATE = 1.0
 
 
-def constant_thread_runner(tick_rate: float = 0.01):
-    while constant_thread_information.run_constant_thread:
-        time.sleep(tick_rate)
-        constant_thread_logic()
-
-
-def constant_thread_logic():
+# returns whether there was anything to run
+def constant_thread_logic() -> bool:
+    if not hook_states.is_hook_state_used(HookStateType.CONSTANT):
+        return False
     hook_states.hook_state_checks(HookStateType.CONSTANT)
+    return True
 
 
 def start_constant_thread():
     constant_thread_information.run_constant_thread = True
-    constant_thread_information.constant_thread = threading.Thread(
-        target=constant_thread_runner, daemon=True
+    constant_thread_information.constant_task = monitor_loop.start_periodic_task(
+        CONSTANT_TASK_NAME,
+        constant_thread_logic,
+        CONSTANT_TICK_RATE,
+        MAX_IDLE_CONSTANT_TICK_RATE,
     )
-    constant_thread_information.constant_thread.start()
 
 
 @hook_states.hook_state_decorator(HookStateType.POST_INIT)
@@ -48,4 +52,5 @@ def constant_thread():
 
 def stop_constant_thread():
     constant_thread_information.run_constant_thread = False
+    monitor_loop.cancel_task(CONSTANT_TASK_NAME)
     logger.log_message("Thread: Constant Thread Ended")
@@ -1,5 +1,6 @@
-import threading
-import time
+import asyncio
+import concurrent.futures
+from concurrent.futures import Future
 from dataclasses import dataclass
 
 import tempo_core.timer
@@ -11,6 +12,7 @@ from tempo_core import (
     window_management,
 )
 from tempo_core.data_structures import HookStateType
+from tempo_core.threads import lifecycle_waits, monitor_loop
 
 
 @dataclass
@@ -20,7 +22,7 @@ class GameMonitorThreadInformation:
     found_process: bool
     window_closed: bool
     run_game_monitor_thread: bool
-    game_monitor_thread: threading.Thread
+    game_monitor_task: Future | None
 
 
 game_monitor_thread_information = GameMonitorThreadInformation(
@@ -29,20 +31,42 @@ game_monitor_thread_information = GameMonitorThreadInformation(
     found_process=False,
     window_closed=False,
     run_game_monitor_thread=False,
-    game_monitor_thread=None,  # type: ignore
+    game_monitor_task=None,
 )
+GAME_MONITOR_TASK_NAME = "game_monitor"
 
 
-def game_monitor_thread_runner(tick_rate: float = 0.01):
-    while game_monitor_thread_information.run_game_monitor_thread:
-        time.sleep(tick_rate)
-        game_monitor_thread_logic()
+# waits on the game process and window instead of polling them on a fixed tick
+async def monitor_game():
+    game_process_name = process_management.get_game_process_name()
+    game_process = await lifecycle_waits.wait_for_process(game_process_name)
+    logger.log_message("Process: Found Game Process")
+    game_monitor_thread_information.found_process = True
+
+    if await lifecycle_waits.wait_for_window(get_game_window, game_process_name):
+        # hook actions can run programs, so they are dispatched off the loop
+        await asyncio.to_thread(found_game_window)
+
+    await lifecycle_waits.wait_for_process_exit(game_process, game_process_name)
+    logger.log_message("Window: Game Window Closed")
+    game_monitor_thread_information.window_closed = True
+    await asyncio.to_thread(stop_game_monitor_thread)
+
+
+# for awaiting on the monitor loop, returns None when timeout seconds passed first
+async def wait_for_game_window(timeout: float | None = None):
+    return await lifecycle_waits.wait_for_window(
+        get_game_window, process_management.get_game_process_name(), timeout
+    )
 
 
 def get_game_window():
-    return window_management.get_window_by_title(
+    windows = window_management.get_windows_by_title(
         window_title=utilities.get_game_window_title()
     )
+    if not windows:
+        return None
+    return windows[0]
 
 
 @hook_states.hook_state_decorator(HookStateType.POST_GAME_LAUNCH)
@@ -51,44 +75,24 @@ def found_game_window():
     game_monitor_thread_information.found_window = True
 
 
-def game_monitor_thread_logic():
-    if (
-        not game_monitor_thread_information.found_process
-        and process_management.is_process_running(
-            process_management.get_game_process_name()
-        )
-    ):
-        logger.log_message("Process: Found Game Process")
-        game_monitor_thread_information.found_process = True
-
-    elif not game_monitor_thread_information.found_window:
-        time.sleep(4)
-        if get_game_window():
-            found_game_window()
-
-    elif not game_monitor_thread_information.window_closed and not get_game_window():
-        logger.log_message("Window: Game Window Closed")
-        stop_game_monitor_thread()
-        game_monitor_thread_information.window_closed = True
-
-
 def start_game_monitor_thread():
     game_monitor_thread_information.run_game_monitor_thread = True
-    game_monitor_thread_information.game_monitor_thread = threading.Thread(
-        target=game_monitor_thread_runner, daemon=True
+    game_monitor_thread_information.game_monitor_task = monitor_loop.start_task(
+        GAME_MONITOR_TASK_NAME, monitor_game()
     )
-    game_monitor_thread_information.game_monitor_thread.start()
 
 
 @hook_states.hook_state_decorator(HookStateType.POST_GAME_CLOSE)
 def stop_game_monitor_thread():
     game_monitor_thread_information.run_game_monitor_thread = False
+    monitor_loop.cancel_task(GAME_MONITOR_TASK_NAME)
 
 
 def game_monitor_thread():
     start_game_monitor_thread()
     logger.log_message("Thread: Game Monitoring Thread Started")
-    game_monitor_thread_information.game_monitor_thread.join()
+    # also returns when the task was cancelled
+    concurrent.futures.wait([game_monitor_thread_information.game_monitor_task])  # type: ignore
     logger.log_message("Thread: Game Monitoring Thread Ended")
     logger.log_message(
         f"Timer: Time since script execution: {tempo_core.timer.get_running_time()}"
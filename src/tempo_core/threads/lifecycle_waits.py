@@ -0,0 +1,114 @@
+import asyncio
+from collections.abc import Callable
+
+import psutil
+
+from tempo_core import process_snapshot
+
+INITIAL_BACKOFF = 0.01
+BACKOFF_FACTOR = 1.5
+MAX_PROCESS_BACKOFF = 0.25
+MAX_WINDOW_BACKOFF = 0.5
+# how long a process wait blocks its worker thread before looking again
+PROCESS_WAIT_TIMEOUT = 1.0
+
+
+def find_process(process_name: str) -> process_snapshot.ProcessEntry | None:
+    process_entries = process_snapshot.get_processes_by_name(
+        process_name
+    ) or process_snapshot.get_processes_by_substring(process_name)
+    if not process_entries:
+        return None
+    return process_entries[0]
+
+
+# polls check with a backoff that starts at INITIAL_BACKOFF until it returns something
+# truthy, or False, which means to give up, check runs in a worker thread as process
+# scans and window lookups would otherwise stall every other monitor on the loop
+async def wait_for(check: Callable[[], object], max_backoff: float):
+    backoff = INITIAL_BACKOFF
+    while True:
+        result = await asyncio.to_thread(check)
+        if result or result is False:
+            return result
+        await asyncio.sleep(backoff)
+        backoff = min(backoff * BACKOFF_FACTOR, max_backoff)
+
+
+# returns None when timeout seconds passed first
+async def wait_for_process(
+    process_name: str, timeout: float | None = None
+) -> process_snapshot.ProcessEntry | None:
+    try:
+        async with asyncio.timeout(timeout):
+            return await wait_for(
+                lambda: find_process(process_name), MAX_PROCESS_BACKOFF
+            )
+    except TimeoutError:
+        return None
+
+
+# returns None when the process exited before its window showed up, or when timeout
+# seconds passed first
+async def wait_for_window(
+    find_window: Callable[[], object],
+    process_name: str,
+    timeout: float | None = None,
+):
+    def check():
+        window = find_window()
+        if window:
+            return window
+        if find_process(process_name) is None:
+            return False
+        return None
+
+    try:
+        async with asyncio.timeout(timeout):
+            return await wait_for(check, MAX_WINDOW_BACKOFF) or None
+    except TimeoutError:
+        return None
+
+
+def is_process_entry_gone(process_entry: process_snapshot.ProcessEntry) -> bool:
+    return (
+        process_entry.pid,
+        process_entry.create_time,
+    ) not in process_snapshot.get_process_snapshot().processes
+
+
+def wait_on_process_handle(proc: psutil.Process) -> bool:
+    try:
+        proc.wait(timeout=PROCESS_WAIT_TIMEOUT)
+    except psutil.TimeoutExpired:
+        return False
+    return True
+
+
+async def wait_for_process_entry_exit(process_entry: process_snapshot.ProcessEntry):
+    try:
+        proc = psutil.Process(process_entry.pid)
+        if proc.create_time() != process_entry.create_time:
+            return
+        # blocks on the process handle on windows, in a worker thread so the loop
+        # stays free, there is no polling while waiting
+        while not await asyncio.to_thread(wait_on_process_handle, proc):
+            pass
+    except psutil.NoSuchProcess:
+        return
+    except psutil.AccessDenied:
+        # no handle to wait on, fall back to watching the process snapshot
+        await wait_for(
+            lambda: is_process_entry_gone(process_entry), MAX_PROCESS_BACKOFF
+        )
+
+
+# waits until no process named process_name is left, some games restart themselves
+# once through their launcher, so the wait moves on to a newer instance if there is one
+async def wait_for_process_exit(
+    process_entry: process_snapshot.ProcessEntry | None, process_name: str
+):
+    while process_entry is not None:
+        await wait_for_process_entry_exit(process_entry)
+        process_snapshot.invalidate_process_snapshot()
+        process_entry = await asyncio.to_thread(find_process, process_name)
@@ -0,0 +1,122 @@
+import asyncio
+import threading
+from collections.abc import Callable, Coroutine
+from concurrent.futures import Future
+from dataclasses import dataclass
+
+from tempo_core import logger
+
+
+@dataclass
+class MonitorLoopInformation:
+    loop: asyncio.AbstractEventLoop | None
+    loop_thread: threading.Thread | None
+    # task name -> future of the coroutine running on the loop
+    tasks: dict[str, Future]
+
+
+monitor_loop_information = MonitorLoopInformation(loop=None, loop_thread=None, tasks={})
+monitor_loop_lock = threading.Lock()
+
+
+def run_monitor_loop(loop: asyncio.AbstractEventLoop):
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_forever()
+        # let every cancelled task unwind before the loop goes away
+        pending_tasks = asyncio.all_tasks(loop)
+        for task in pending_tasks:
+            task.cancel()
+        loop.run_until_complete(asyncio.gather(*pending_tasks, return_exceptions=True))
+    finally:
+        loop.close()
+
+
+# every monitor shares this one loop, running in its own daemon thread
+def get_monitor_loop() -> asyncio.AbstractEventLoop:
+    with monitor_loop_lock:
+        if monitor_loop_information.loop is None:
+            loop = asyncio.new_event_loop()
+            loop_thread = threading.Thread(
+                target=run_monitor_loop,
+                args=(loop,),
+                name="tempo_monitor_loop",
+                daemon=True,
+            )
+            monitor_loop_information.loop = loop
+            monitor_loop_information.loop_thread = loop_thread
+            loop_thread.start()
+        return monitor_loop_information.loop
+
+
+def on_task_done(task_name: str, future: Future):
+    with monitor_loop_lock:
+        if monitor_loop_information.tasks.get(task_name) is future:
+            del monitor_loop_information.tasks[task_name]
+    if future.cancelled():
+        return
+    exception = future.exception()
+    if exception is not None:
+        logger.log_message(f"Error: Monitor task {task_name} failed: {exception}")
+
+
+# runs coroutine on the monitor loop, replacing any running task with the same name
+def start_task(task_name: str, coroutine: Coroutine) -> Future:
+    cancel_task(task_name)
+    future = asyncio.run_coroutine_threadsafe(coroutine, get_monitor_loop())
+    with monitor_loop_lock:
+        monitor_loop_information.tasks[task_name] = future
+    future.add_done_callback(lambda done_future: on_task_done(task_name, done_future))
+    return future
+
+
+def cancel_task(task_name: str):
+    with monitor_loop_lock:
+        future = monitor_loop_information.tasks.pop(task_name, None)
+    if future is not None:
+        future.cancel()
+
+
+def is_task_running(task_name: str) -> bool:
+    with monitor_loop_lock:
+        return task_name in monitor_loop_information.tasks
+
+
+# calls callback every tick_rate seconds, while it returns a falsy value (nothing to
+# do) the interval doubles up to max_tick_rate, and drops back once it has work again,
+# callback runs in a worker thread so hook actions it dispatches never block the loop
+async def run_periodic(
+    callback: Callable[[], bool | None],
+    tick_rate: float,
+    max_tick_rate: float | None = None,
+):
+    current_tick_rate = tick_rate
+    while True:
+        if await asyncio.to_thread(callback) or max_tick_rate is None:
+            current_tick_rate = tick_rate
+        else:
+            current_tick_rate = min(current_tick_rate * 2, max_tick_rate)
+        await asyncio.sleep(current_tick_rate)
+
+
+def start_periodic_task(
+    task_name: str,
+    callback: Callable[[], bool | None],
+    tick_rate: float,
+    max_tick_rate: float | None = None,
+) -> Future:
+    return start_task(task_name, run_periodic(callback, tick_rate, max_tick_rate))
+
+
+def stop_monitor_loop():
+    with monitor_loop_lock:
+        loop = monitor_loop_information.loop
+        loop_thread = monitor_loop_information.loop_thread
+        monitor_loop_information.loop = None
+        monitor_loop_information.loop_thread = None
+        monitor_loop_information.tasks.clear()
+    if loop is None or loop_thread is None:
+        return
+    loop.call_soon_threadsafe(loop.stop)
+    if loop_thread is not threading.current_thread():
+        loop_thread.join()
@@ -1,16 +1,17 @@
-import threading
-import time
+import asyncio
+import concurrent.futures
+from concurrent.futures import Future
 from dataclasses import dataclass
 
 from tempo_core import (
     hook_states,
     logger,
-    process_management,
     settings,
     window_management,
 )
 from tempo_core.data_structures import HookStateType
 from tempo_core.programs import unreal_engine
+from tempo_core.threads import lifecycle_waits, monitor_loop
 
 
 @dataclass
@@ -20,7 +21,7 @@ class EngineMonitorThreadInformation:
     found_process: bool
     window_closed: bool
     run_engine_monitor_thread: bool
-    engine_monitor_thread: threading.Thread
+    engine_monitor_task: Future | None
 
 
 engine_monitor_thread_information = EngineMonitorThreadInformation(
@@ -29,64 +30,72 @@ engine_monitor_thread_information = EngineMonitorThreadInformation(
     found_process=False,
     window_closed=False,
     run_engine_monitor_thread=False,
-    engine_monitor_thread=None,  # type: ignore
+    engine_monitor_task=None,
 )
+ENGINE_MONITOR_TASK_NAME = "engine_monitor"
 
 
 def engine_monitor_thread():
     start_engine_monitor_thread()
     logger.log_message("Thread: Engine Monitoring Thread Started")
-    engine_monitor_thread_information.engine_monitor_thread.join()
+    # also returns when the task was cancelled
+    concurrent.futures.wait([engine_monitor_thread_information.engine_monitor_task])  # type: ignore
     logger.log_message("Thread: Engine Monitoring Thread Ended")
 
 
-def engine_monitor_thread_runner(tick_rate: float = 0.01):
-    while engine_monitor_thread_information.run_engine_monitor_thread:
-        time.sleep(tick_rate)
-        engine_monitor_thread_logic()
+# waits on the engine process and window instead of polling them on a fixed tick
+async def monitor_engine():
+    engine_monitor_thread_information.found_process = False
+    engine_monitor_thread_information.found_window = False
+    engine_monitor_thread_information.window_closed = False
+    engine_monitor_thread_information.init_done = True
 
+    engine_process_name = get_engine_process_name()
+    engine_process = await lifecycle_waits.wait_for_process(engine_process_name)
+    logger.log_message("Process: Found Engine Process")
+    engine_monitor_thread_information.found_process = True
 
-@hook_states.hook_state_decorator(HookStateType.POST_ENGINE_OPEN)
-def found_engine_window():
-    logger.log_message("Window: Engine Window Found")
-    engine_monitor_thread_information.found_window = True
+    if await lifecycle_waits.wait_for_window(get_engine_window, engine_process_name):
+        # hook actions can run programs, so they are dispatched off the loop
+        await asyncio.to_thread(found_engine_window)
 
+    await lifecycle_waits.wait_for_process_exit(engine_process, engine_process_name)
+    logger.log_message("Window: Engine Window Closed")
+    engine_monitor_thread_information.window_closed = True
+    await asyncio.to_thread(stop_engine_monitor_thread)
 
-def engine_monitor_thread_logic():
-    if not engine_monitor_thread_information.init_done:
-        engine_monitor_thread_information.found_process = False
-        engine_monitor_thread_information.found_window = False
-        engine_monitor_thread_information.window_closed = False
-        engine_monitor_thread_information.init_done = True
 
-    engine_window_name = unreal_engine.get_engine_window_title(
-        settings.get_uproject_file()
+# for awaiting on the monitor loop, returns None when timeout seconds passed first
+async def wait_for_engine_window(timeout: float | None = None):
+    return await lifecycle_waits.wait_for_window(
+        get_engine_window, get_engine_process_name(), timeout
     )
-    if not engine_monitor_thread_information.found_process:
-        engine_process_name = unreal_engine.get_engine_process_name(
-            settings.get_unreal_engine_dir()
-        )
-        if process_management.is_process_running(engine_process_name):
-            logger.log_message("Process: Found Engine Process")
-            engine_monitor_thread_information.found_process = True
-    elif not engine_monitor_thread_information.found_window:
-        if window_management.does_window_exist(engine_window_name):
-            found_engine_window()
-    elif not engine_monitor_thread_information.window_closed:
-        if not window_management.does_window_exist(engine_window_name):
-            logger.log_message("Window: Engine Window Closed")
-            engine_monitor_thread_information.window_closed = True
-            stop_engine_monitor_thread()
+
+
+def get_engine_process_name() -> str:
+    return unreal_engine.get_engine_process_name(settings.get_unreal_engine_dir())
+
+
+def get_engine_window():
+    return window_management.get_windows_by_title(
+        unreal_engine.get_engine_window_title(settings.get_uproject_file())
+    )
+
+
+@hook_states.hook_state_decorator(HookStateType.POST_ENGINE_OPEN)
+def found_engine_window():
+    logger.log_message("Window: Engine Window Found")
+    engine_monitor_thread_information.found_window = True
 
 
 def start_engine_monitor_thread():
     engine_monitor_thread_information.run_engine_monitor_thread = True
-    engine_monitor_thread_information.engine_monitor_thread = threading.Thread(
-        target=engine_monitor_thread_runner, daemon=True
+    engine_monitor_thread_information.engine_monitor_task = monitor_loop.start_task(
+        ENGINE_MONITOR_TASK_NAME, monitor_engine()
     )
-    engine_monitor_thread_information.engine_monitor_thread.start()
 
 
 @hook_states.hook_state_decorator(HookStateType.POST_ENGINE_CLOSE)
 def stop_engine_monitor_thread():
     engine_monitor_thread_information.run_engine_monitor_thread = False
+    monitor_loop.cancel_task(ENGINE_MONITOR_TASK_NAME)
@@ -1060,7 +1060,7 @@ def add_collection_to_mod_entry(
         with open(settings_json_str, encoding="utf-8") as file:
             settings = json.load(file)
 
-        mod_entry = utilities.get_mods_info_dict_from_mod_name(mod_name)
+        mod_entry = dict(utilities.get_mods_info_dict_from_mod_name(mod_name))
 
         if mod_entry:
             new_collections = mod_entry["file_includes"]["unreal_collections"]
@@ -1103,7 +1103,7 @@ def remove_collection_from_mod_entry(
     with open(settings_json_str, encoding="utf-8") as file:
         settings = json.load(file)
 
-    mod_entry = utilities.get_mods_info_dict_from_mod_name(mod_name)
+    mod_entry = dict(utilities.get_mods_info_dict_from_mod_name(mod_name))
 
     if mod_entry:
         new_collections = [
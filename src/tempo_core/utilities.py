@@ -1,28 +1,23 @@
 import os
 import shutil
+from collections.abc import Mapping
+from types import MappingProxyType
 
-from tempo_core import file_io, settings
+from tempo_core import file_io, mod_registry, project_context, settings
 from tempo_core.data_structures import CompressionType, get_enum_from_val
 from tempo_core.programs import unreal_engine
 
 
 def custom_get_game_dir():
-    return unreal_engine.get_game_dir(settings.get_game_exe_path())
+    return project_context.get_project_context().game_dir
 
 
 def custom_get_game_paks_dir() -> str:
-    alt_game_dir = os.path.dirname(custom_get_game_dir())
-    if settings.get_is_using_alt_dir_name():
-        return os.path.join(
-            alt_game_dir, settings.get_alt_packing_dir_name(), "Content", "Paks"
-        )
-    return unreal_engine.get_game_paks_dir(
-        settings.get_uproject_file(), custom_get_game_dir()
-    )
+    return project_context.get_project_context().game_paks_dir
 
 
 def get_uproject_dir():
-    return os.path.dirname(settings.get_uproject_file())
+    return project_context.get_project_context().uproject_dir
 
 
 def get_uproject_tempo_dir():
@@ -48,18 +43,18 @@ def get_mod_name_dir_name(mod_name: str) -> str:
 
 
 def get_pak_dir_structure(mod_name: str) -> str:
-    for info in settings.get_mods_info_list_from_json():
-        if info["mod_name"] == mod_name:
-            return info["pak_dir_structure"]
+    mod_info = mod_registry.get_mod_info(mod_name)
+    if mod_info is not None:
+        return mod_info.raw["pak_dir_structure"]
     pak_dir_structure_missing_error = "Could not find the proper pak dir structure within the mod entry in the provided settings file"
     raise RuntimeError(pak_dir_structure_missing_error)
 
 
 def get_mod_compression_type(mod_name: str) -> CompressionType:
-    for info in settings.get_mods_info_list_from_json():
-        if info["mod_name"] == mod_name:
-            compression_str = info["compression_type"]
-            return CompressionType(get_enum_from_val(CompressionType, compression_str))
+    mod_info = mod_registry.get_mod_info(mod_name)
+    if mod_info is not None:
+        compression_str = mod_info.raw["compression_type"]
+        return CompressionType(get_enum_from_val(CompressionType, compression_str))
     missing_compression_type_error = (
         f'Could not find the compression type for the following mod name "{mod_name}"'
     )
@@ -67,17 +62,18 @@ def get_mod_compression_type(mod_name: str) -> CompressionType:
 
 
 def get_unreal_mod_tree_type_str(mod_name: str) -> str:
-    for info in settings.get_mods_info_list_from_json():
-        if info["mod_name"] == mod_name:
-            return info["mod_name_dir_type"]
+    mod_info = mod_registry.get_mod_info(mod_name)
+    if mod_info is not None:
+        return mod_info.raw["mod_name_dir_type"]
     missing_mod_tree_type_error = f'Was unable to find the unreal mod tree type for the following mod name "{mod_name}"'
     raise RuntimeError(missing_mod_tree_type_error)
 
 
-def get_mods_info_dict_from_mod_name(mod_name: str) -> dict:
-    for info in settings.get_mods_info_list_from_json():
-        if info["mod_name"] == mod_name:
-            return dict(info)
+# a read only view of the registry entry, copy it before changing it
+def get_mods_info_dict_from_mod_name(mod_name: str) -> Mapping:
+    mod_info = mod_registry.get_mod_info(mod_name)
+    if mod_info is not None:
+        return MappingProxyType(mod_info.raw)
     missing_mods_info_dict_error = (
         f'Was unable to find the mods info dict for the following mod name "{mod_name}"'
     )
@@ -85,14 +81,12 @@ def get_mods_info_dict_from_mod_name(mod_name: str) -> dict:
 
 
 def is_mod_name_in_list(mod_name: str) -> bool:
-    return any(
-        info["mod_name"] == mod_name for info in settings.get_mods_info_list_from_json()
-    )
+    return mod_registry.get_mod_info(mod_name) is not None
 
 
 def get_mod_name_dir(mod_name: str) -> str:
     if is_mod_name_in_list(mod_name):
-        return f"{unreal_engine.get_uproject_dir(settings.get_uproject_file())}/Saved/Cooked/{get_unreal_mod_tree_type_str(mod_name)}/{mod_name}"
+        return f"{get_uproject_dir()}/Saved/Cooked/{get_unreal_mod_tree_type_str(mod_name)}/{mod_name}"
     get_mod_name_dir_name_error = "Was unable to find the mod name dir name"
     raise RuntimeError(get_mod_name_dir_name_error)
 
@@ -109,6 +103,8 @@ def clean_working_dir():
     working_dir = settings.get_working_dir()
     if os.path.isdir(working_dir):
         shutil.rmtree(working_dir)
+    # the context only creates the working dir once
+    project_context.invalidate_project_context()
 
 
 def filter_file_paths(paths_dict: dict) -> dict:
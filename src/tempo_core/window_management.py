@@ -4,6 +4,8 @@ from ctypes import wintypes
 import psutil
 import screeninfo
 
+from tempo_core import process_snapshot
+
 user32 = ctypes.WinDLL("user32", use_last_error=True)
 
 SW_MINIMIZE = 6
@@ -64,10 +66,7 @@ def enum_windows():
 
 
 def does_window_exist(process_name: str, *, use_substring_check: bool = False) -> bool:
-    for proc in psutil.process_iter(["name"]):
-        if proc.info["name"] and proc.info["name"].lower() == process_name.lower():  # type: ignore
-            return True
-    return False
+    return bool(process_snapshot.get_processes_by_name(process_name))
 
 
 def get_windows_by_title(